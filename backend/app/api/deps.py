@@ -1,8 +1,9 @@
-from typing import Annotated
+from contextlib import AbstractContextManager, contextmanager
+from typing import Annotated, Callable
 
 from jose import JWTError, jwt
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 
 from sqlalchemy.orm import Session
@@ -13,6 +14,7 @@ from pydantic import ValidationError
 from app.core.config import sessionLocal, engine, Base
 from app.core.settings import settings
 from app.core import security
+from app.core.principal_cache import attach_user, principal_cache, snapshot_user
 from app.models.users import User
 from app.models.students import Student
 from app.schemas.users import UserPublic
@@ -36,6 +38,16 @@ def get_db():
 SessionDeps = Annotated [Session, Depends(get_db)]
 
 
+def get_db_factory(request: Request) -> Callable[[], AbstractContextManager[Session]]:
+    """
+    Fabrique de sessions pour les réponses en flux, qui continuent après la fin de la route:
+    chaque appel ouvre une session avec get_db (ou sa surcharge dans app.dependency_overrides)
+    """
+    return contextmanager(request.app.dependency_overrides.get(get_db, get_db))
+
+SessionFactoryDeps = Annotated [Callable[[], AbstractContextManager[Session]], Depends(get_db_factory)]
+
+
 def get_current_user(db: SessionDeps, token: TokenDeps) -> UserPublic:
     """
     Fonction de dépendance. Retourne l'utilisateur actuel
@@ -51,10 +63,18 @@ def get_current_user(db: SessionDeps, token: TokenDeps) -> UserPublic:
             detail="Could not validate credentials",
         ) 
         
-    # corrigé: recevoir le user par le username pas l'id
-    user = db.execute(
-        select(User).where(User.username == username)
-    ).scalar_one_or_none()
+    # l'utilisateur est gardé en cache quelques secondes (app/core/principal_cache.py),
+    # les routes qui le modifient ou le suppriment invalident son entrée
+    cached = principal_cache.get(username) if username else None
+    if cached:
+        user = attach_user(db, cached)
+    else:
+        # corrigé: recevoir le user par le username pas l'id
+        user = db.execute(
+            select(User).where(User.username == username)
+        ).scalar_one_or_none()
+        if user:
+            principal_cache.set(username, snapshot_user(user))
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
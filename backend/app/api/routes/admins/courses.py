@@ -4,6 +4,7 @@ from fastapi.routing import APIRouter
 from fastapi.exceptions import HTTPException
 
 from app.api.deps import get_current_active_admin, SessionDeps
+from app.utils.pagination import CountMode
 from app.models.university import Course
 from app.schemas.message import Message
 from app.schemas.university import CourseCreate, CourseUpdate, CourseResponse, CoursesResponse
@@ -20,11 +21,11 @@ router = APIRouter(prefix="/courses", tags=["courses"])
 
 
 @router.get("/", dependencies=[Depends(get_current_active_admin)], response_model=CoursesResponse)
-def read_courses_route(db: SessionDeps, skip: int = 0, limit: int = 100) -> CoursesResponse:
+def read_courses_route(db: SessionDeps, skip: int = 0, limit: int = 100, cursor: str | None = None, count: CountMode = CountMode.EXACT) -> CoursesResponse:
     """
     Récupérer la liste de toutes les cours
     """
-    courses = read_courses(db=db, skip=skip, limit=limit)
+    courses = read_courses(db=db, skip=skip, limit=limit, cursor=cursor, count_mode=count)
     return courses
 
 @router.post("/", dependencies=[Depends(get_current_active_admin)], response_model=CourseResponse)
@@ -4,6 +4,7 @@ from fastapi.routing import APIRouter
 from fastapi.exceptions import HTTPException
 
 from app.api.deps import get_current_active_admin, SessionDeps
+from app.utils.pagination import CountMode
 from app.schemas.university import DepartementsResponse, DepartmentResponse, DepartmentCreate, DepartmentUpdate
 from app.schemas.message import Message
 from app.models.university import Department
@@ -19,11 +20,11 @@ router = APIRouter(prefix="/departments", tags=["departments"])
 
 
 @router.get("/", dependencies=[Depends(get_current_active_admin)], response_model=DepartementsResponse)
-def read_departement_route(db: SessionDeps, skip: int = 0, limit: int = 100) -> DepartementsResponse:
+def read_departement_route(db: SessionDeps, skip: int = 0, limit: int = 100, cursor: str | None = None, count: CountMode = CountMode.EXACT) -> DepartementsResponse:
     """
     Récupérer la liste de tous les departements
     """
-    department = read_departement(db=db, skip=skip, limit=limit)
+    department = read_departement(db=db, skip=skip, limit=limit, cursor=cursor, count_mode=count)
     return department
 
 @router.post("/", dependencies=[Depends(get_current_active_admin)], response_model=DepartmentResponse)
@@ -4,6 +4,7 @@ from fastapi.routing import APIRouter
 from fastapi.exceptions import HTTPException
 
 from app.api.deps import get_current_active_admin, SessionDeps
+from app.utils.pagination import CountMode
 from app.models.university import Faculty
 from app.schemas.message import Message
 from app.schemas.university import FacultiesResponse, FacultyResponse, FacultyCreate, FacultyUpdate
@@ -20,11 +21,11 @@ router = APIRouter(prefix="/faculties", tags=["faculties"])
 
 
 @router.get("/", dependencies=[Depends(get_current_active_admin)], response_model=FacultiesResponse)
-def read_faculties_route(db: SessionDeps, skip: int = 0, limit: int = 100) -> FacultiesResponse:
+def read_faculties_route(db: SessionDeps, skip: int = 0, limit: int = 100, cursor: str | None = None, count: CountMode = CountMode.EXACT) -> FacultiesResponse:
     """
     Récupérer la liste de toutes les facultés
     """
-    faculties = read_faculties(db=db, skip=skip, limit=limit)
+    faculties = read_faculties(db=db, skip=skip, limit=limit, cursor=cursor, count_mode=count)
     return faculties
 
 @router.post("/", dependencies=[Depends(get_current_active_admin)], response_model=FacultyResponse)
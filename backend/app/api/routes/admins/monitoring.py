@@ -0,0 +1,16 @@
+from fastapi import Depends
+from fastapi.routing import APIRouter
+
+from app.api.deps import get_current_active_admin
+from app.core.config import engine, pool_status
+from app.schemas.monitoring import DbPoolStatus
+
+router = APIRouter(prefix="/internal", tags=["internal"])
+
+
+@router.get("/db-pool", dependencies=[Depends(get_current_active_admin)], response_model=DbPoolStatus)
+def read_db_pool_status() -> DbPoolStatus:
+    """
+    État du pool de connexions du processus qui répond (chaque worker de l'API a le sien)
+    """
+    return DbPoolStatus.model_validate(pool_status(engine))
@@ -4,6 +4,7 @@ from fastapi.routing import APIRouter
 from fastapi.exceptions import HTTPException
 
 from app.api.deps import get_current_active_admin, SessionDeps
+from app.utils.pagination import CountMode
 from app.models.university import Program
 from app.schemas.message import Message
 from app.schemas.university import ProgramCreate, ProgramUpdate, ProgramResponse, ProgramsResponse
@@ -19,11 +20,11 @@ router = APIRouter(prefix="/programs", tags=["programs"])
 
 
 @router.get("/", dependencies=[Depends(get_current_active_admin)], response_model=ProgramsResponse)
-def read_programs_route(db: SessionDeps, skip: int = 0, limit: int = 100) -> ProgramsResponse:
+def read_programs_route(db: SessionDeps, skip: int = 0, limit: int = 100, cursor: str | None = None, count: CountMode = CountMode.EXACT) -> ProgramsResponse:
     """
     Récupérer la liste de toutes les programs
     """
-    programs = read_programs(db=db, skip=skip, limit=limit)
+    programs = read_programs(db=db, skip=skip, limit=limit, cursor=cursor, count_mode=count)
     return programs
 
 @router.post("/", dependencies=[Depends(get_current_active_admin)], response_model=ProgramResponse)
@@ -1,24 +1,27 @@
-import uuid
-from datetime import datetime
-from typing import Any, List, Optional
+from typing import List, Optional
 from uuid import UUID
 
-from sqlalchemy import func, select
-
-from fastapi import APIRouter, Depends, status, Body
+from fastapi import APIRouter, Depends, Body, File, UploadFile
 from fastapi.exceptions import HTTPException
 
 from app.api.deps import SessionDeps, get_current_active_admin
 from app.models.students import Student, StudentStatus
 from app.models.enrollments import Enrollment
-from app.models.student_history import StudentHistory
 from app.schemas.message import Message
+from app.schemas.enrollments import EnrollmentResult, EnrollmentResultsReport
+from app.utils.csv_files import InvalidCsvFile, read_csv_rows
 from app.crud.admin.services_inscription.enrollments import (
     create_enrollment,
     update_student_academic_info,
     close_enrollment,
-    mark_student_as_graduated
+    mark_student_as_graduated,
+    promote_enrollments,
+    get_enrollment_overview,
+    close_enrollments_in_bulk,
+    parse_enrollment_results,
+    graduate_cohort
 )
+from app.crud.admin.services_inscription.enrollment_statistics import rebuild_enrollment_statistics
 
 router = APIRouter(prefix="/students", tags=["Students"])
 
@@ -27,12 +30,12 @@ router = APIRouter(prefix="/students", tags=["Students"])
 
 @router.post("/{student_id}/nouvelle-annee", dependencies=[Depends(get_current_active_admin)])
 def inscrire_nouvelle_annee(
+    db: SessionDeps,
     student_id: UUID,
     annee_academique: str = Body(...),  # "2024-2025"
     nouveau_niveau: str = Body(...),  # L2, L3, M1, etc.
     id_parcours: Optional[int] = Body(None),
     id_departement: Optional[int] = Body(None),
-    db: SessionDeps = Depends()
 ) -> dict:
     """
     Inscrit un étudiant pour une nouvelle année académique (passage en année supérieure)
@@ -91,11 +94,11 @@ def inscrire_nouvelle_annee(
 
 @router.post("/enrollments/{enrollment_id}/cloturer", dependencies=[Depends(get_current_active_admin)])
 def cloturer_annee(
+    db: SessionDeps,
     enrollment_id: int,
     est_admis: bool = Body(...),
     moyenne_annuelle: Optional[float] = Body(None),
     credits_obtenus: int = Body(0),
-    db: SessionDeps = Depends()
 ) -> Message:
     """
     Clôture une année académique pour un étudiant (saisie des résultats)
@@ -124,14 +127,74 @@ def cloturer_annee(
     )
 
 
+# ============ STATISTIQUES DES INSCRIPTIONS ============
+
+@router.get("/inscriptions/statistiques", dependencies=[Depends(get_current_active_admin)])
+def get_enrollment_statistics_route(
+    db: SessionDeps,
+    annee_academique: Optional[str] = None
+) -> dict:
+    """
+    Retourne les totaux par année et les statistiques par niveau en un seul appel
+    Sans année, retourne toutes les années académiques
+    """
+    return get_enrollment_overview(db=db, annee_academique=annee_academique)
+
+
+@router.post("/inscriptions/statistiques/recalculer", dependencies=[Depends(get_current_active_admin)])
+def rebuild_enrollment_statistics_route(db: SessionDeps) -> Message:
+    """
+    Recalcule les compteurs de statistiques à partir des inscriptions
+    """
+    groupes = rebuild_enrollment_statistics(db)
+    return Message(message=f"Statistiques recalculées ({groupes} groupes)")
+
+
+# ============ CLÔTURER UNE PROMOTION ============
+
+@router.post("/enrollments/cloturer", dependencies=[Depends(get_current_active_admin)])
+def cloturer_annee_en_masse(
+    results: List[EnrollmentResult],
+    db: SessionDeps
+) -> EnrollmentResultsReport:
+    """
+    Clôture en une seule transaction les inscriptions d'une promotion (saisie des résultats)
+    Retourne le nombre d'inscriptions clôturées et les erreurs ligne par ligne
+    """
+    report = close_enrollments_in_bulk(
+        db=db,
+        results=[(ligne, result) for ligne, result in enumerate(results, start=1)]
+    )
+    return EnrollmentResultsReport.model_validate(report)
+
+
+@router.post("/enrollments/cloturer/csv", dependencies=[Depends(get_current_active_admin)])
+def cloturer_annee_en_masse_csv(
+    db: SessionDeps,
+    file: UploadFile = File(...)
+) -> EnrollmentResultsReport:
+    """
+    Clôture les inscriptions à partir d'un fichier CSV
+    Colonnes: enrollment_id, est_admis, moyenne, credits
+    """
+    try:
+        results, erreurs = parse_enrollment_results(read_csv_rows(file.file))
+    except InvalidCsvFile as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    report = close_enrollments_in_bulk(db=db, results=results)
+    report["erreurs"] = sorted(erreurs + report["erreurs"], key=lambda erreur: erreur["ligne"])
+    return EnrollmentResultsReport.model_validate(report)
+
+
 # ============ DIPLÔMER UN ÉTUDIANT ============
 
 @router.post("/{student_id}/diplomer", dependencies=[Depends(get_current_active_admin)])
 def diplomer_student(
+    db: SessionDeps,
     student_id: UUID,
     type_diplome: str = Body(...),  # "Licence", "Master", etc.
     mention: Optional[str] = Body(None),  # "Passable", "Assez bien", "Bien", "Très bien"
-    db: SessionDeps = Depends()
 ) -> dict:
     """
     Marque un étudiant comme diplômé (devient un ancien)
@@ -146,16 +209,7 @@ def diplomer_student(
             detail="Seuls les étudiants actifs peuvent être diplômés"
         )
     
-    # Récupérer la dernière inscription
-    last_enrollment = db.query(Enrollment).filter(
-        Enrollment.student_id == student_id
-    ).order_by(Enrollment.date_inscription.desc()).first()
-    
-    if last_enrollment:
-        last_enrollment.statut = "validée"
-        last_enrollment.est_admis = True
-    
-    # Marquer comme ancien
+    # Marquer comme ancien, valider la dernière inscription et créer l'historique
     mark_student_as_graduated(
         db=db,
         student_id=student_id,
@@ -163,25 +217,6 @@ def diplomer_student(
         mention=mention
     )
     
-    # Créer une entrée dans l'historique
-    if last_enrollment:
-        history = StudentHistory(
-            student_id=student.id,
-            annee_academique=last_enrollment.annee_academique,
-            date_debut=last_enrollment.date_inscription,
-            date_fin=func.current_date(),
-            statut="diplômé",
-            niveau=last_enrollment.niveau,
-            id_departement=last_enrollment.id_departement,
-            id_parcours=last_enrollment.id_parcours,
-            est_diplome=True,
-            motif_fin=f"Diplômé - {type_diplome}" + (f" - Mention {mention}" if mention else ""),
-            notes=f"Type de diplôme: {type_diplome}, Mention: {mention or 'N/A'}"
-        )
-        db.add(history) 
-        db.commit()
-        db.refresh(student)
-    
     return {
         "message": f"Étudiant diplômé avec succès ({type_diplome})",
         "student": {
@@ -195,6 +230,37 @@ def diplomer_student(
     }
 
 
+# ============ DIPLÔMER UNE PROMOTION ============
+
+@router.post("/diplomes/promotion", dependencies=[Depends(get_current_active_admin)])
+def diplomer_promotion(
+    db: SessionDeps,
+    annee_academique: str = Body(...),
+    niveau: str = Body(...),  # "L3", "M2"
+    id_parcours: int = Body(...),
+    type_diplome: str = Body(...),
+    mention: Optional[str] = Body(None),
+    admis_seulement: bool = Body(True)
+) -> dict:
+    """
+    Diplôme en masse les étudiants actifs d'une promotion (année + niveau + parcours)
+    """
+    diplomes = graduate_cohort(
+        db=db,
+        annee_academique=annee_academique,
+        niveau=niveau,
+        id_parcours=id_parcours,
+        type_diplome=type_diplome,
+        mention=mention,
+        admis_only=admis_seulement
+    )
+    
+    return {
+        "message": f"{diplomes} étudiants diplômés ({type_diplome})",
+        "nombre_diplomes": diplomes
+    }
+
+
 # ============ LISTER LES INSCRIPTIONS D'UN ÉTUDIANT ============
 
 @router.get("/{student_id}/inscriptions", dependencies=[Depends(get_current_active_admin)])
@@ -230,54 +296,26 @@ def get_student_enrollments(student_id: UUID, db: SessionDeps) -> List[dict]:
 
 @router.post("/inscriptions-massives", dependencies=[Depends(get_current_active_admin)])
 def inscription_massive_nouvelle_annee(
+    db: SessionDeps,
     annee_academique: str = Body(...),
     niveau_source: str = Body(...),  # "L1" (ceux qui étaient en L1)
     niveau_destination: str = Body(...),  # "L2" (où ils vont)
     admis_seulement: bool = Body(True),  # Inscrire seulement ceux qui ont réussi
-    db: SessionDeps = Depends()
 ) -> dict:
     """
     Inscrit massivement tous les étudiants admis d'un niveau pour l'année suivante
+    L'anti-jointure et l'insertion sont faites en une seule requête INSERT ... SELECT
     """
-    # Récupérer l'année académique précédente
-    annee_parts = annee_academique.split("-")
-    annee_precedente = f"{int(annee_parts[0])-1}-{int(annee_parts[1])-1}"
-    
-    # Récupérer tous les enrollments de l'année précédente pour ce niveau
-    enrollments_precedents = db.query(Enrollment).filter(
-        Enrollment.annee_academique == annee_precedente,
-        Enrollment.niveau == niveau_source
+    result = promote_enrollments(
+        db=db,
+        annee_academique=annee_academique,
+        niveau_source=niveau_source,
+        niveau_destination=niveau_destination,
+        admis_only=admis_seulement
     )
     
-    if admis_seulement:
-        enrollments_precedents = enrollments_precedents.filter(Enrollment.est_admis == True)
-    
-    enrollments_precedents = enrollments_precedents.all()
-    
-    inscriptions_creees = 0
-    for old_enrollment in enrollments_precedents:
-        # Vérifier que l'étudiant n'est pas déjà inscrit
-        existing = db.query(Enrollment).filter(
-            Enrollment.student_id == old_enrollment.student_id,
-            Enrollment.annee_academique == annee_academique
-        ).first()
-        
-        if not existing:
-            new_enrollment = Enrollment(
-                student_id=old_enrollment.student_id,
-                annee_academique=annee_academique,
-                niveau=niveau_destination,
-                id_departement=old_enrollment.id_departement,
-                id_parcours=old_enrollment.id_parcours,
-                date_inscription=func.current_date(),
-                statut="en_cours"
-            )
-            db.add(new_enrollment)
-            inscriptions_creees += 1
-    
-    db.commit()
-    
     return {
-        "message": f"{inscriptions_creees} étudiants inscrits en {niveau_destination} pour {annee_academique}",
-        "nombre_inscriptions": inscriptions_creees
+        "message": f"{result['created']} étudiants inscrits en {niveau_destination} pour {annee_academique}",
+        "nombre_inscriptions": result["created"],
+        "nombre_ignores": result["skipped"]
     }
\ No newline at end of file
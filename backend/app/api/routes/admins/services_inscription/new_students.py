@@ -1,19 +1,27 @@
 import uuid
 from datetime import datetime
-from typing import Any, List
+from typing import Any, List, Optional
 from uuid import UUID
 
 from sqlalchemy import select
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, status, File, UploadFile
+from fastapi.responses import StreamingResponse
 from fastapi.exceptions import HTTPException
 
-from app.api.deps import SessionDeps, get_current_active_admin
+from app.api.deps import SessionDeps, SessionFactoryDeps, get_current_active_admin
+from app.utils.exports import ExportFormat, FORMATTERS, MEDIA_TYPES
+from app.utils.csv_files import InvalidCsvFile
+from app.utils.spreadsheets import UnsupportedSpreadsheet, read_spreadsheet_rows
+from app.utils.pagination import CountMode
 from app.models.students import Student, StudentStatus
 from app.schemas.message import Message
 from app.crud.admin.services_inscription.new_students import (
     students_list as crud_students_list,
     get_pending_students,
+    export_students,
+    EXPORT_COLUMNS,
+    import_students,
     valider_student,
     rejeter_student,
     enroll_student as crud_enroll_student,
@@ -21,24 +29,56 @@ from app.crud.admin.services_inscription.new_students import (
     delete_student as crud_delete_student,
     get_student as crud_get_student
 )
-from app.schemas.students import StudentResponse, StudentUpdate, StudentCreate, StudentsResponse
+from app.schemas.students import StudentResponse, StudentUpdate, StudentCreate, StudentsResponse, StudentImportReport
 
 router = APIRouter(prefix="/students", tags=["Students"])
 
 
 @router.get("/",dependencies=[Depends(get_current_active_admin)])
-def get_students_list_route(db: SessionDeps, status: StudentStatus | None = None, skip: int = 1, limit: int = 100) -> StudentsResponse | Any:
+def get_students_list_route(db: SessionDeps, status: StudentStatus | None = None, skip: int = 1, limit: int = 100, cursor: str | None = None, count: CountMode = CountMode.EXACT) -> StudentsResponse | Any:
     """
     Retourne une liste de tous les étudiants
     """
-    return crud_students_list(db=db, skip=skip, limit=limit)
+    return crud_students_list(db=db, skip=skip, limit=limit, cursor=cursor, count_mode=count)
+
+@router.get("/export", dependencies=[Depends(get_current_active_admin)])
+def export_students_route(
+    session_factory: SessionFactoryDeps,
+    format: ExportFormat = ExportFormat.CSV,
+    statut: StudentStatus | None = None,
+    id_departement: Optional[int] = None,
+    id_parcours: Optional[int] = None,
+    annee_academique: Optional[str] = None
+) -> StreamingResponse:
+    """
+    Exporte les étudiants en CSV ou NDJSON, en flux
+    Filtres: statut, département, parcours et année académique (inscription)
+    """
+    def content():
+        # la session de la requête peut être fermée avant l'envoi de la réponse,
+        # le flux utilise donc sa propre session
+        with session_factory() as db:
+            rows = export_students(
+                db=db,
+                statut=statut,
+                id_departement=id_departement,
+                id_parcours=id_parcours,
+                annee_academique=annee_academique
+            )
+            yield from FORMATTERS[format](EXPORT_COLUMNS, rows)
+    
+    return StreamingResponse(
+        content(),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="etudiants.{format.value}"'}
+    )
 
 @router.get("/pending", dependancies=[Depends(get_current_active_admin)])
-def get_pending_students_route(db: SessionDeps, skip: int = 0, limit: int = 100) -> StudentsResponse | Any:
+def get_pending_students_route(db: SessionDeps, skip: int = 0, limit: int = 100, cursor: str | None = None, count: CountMode = CountMode.EXACT) -> StudentsResponse | Any:
     """
     Retourne la liste des dossiers en attente de validation
     """
-    return get_pending_students(db=db, skip=skip, limit=limit)
+    return get_pending_students(db=db, skip=skip, limit=limit, cursor=cursor, count_mode=count)
 
 @router.post("/{student_id}/valider", dependencies=[Depends(get_current_active_admin)])
 def valider_student_route(db: SessionDeps, student_id: UUID) -> StudentResponse | Any:
@@ -102,6 +142,23 @@ def enroll_student_route(data: StudentCreate, db: SessionDeps) -> StudentRespons
         )
     return crud_enroll_student(db=db, data=data)
 
+@router.post("/import", dependencies=[Depends(get_current_active_admin)])
+def import_students_route(db: SessionDeps, file: UploadFile = File(...)) -> StudentImportReport:
+    """
+    Importe en masse des étudiants depuis un fichier CSV ou XLSX
+    Les colonnes sont celles de la création d'un étudiant (StudentCreate)
+    Retourne le nombre d'étudiants importés et les erreurs ligne par ligne
+    """
+    try:
+        rows = read_spreadsheet_rows(file.file, file.filename or "")
+        report = import_students(db=db, rows=rows)
+    except (UnsupportedSpreadsheet, InvalidCsvFile) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return StudentImportReport.model_validate(report)
+
 @router.get("/{student_id}", dependencies=[Depends(get_current_active_admin)])
 def get_student_route(student_id: UUID, db: SessionDeps) -> StudentResponse | Any:
     """
@@ -8,16 +8,18 @@ from datetime import datetime
 from typing import Any, List
 from uuid import UUID
 
-from sqlalchemy import func, select
+from sqlalchemy import and_, case, exists, func, select
 
 from fastapi import APIRouter, Depends, status
 from fastapi.exceptions import HTTPException
 
 from app.api.deps import SessionDeps, get_current_active_admin
+from app.utils.pagination import CountMode, paginate
 from app.models.students import Student, StudentStatus
 from app.schemas.message import Message
 from app.crud.admin.services_inscription.new_students import (
     students_list as crud_students_list,
+    select_students_for_list,
     get_pending_students,
     valider_student,
     rejeter_student,
@@ -35,12 +37,12 @@ router = APIRouter(prefix="/students", tags=["Students"])
 
 @router.post("/{student_id}/marquer-comme-ancien", dependencies=[Depends(get_current_active_admin)])
 def marquer_comme_ancien(
+    db: SessionDeps,
     student_id: UUID,
     annee_sortie: int = Body(...),
     motif_sortie: str = Body(...),  # diplômé, abandon, transfert, exclusion
     dernier_niveau: Optional[str] = Body(None),
     est_diplome: bool = Body(False),
-    db: SessionDeps = Depends()
 ) -> Message:
     """
     Marque un étudiant comme ancien (fin d'études, abandon, diplômé, etc.)
@@ -91,37 +93,47 @@ def get_anciens_students(
     limit: int = 100,
     annee_sortie: Optional[int] = None,
     motif_sortie: Optional[str] = None,
-    diplomes_uniquement: bool = False
+    diplomes_uniquement: bool = False,
+    cursor: Optional[str] = None,
+    count: CountMode = CountMode.EXACT
 ) -> StudentsResponse:
     """
     Liste tous les anciens étudiants avec filtres optionnels
     """
-    query = db.query(Student).filter(Student.est_ancien == True)
+    statement = select_students_for_list().where(Student.est_ancien == True)
     
     if annee_sortie:
-        query = query.filter(Student.annee_sortie == annee_sortie)
+        statement = statement.where(Student.annee_sortie == annee_sortie)
     
     if motif_sortie:
-        query = query.filter(Student.motif_sortie == motif_sortie)
+        statement = statement.where(Student.motif_sortie == motif_sortie)
     
     if diplomes_uniquement:
-        query = query.join(StudentHistory).filter(StudentHistory.est_diplome == True)
-    
-    count = query.count()
-    students = query.offset(skip).limit(limit).all()
+        # exists() plutôt qu'une jointure: un étudiant avec plusieurs lignes
+        # d'historique ne doit apparaître qu'une fois
+        statement = statement.where(
+            exists().where(
+                StudentHistory.student_id == Student.id,
+                StudentHistory.est_diplome == True
+            )
+        )
     
-    return StudentsResponse(data=students, count=count)
+    page = paginate(
+        db, statement, order_by=(Student.id,),
+        skip=skip, limit=limit, cursor=cursor, count_mode=count
+    )
+    return StudentsResponse.model_validate(page)
 
 
 # ============ RÉINSCRIPTION D'UN ANCIEN ÉTUDIANT ============
 
 @router.post("/{student_id}/reinscription", dependencies=[Depends(get_current_active_admin)])
 def reinscription_ancien_student(
+    db: SessionDeps,
     student_id: UUID,
     nouveau_parcours_id: Optional[int] = Body(None),
     nouveau_departement_id: Optional[int] = Body(None),
     notes: Optional[str] = Body(None),
-    db: SessionDeps = Depends()
 ) -> StudentResponse:
     """
     Réinscrit un ancien étudiant pour une nouvelle année académique
@@ -178,10 +190,10 @@ def reinscription_ancien_student(
 
 @router.post("/demande-reinscription/{student_id}")
 def demander_reinscription(
+    db: SessionDeps,
     student_id: UUID,
     nouveau_parcours_id: Optional[int] = Body(None),
     motif_reinscription: str = Body(...),
-    db: SessionDeps = Depends()
 ) -> Message:
     """
     Permet à un ancien étudiant de demander sa réinscription (route publique)
@@ -222,8 +234,8 @@ def demander_reinscription(
 
 @router.post("/{student_id}/valider-reinscription", dependencies=[Depends(get_current_active_admin)])
 def valider_reinscription(
+    db: SessionDeps,
     student_id: UUID,
-    db: SessionDeps = Depends(),
     current_admin = Depends(get_current_active_admin)
 ) -> StudentResponse:
     """
@@ -308,10 +320,10 @@ def get_student_history(student_id: UUID, db: SessionDeps) -> List[dict]:
 
 @router.get("/anciens/rechercher", dependencies=[Depends(get_current_active_admin)])
 def rechercher_ancien_student(
+    db: SessionDeps,
     email: Optional[str] = None,
     nom: Optional[str] = None,
     id_etudiant: Optional[str] = None,
-    db: SessionDeps = Depends()
 ) -> List[StudentResponse]:
     """
     Recherche un ancien étudiant par email, nom ou ID étudiant
@@ -337,33 +349,32 @@ def rechercher_ancien_student(
 def stats_anciens_students(db: SessionDeps) -> dict:
     """
     Retourne des statistiques sur les anciens étudiants
+    Calculées en un seul passage sur la table des étudiants
     """
-    total_anciens = db.query(Student).filter(Student.est_ancien == True).count()
-    
-    diplomes = db.query(Student).join(StudentHistory).filter(
-        Student.est_ancien == True,
+    est_diplome = exists().where(
+        StudentHistory.student_id == Student.id,
         StudentHistory.est_diplome == True
-    ).count()
-    
-    abandons = db.query(Student).filter(
-        Student.est_ancien == True,
-        Student.motif_sortie == "abandon"
-    ).count()
-    
-    transferts = db.query(Student).filter(
-        Student.est_ancien == True,
-        Student.motif_sortie == "transfert"
-    ).count()
+    )
+    ancien = Student.est_ancien == True
+    
+    total_anciens, diplomes, abandons, transferts, reinscriptions = db.execute(
+        select(
+            func.sum(case((ancien, 1), else_=0)),
+            func.sum(case((and_(ancien, est_diplome), 1), else_=0)),
+            func.sum(case((and_(ancien, Student.motif_sortie == "abandon"), 1), else_=0)),
+            func.sum(case((and_(ancien, Student.motif_sortie == "transfert"), 1), else_=0)),
+            func.sum(case((Student.nombre_reinscriptions > 0, 1), else_=0))
+        )
+    ).one()
     
-    reinscriptions = db.query(Student).filter(
-        Student.nombre_reinscriptions > 0
-    ).count()
+    total_anciens = int(total_anciens or 0)
+    diplomes = int(diplomes or 0)
     
     return {
         "total_anciens": total_anciens,
         "diplomes": diplomes,
-        "abandons": abandons,
-        "transferts": transferts,
-        "reinscriptions": reinscriptions,
+        "abandons": int(abandons or 0),
+        "transferts": int(transferts or 0),
+        "reinscriptions": int(reinscriptions or 0),
         "taux_diplome": round((diplomes / total_anciens * 100) if total_anciens > 0 else 0, 2)
     }
\ No newline at end of file
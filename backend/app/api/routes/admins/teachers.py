@@ -8,6 +8,7 @@ from fastapi.exceptions import HTTPException
 from fastapi.routing import APIRouter
 
 from app.api.deps import get_current_active_admin, SessionDeps
+from app.utils.pagination import CountMode
 from app.schemas.teacher import TeacherUpdate, TeacherCreate, TeacherResponse, TeachersResponse
 from app.schemas.message import Message
 from app.models.teachers import Teacher
@@ -19,13 +20,13 @@ router = APIRouter(prefix="/teachers", tags=["teachers"])
 
 
 @router.get("/",dependencies=[Depends(get_current_active_admin)])
-def read_teachers_route(db: SessionDeps, skip: int = 0, limit: int = 100) -> TeachersResponse: 
+def read_teachers_route(db: SessionDeps, skip: int = 0, limit: int = 100, cursor: str | None = None, count: CountMode = CountMode.EXACT) -> TeachersResponse: 
     """
     Retourne la liste de tous les proffesseurs
     """
-    data = teacher.teachers_list(db=db, skip=skip, limit=limit)
+    data = teacher.teachers_list(db=db, skip=skip, limit=limit, cursor=cursor, count_mode=count)
     print(data)
-    return TeachersResponse.model_validate({"data": data["data"], "count": data["count"]})
+    return TeachersResponse.model_validate(data)
 
 @router.post("/create", dependencies=[Depends(get_current_active_admin)])
 def create_teacher_route(db: SessionDeps, data: TeacherCreate) -> TeacherResponse:
@@ -3,14 +3,28 @@ from typing import Annotated
 from fastapi import APIRouter, Depends,HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 
-from app.schemas.token import Token
+from app.schemas.message import Message
+from app.schemas.token import RefreshTokenRequest, Token
 from app.api.deps import SessionDeps
-from app.crud import users
+from app.crud import tokens, users
 from app.core.settings import settings
 from app.core import security
 
 router = APIRouter(tags=["login"])
 
+
+def create_tokens(username: str, refresh_token: str) -> Token:
+    access_token_expire = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    token_data = {
+        "sub": username,
+    }
+    return Token(
+        access_token=security.create_access_token(
+            data=token_data, expires_delta=access_token_expire
+        ),
+        refresh_token=refresh_token
+    )
+
 @router.post("/login/access-token")
 def login_for_access_token(
     db: SessionDeps, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
@@ -22,12 +36,25 @@ def login_for_access_token(
         raise HTTPException(status_code=400, detail="Incorrect username or password")
     elif not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    access_token_expire = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    token_data = {
-        "sub": user.username,
-    }
-    return Token(
-        access_token=security.create_access_token(
-            data=token_data, expires_delta=access_token_expire
-        )
-    )
\ No newline at end of file
+    refresh_token = tokens.create_refresh_token(db=db, user_id=user.id)
+    return create_tokens(user.username, refresh_token)
+
+@router.post("/login/refresh-token")
+def refresh_access_token(db: SessionDeps, body: RefreshTokenRequest) -> Token:
+    """
+    Nouveau token d'accès sans redemander le mot de passe
+    Le refresh token envoyé n'est plus valable ensuite: utiliser celui de la réponse
+    """
+    rotated = tokens.rotate_refresh_token(db=db, refresh_token=body.refresh_token)
+    if not rotated:
+        raise HTTPException(status_code=401, detail="Session expirée ou révoquée, reconnectez-vous")
+    user, refresh_token = rotated
+    return create_tokens(user.username, refresh_token)
+
+@router.post("/logout")
+def logout(db: SessionDeps, body: RefreshTokenRequest) -> Message:
+    """
+    Ferme la session du refresh token (le token d'accès reste valable jusqu'à son expiration)
+    """
+    tokens.revoke_refresh_token(db=db, refresh_token=body.refresh_token)
+    return Message(message="Session fermée")
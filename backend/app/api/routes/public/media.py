@@ -2,26 +2,38 @@ import io
 from uuid import UUID
 import qrcode
 
-from fastapi import BackgroundTasks, status
+from fastapi import BackgroundTasks, Header, Query, Response, status
 from fastapi.routing import APIRouter
 from fastapi import UploadFile, File, HTTPException, Depends
 from fastapi.responses import StreamingResponse
 
 from app.models.media import Media
-from app.schemas.media import MediaCreate, MediaResponse
+from app.schemas.media import MediaCreate, MediaResponse, MediasByOwnerResponse
 from app.schemas.message import Message
-from app.core import settings
-from app.api.deps import SessionDeps, get_current_active_admin
-from app.crud.public.media import add_media, delete_media
+from app.core.settings import settings
+from app.api.deps import CurrentUser, SessionDeps, get_current_active_admin
+from app.crud.public.media import add_media, delete_media, get_media_by_id, read_media_by_owners
+from app.crud.public.renditions import get_or_create_rendition, is_renderable
+from app.encryption_services import encryption_service
+from app.utils.media import RangeNotSatisfiable, etag_matches, parse_range_header
+from app.utils.renditions import RENDITION_FORMATS, InvalidImage, RenditionUnavailable
 from app.models.teachers import Teacher
 from app.models.students import Student
 
 router = APIRouter(prefix="/media", tags=["media"])
 
+# nombre maximum de propriétaires par requête groupée
+MAX_OWNERS_PER_LOOKUP = 500
+
+# types affichés dans le navigateur, les autres (dont le HTML ou le SVG, qui peuvent
+# contenir du script) sont toujours téléchargés
+INLINE_MEDIA_TYPES = {"image/png", "image/jpeg", "image/gif", "image/webp", "application/pdf"}
+
 @router.post("/{file_type}")
 def upload_media(
     db: SessionDeps,
     file_type: str,
+    background_tasks: BackgroundTasks,
     student_id: UUID | None = None,
     teacher_id: UUID | None = None,
     file: UploadFile = File(...),
@@ -39,20 +51,177 @@ def upload_media(
         student_id=student_id,
         teacher_id=teacher_id,
         file=file,
-        background_tasks=BackgroundTasks,
+        background_tasks=background_tasks,
     )
 
     return MediaResponse.model_validate(m)
 
 
-@router.delete("/delete/")
-def delete_media_route(db: SessionDeps, file_path: str, teacher_id: UUID = None, student_id: UUID = None) -> Message:
-    media = delete_media(
+@router.get("/", dependencies=[Depends(get_current_active_admin)], response_model=MediasByOwnerResponse)
+def read_medias_by_owners(
+    db: SessionDeps,
+    student_id: list[UUID] = Query(default=[]),
+    teacher_id: list[UUID] = Query(default=[]),
+    principal_only: bool = False,
+) -> MediasByOwnerResponse:
+    """
+    Médias de plusieurs étudiants et enseignants en une requête (ex: photos d'une liste de classe)
+    ?student_id=...&student_id=...&teacher_id=...&principal_only=true
+    """
+    if len(student_id) + len(teacher_id) > MAX_OWNERS_PER_LOOKUP:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{MAX_OWNERS_PER_LOOKUP} propriétaires au plus par requête"
+        )
+    medias = read_media_by_owners(
+        db=db, student_ids=student_id, teacher_ids=teacher_id, principal_only=principal_only
+    )
+    return MediasByOwnerResponse.model_validate(medias)
+
+
+def get_authorized_media(db: SessionDeps, current_user: CurrentUser, media_id: UUID) -> Media:
+    """
+    Le média, s'il existe et que l'utilisateur est admin ou son propriétaire
+    """
+    media = get_media_by_id(db=db, media_id=media_id)
+    if not media or not media.file_path:
+        raise HTTPException(status_code=404, detail="Média introuvable")
+
+    if not current_user.is_superuser and not (
+        (media.student_id and media.student_id == current_user.student_id)
+        or (media.teacher_id and media.teacher_id == current_user.teacher_id)
+    ):
+        raise HTTPException(status_code=403, detail="Accès refusé à ce média")
+    return media
+
+
+@router.delete("/{media_id}")
+def delete_media_route(db: SessionDeps, current_user: CurrentUser, media_id: UUID) -> Message:
+    """
+    Supprime un média par son id (le file_path peut être partagé par plusieurs médias de même contenu)
+    """
+    media = get_authorized_media(db, current_user, media_id)
+    deleted = delete_media(
         db=db,
-        file_path=file_path,
-        student_id=student_id,
-        teacher_id=teacher_id,
+        media_id=media.id,
+        student_id=media.student_id,
+        teacher_id=media.teacher_id,
     )
-    if not media:
+    if not deleted:
         raise HTTPException(status_code=404, detail="Fichier introuvable")
-    return Message(message='Média supprimé avec succès')
\ No newline at end of file
+    return Message(message='Média supprimé avec succès')
+
+
+@router.get("/{media_id}/thumbnail")
+def download_thumbnail(
+    db: SessionDeps,
+    current_user: CurrentUser,
+    media_id: UUID,
+    size: int = settings.MEDIA_RENDITION_SIZES[-1],
+    format: str = settings.MEDIA_RENDITION_FORMAT,
+    if_none_match: str | None = Header(default=None),
+):
+    """
+    Miniature d'une photo, pour les listes
+    Elle est générée à l'upload par les workers, ou à la première demande si elle manque
+    (ancien média, taille évincée du cache). Son contenu ne change jamais pour un même
+    média, le navigateur peut donc la garder longtemps
+    """
+    if size not in settings.MEDIA_RENDITION_SIZES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Taille non disponible, tailles possibles: {settings.MEDIA_RENDITION_SIZES}"
+        )
+    if format not in RENDITION_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Format non disponible: {format}")
+
+    media = get_authorized_media(db, current_user, media_id)
+    if not is_renderable(media):
+        raise HTTPException(status_code=404, detail="Pas de miniature pour ce média")
+
+    etag = f'"{media.checksum or media.id}-{size}.{format}"'
+    headers = {
+        "Cache-Control": "private, max-age=31536000, immutable",
+        "ETag": etag,
+    }
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    try:
+        rendition = get_or_create_rendition(db=db, media=media, size=size, rendition_format=format)
+    except InvalidImage as e:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(e))
+    except RenditionUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+    headers["Content-Length"] = str(rendition.file_size)
+    return StreamingResponse(
+        encryption_service.decrypt_stream(rendition.file_path, rendition.encryption_key_id, rendition.storage_location),
+        media_type=RENDITION_FORMATS[format][1],
+        headers=headers
+    )
+
+
+@router.get("/{media_id}")
+def download_media(
+    db: SessionDeps,
+    current_user: CurrentUser,
+    media_id: UUID,
+    range_header: str | None = Header(default=None, alias="Range"),
+    if_none_match: str | None = Header(default=None),
+    if_range: str | None = Header(default=None),
+):
+    """
+    Envoie le fichier déchiffré en flux
+    L'ETag est le SHA-256 du contenu: If-None-Match évite de renvoyer un fichier inchangé,
+    Range permet de reprendre un téléchargement ou de lire une vidéo/un PDF par morceaux
+    """
+    media = get_authorized_media(db, current_user, media_id)
+
+    media_type = media.mime_type or "application/octet-stream"
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, no-cache",
+        # le type vient du client à l'upload: le navigateur ne doit pas en deviner un autre
+        "X-Content-Type-Options": "nosniff",
+        "Content-Disposition": "inline" if media_type in INLINE_MEDIA_TYPES else "attachment",
+    }
+    etag = f'"{media.checksum}"' if media.checksum else None
+    if etag:
+        headers["ETag"] = etag
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    file_path, key_id, file_size = media.file_path, media.encryption_key_id, media.file_size
+    storage_location = media.storage_location
+
+    byte_range = None
+    # une plage n'est valable que pour la version du fichier connue par le client
+    if file_size is not None and (not if_range or if_range == etag):
+        try:
+            byte_range = parse_range_header(range_header, file_size)
+        except RangeNotSatisfiable:
+            raise HTTPException(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                detail="Plage demandée invalide",
+                headers={"Content-Range": f"bytes */{file_size}"}
+            )
+
+    if byte_range:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            encryption_service.decrypt_range(file_path, start, end, key_id, storage_location),
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            media_type=media_type,
+            headers=headers
+        )
+
+    if file_size is not None:
+        headers["Content-Length"] = str(file_size)
+    return StreamingResponse(
+        encryption_service.decrypt_stream(file_path, key_id, storage_location),
+        media_type=media_type,
+        headers=headers
+    )
@@ -1,7 +1,7 @@
 from typing import Any
 from uuid import UUID
 
-from sqlalchemy import func, select
+from sqlalchemy import select
 
 from fastapi import Depends
 from fastapi.routing import APIRouter
@@ -9,9 +9,11 @@ from fastapi.exceptions import HTTPException
 
 from app.models.users import User
 from app.core.security import verify_password, get_password_hash
-from app.crud import users
+from app.core.principal_cache import principal_cache
+from app.crud import tokens, users
 from app.schemas.message import Message
 from app.api.deps import (SessionDeps, CurrentUser, get_current_active_admin)
+from app.utils.pagination import CountMode, paginate
 from app.schemas.users import (
     UserPublic,
     UsersPublic,
@@ -25,17 +27,21 @@ router = APIRouter(prefix="/users", tags=["users"])
 
 
 @router.get("/", dependencies=[Depends(get_current_active_admin)], response_model=UsersPublic)
-def read_users(db: SessionDeps, skip: int = 0, limit: int = 100):
+def read_users(
+    db: SessionDeps,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    count: CountMode = CountMode.EXACT
+):
     """
     Récupérer tous les utilisateurs
     """
-    count_statement = select(func.count()).select_from(User)
-    count = db.execute(count_statement).scalar()
-
-    statement = select(User).offset(skip).limit(limit)
-    users = db.execute(statement).scalars().all()
-    
-    return UsersPublic.model_validate({"data":users, "count":count})
+    page = paginate(
+        db, select(User), order_by=(User.id,),
+        skip=skip, limit=limit, cursor=cursor, count_mode=count
+    )
+    return UsersPublic.model_validate(page)
     
 @router.post( "/", dependencies=[Depends(get_current_active_admin)], response_model=UserPublic )
 def create_user(*, db: SessionDeps, user_in: UserCreate) -> Any:
@@ -69,10 +75,12 @@ def update_user_me(
                 status_code=409,
                 detail="Un utilisateur avec ce nom existe déjà"
             )
+    old_username = current_user.username
     user_data = user_in.model_dump(exclude_unset=True)
     for key, value in user_data.items():
         setattr(current_user, key, value)
     db.commit()
+    principal_cache.invalidate(old_username, current_user.username)
     db.refresh(current_user)
     return current_user
 
@@ -94,6 +102,9 @@ def update_password_me(
     current_user.hashed_password = hashed_password
     db.add(current_user)
     db.commit()
+    principal_cache.invalidate(current_user.username)
+    # les sessions ouvertes avec l'ancien mot de passe sont fermées
+    tokens.revoke_user_tokens(db=db, user_id=current_user.id)
     return Message(message="Mot de passe mis à jour avec succès")
 
 @router.get("/me", response_model=UserPublic)
@@ -113,8 +124,10 @@ def delete_user_me(db: SessionDeps, current_user: CurrentUser) -> Any:
             status_code=400,
             detail="Les admins n'ont pas l'autorisation de se supprimer"
         )
+    username = current_user.username
     db.delete(current_user)
     db.commit()
+    principal_cache.invalidate(username)
     return Message(message="Utilisateur supprimé avec succes")
 
 @router.post("/signup", response_model=UserPublic)
@@ -180,6 +193,8 @@ def delete_user(db: SessionDeps, current_user: CurrentUser, user_id: UUID) -> Me
         raise HTTPException(
             status_code=403, detail="Les admins n'ont pas le droit de se supprimer"
         )
+    username = user.username
     db.delete(user)
     db.commit()
+    principal_cache.invalidate(username)
     return Message(message="Utilisateur supprimer avec succès")
\ No newline at end of file
@@ -0,0 +1,160 @@
+import json
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from sqlalchemy import literal, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.encryption_services import FERNET_KEY_IDS, encryption_service
+from app.models.media import Media, MediaBlob, MediaKeyRotation, MediaRendition
+from app.utils.pagination import decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+ROTATION_BATCH_SIZE = 100
+ROTATION_WORKERS = 4
+
+# Tables qui pointent vers des fichiers chiffrés: (nom, modèle, clé de parcours, dossier des nouveaux fichiers)
+# Les blobs passent en premier: leurs médias sont mis à jour avec eux
+ROTATION_TABLES = [
+    ("media_blobs", MediaBlob, MediaBlob.checksum, literal("blobs")),
+    ("media", Media, Media.id, Media.file_type),
+    ("media_renditions", MediaRendition, MediaRendition.id, literal("renditions")),
+]
+
+
+def reencrypt_file(
+    file_path: str,
+    key_id: Optional[str],
+    storage_location: Optional[str],
+    folder: str,
+    target_key_id: str
+) -> tuple[str, str]:
+    """
+    Déchiffre un fichier et le réécrit avec la clé cible, en flux, dans un nouveau fichier
+    du stockage courant. L'ancien fichier n'est pas modifié
+    Returns: (nouveau chemin, storage_location)
+    """
+    new_path = encryption_service.create_storage_path(str(uuid.uuid4()), folder or "media")
+    with encryption_service.storage.open_write(new_path) as destination:
+        encryptor = encryption_service.encryptor(destination, target_key_id)
+        for chunk in encryption_service.decrypt_stream(file_path, key_id, storage_location):
+            encryptor.write(chunk)
+        encryptor.close()
+    return new_path, encryption_service.get_storage_location()
+
+
+def _same_file(model, file_path: str, storage_location: Optional[str]):
+    location = model.storage_location.is_(None) if storage_location is None else model.storage_location == storage_location
+    return (model.file_path == file_path) & location
+
+
+def _switch_file(
+    db: Session,
+    old: tuple[str, Optional[str]],
+    new: tuple[str, str],
+    target_key_id: str
+) -> int:
+    """
+    Fait pointer toutes les lignes qui utilisent l'ancien fichier vers le nouveau, sans commit
+    Returns: nombre de lignes modifiées (0 si le fichier a été supprimé entre-temps)
+    """
+    updated = 0
+    for _, model, _, _ in ROTATION_TABLES:
+        updated += db.execute(
+            update(model)
+            .where(_same_file(model, *old))
+            .values(file_path=new[0], storage_location=new[1], encryption_key_id=target_key_id)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+    return updated
+
+
+def _reencrypt_row(row, target_key_id: str):
+    _, file_path, key_id, storage_location, folder = row
+    try:
+        return reencrypt_file(file_path, key_id, storage_location, folder, target_key_id), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def rotate_keys(
+    db: Session,
+    *,
+    target_key_id: Optional[str] = None,
+    workers: int = ROTATION_WORKERS,
+    batch_size: int = ROTATION_BATCH_SIZE,
+    on_progress: Optional[Callable[[MediaKeyRotation], None]] = None
+) -> MediaKeyRotation:
+    """
+    Réchiffre avec target_key_id (la clé courante par défaut) tous les fichiers qui utilisent
+    une autre clé, sans arrêter l'application
+
+    Les fichiers sont lus par lots de batch_size et réchiffrés par workers threads au plus.
+    Après chaque lot, les lignes sont mises à jour et la position enregistrée (checkpoint):
+    une rotation interrompue pour la même clé reprend à ce point. Les anciens fichiers
+    sont supprimés après le commit. Un fichier en échec garde sa clé et est compté dans failed,
+    une nouvelle rotation le reprendra
+    """
+    target_key_id = target_key_id or encryption_service.get_key_id()
+    if target_key_id in FERNET_KEY_IDS:
+        raise ValueError(f"{target_key_id} est une clé Fernet, elle ne peut pas être une clé cible")
+    # la clé cible est créée si besoin, elle doit ensuite être copiée sur les autres serveurs
+    encryption_service.key_ring.get(target_key_id, create=True)
+
+    rotation = db.execute(
+        select(MediaKeyRotation)
+        .where(MediaKeyRotation.target_key_id == target_key_id, MediaKeyRotation.status == "running")
+        .order_by(MediaKeyRotation.id.desc())
+    ).scalars().first()
+    if rotation is None:
+        rotation = MediaKeyRotation(target_key_id=target_key_id, status="running", reencrypted=0, failed=0)
+        db.add(rotation)
+        db.commit()
+    else:
+        logger.info(f"Resuming key rotation {rotation.id} to {target_key_id}")
+    checkpoint = json.loads(rotation.checkpoint or "{}")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for table, model, order_column, folder in ROTATION_TABLES:
+            while True:
+                statement = select(
+                    order_column, model.file_path, model.encryption_key_id, model.storage_location, folder
+                ).where(
+                    model.file_path.isnot(None),
+                    model.file_path != "",
+                    or_(model.encryption_key_id.is_(None), model.encryption_key_id != target_key_id)
+                ).order_by(order_column).limit(batch_size)
+                if table in checkpoint:
+                    statement = statement.where(order_column > decode_cursor(checkpoint[table], [order_column])[0])
+                rows = db.execute(statement).all()
+                if not rows:
+                    break
+
+                old_files = []
+                for row, (new, error) in zip(rows, executor.map(lambda row: _reencrypt_row(row, target_key_id), rows)):
+                    old = (row[1], row[3])
+                    if error:
+                        rotation.failed += 1
+                        rotation.last_error = f"{table} {row[0]}: {error}"
+                        logger.warning(f"Key rotation failed for {table} {row[0]}: {error}")
+                    elif _switch_file(db, old, new, target_key_id):
+                        rotation.reencrypted += 1
+                        old_files.append(old)
+                    else:
+                        # la ligne a été supprimée pendant le réchiffrement
+                        encryption_service.delete_file(*new)
+
+                checkpoint[table] = encode_cursor([rows[-1][0]])
+                rotation.checkpoint = json.dumps(checkpoint)
+                db.commit()
+                for old in old_files:
+                    encryption_service.delete_file(*old)
+                if on_progress:
+                    on_progress(rotation)
+
+    rotation.status = "done"
+    db.commit()
+    return rotation
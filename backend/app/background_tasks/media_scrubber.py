@@ -0,0 +1,353 @@
+import hashlib
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
+
+from sqlalchemy import Select, and_, exists, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.background_tasks.media_worker import enqueue_media_job
+from app.core.settings import settings
+from app.encryption_services import encryption_service
+from app.models.media import Media, MediaBlob, MediaJob, MediaRendition
+from app.storage import StorageBackend, get_storage
+
+logger = logging.getLogger(__name__)
+
+SCRUB_BATCH_SIZE = 500
+SCRUB_WORKERS = 4
+# un fichier non référencé plus récent peut être un upload ou une rotation en cours
+ORPHAN_GRACE = timedelta(hours=24)
+# un média "processing" sans job depuis ce délai est remis dans la file
+STUCK_GRACE = timedelta(hours=1)
+# nombre maximum d'exemples gardés dans le rapport
+REPORT_EXAMPLES = 100
+MISSING_FILE_ERROR = "Fichier introuvable dans le stockage"
+
+FILE_MODELS = (Media, MediaBlob, MediaRendition)
+
+
+class RateLimiter:
+    """
+    Limite le débit de lecture partagé par tous les threads (octets par seconde)
+    """
+    def __init__(self, bytes_per_second: Optional[float] = None):
+        self.bytes_per_second = bytes_per_second
+        self.lock = threading.Lock()
+        self.next_time = time.monotonic()
+
+    def consume(self, amount: int) -> None:
+        if not self.bytes_per_second:
+            return
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_time)
+            self.next_time = start + amount / self.bytes_per_second
+        if start > now:
+            time.sleep(start - now)
+
+
+def new_report() -> dict:
+    return {
+        "started_at": datetime.now().isoformat(),
+        "dry_run": False,
+        "scanned_files": 0,
+        "orphan_files": 0,
+        "orphan_bytes": 0,
+        "temp_files": 0,
+        "missing_files": 0,
+        "verified_files": 0,
+        "corrupted_files": 0,
+        "requeued_media": 0,
+        "examples": [],
+    }
+
+
+def _example(report: dict, kind: str, detail: str) -> None:
+    if len(report["examples"]) < REPORT_EXAMPLES:
+        report["examples"].append({"type": kind, "detail": detail})
+
+
+def _iter_batches(db: Session, statement: Select, order_column, batch_size: int) -> Iterator[list]:
+    """Lignes par lots, parcourues par clé (pas de curseur ouvert pendant le traitement)"""
+    last = None
+    while True:
+        page = statement.order_by(order_column).limit(batch_size)
+        if last is not None:
+            page = page.where(order_column > last)
+        rows = db.execute(page).all()
+        if not rows:
+            return
+        yield rows
+        last = rows[-1][0]
+
+
+def _batched(items: Iterator, size: int) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ============ FICHIERS ORPHELINS ============
+
+def _storages(db: Session) -> list[StorageBackend]:
+    """Le stockage courant et ceux utilisés par les lignes, un seul par root"""
+    locations = set()
+    for model in FILE_MODELS:
+        locations.update(db.execute(select(model.storage_location).distinct()).scalars())
+    storages = {encryption_service.storage.root: encryption_service.storage}
+    for location in locations:
+        storage = encryption_service.storage if location is None else get_storage(location)
+        storages.setdefault(storage.root, storage)
+    return list(storages.values())
+
+
+def remove_orphan_files(
+    db: Session,
+    report: dict,
+    *,
+    grace: timedelta = ORPHAN_GRACE,
+    batch_size: int = SCRUB_BATCH_SIZE,
+    dry_run: bool = False
+) -> None:
+    """
+    Parcourt les stockages en flux et supprime les fichiers qu'aucune ligne ne référence
+    (médias, blobs, miniatures), y compris les écritures interrompues (.part)
+    """
+    cutoff = time.time() - grace.total_seconds()
+    for storage in _storages(db):
+        for files in _batched(storage.iter_files(), batch_size):
+            report["scanned_files"] += len(files)
+            keys = [stored_file.key for stored_file in files]
+            referenced = set()
+            for model in FILE_MODELS:
+                referenced.update(db.execute(select(model.file_path).where(model.file_path.in_(keys))).scalars())
+            for stored_file in files:
+                if stored_file.key in referenced or stored_file.modified > cutoff:
+                    continue
+                report["orphan_files"] += 1
+                report["orphan_bytes"] += stored_file.size
+                _example(report, "orphan", stored_file.key)
+                if not dry_run:
+                    storage.delete(stored_file.key)
+
+
+def remove_temp_files(
+    report: dict,
+    *,
+    temp_dir: str = settings.MEDIA_TEMP_DIR,
+    grace: timedelta = ORPHAN_GRACE,
+    dry_run: bool = False
+) -> None:
+    """Fichiers temporaires laissés par l'ancien traitement des uploads"""
+    if not os.path.isdir(temp_dir):
+        return
+    cutoff = time.time() - grace.total_seconds()
+    for entry in os.scandir(temp_dir):
+        if entry.is_file() and entry.stat().st_mtime < cutoff:
+            report["temp_files"] += 1
+            _example(report, "temp", entry.path)
+            if not dry_run:
+                os.remove(entry.path)
+
+
+# ============ LIGNES SANS FICHIER ============
+
+def _mark_media_error(db: Session, file_path: str, error: str) -> None:
+    db.execute(
+        update(Media)
+        .where(Media.file_path == file_path)
+        .values(status="error", error_message=error)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def find_missing_files(
+    db: Session,
+    report: dict,
+    executor: ThreadPoolExecutor,
+    *,
+    batch_size: int = SCRUB_BATCH_SIZE,
+    dry_run: bool = False
+) -> None:
+    """
+    Médias dont le fichier n'existe plus: passés en "error"
+    Les miniatures sans fichier sont supprimées (elles seront régénérées)
+    """
+    for model, order_column in ((Media, Media.id), (MediaRendition, MediaRendition.id)):
+        statement = select(order_column, model.file_path, model.storage_location).where(
+            model.file_path.isnot(None), model.file_path != ""
+        )
+        for rows in _iter_batches(db, statement, order_column, batch_size):
+            found = executor.map(
+                lambda row: encryption_service.storage_for(row[2]).exists(row[1]),
+                rows
+            )
+            for row, file_found in zip(rows, found):
+                if file_found:
+                    continue
+                report["missing_files"] += 1
+                _example(report, "missing", f"{model.__tablename__} {row[0]}: {row[1]}")
+                if dry_run:
+                    continue
+                if model is Media:
+                    _mark_media_error(db, row[1], MISSING_FILE_ERROR)
+                else:
+                    db.query(MediaRendition).filter(MediaRendition.id == row[0]).delete(synchronize_session=False)
+            db.commit()
+
+
+# ============ VÉRIFICATION DES CHECKSUMS ============
+
+def _verify_file(row, limiter: RateLimiter) -> Optional[str]:
+    _, file_path, key_id, storage_location, checksum, file_size = row
+    sha256_hash = hashlib.sha256()
+    size = 0
+    try:
+        for chunk in encryption_service.decrypt_stream(file_path, key_id, storage_location):
+            limiter.consume(len(chunk))
+            sha256_hash.update(chunk)
+            size += len(chunk)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+    if sha256_hash.hexdigest() != checksum:
+        return "Le checksum du fichier stocké ne correspond pas"
+    if file_size is not None and size != file_size:
+        return "La taille du fichier stocké ne correspond pas"
+    return None
+
+
+def verify_checksums(
+    db: Session,
+    report: dict,
+    executor: ThreadPoolExecutor,
+    *,
+    sample: float = 1.0,
+    limiter: Optional[RateLimiter] = None,
+    batch_size: int = SCRUB_BATCH_SIZE,
+    dry_run: bool = False
+) -> None:
+    """
+    Déchiffre une part (sample, de 0 à 1) des fichiers et compare leur SHA-256 au checksum enregistré
+    Chaque fichier n'est lu qu'une fois: les blobs, puis les anciens médias qui ont leur propre fichier
+    Les médias d'un fichier corrompu passent en "error"
+    """
+    if sample <= 0:
+        return
+    limiter = limiter or RateLimiter()
+    sources = (
+        (MediaBlob.checksum, select(
+            MediaBlob.checksum, MediaBlob.file_path, MediaBlob.encryption_key_id,
+            MediaBlob.storage_location, MediaBlob.checksum, MediaBlob.file_size
+        )),
+        (Media.id, select(
+            Media.id, Media.file_path, Media.encryption_key_id,
+            Media.storage_location, Media.checksum, Media.file_size
+        ).where(
+            Media.file_path.isnot(None),
+            Media.file_path != "",
+            Media.checksum.isnot(None),
+            ~exists().where(MediaBlob.file_path == Media.file_path)
+        )),
+    )
+    for order_column, statement in sources:
+        for rows in _iter_batches(db, statement, order_column, batch_size):
+            rows = [row for row in rows if sample >= 1 or random.random() < sample]
+            results = executor.map(lambda row: _verify_file(row, limiter), rows)
+            for row, error in zip(rows, results):
+                report["verified_files"] += 1
+                if error is None:
+                    continue
+                report["corrupted_files"] += 1
+                _example(report, "corrupted", f"{row[1]}: {error}")
+                if not dry_run:
+                    _mark_media_error(db, row[1], error)
+            db.commit()
+
+
+# ============ MÉDIAS BLOQUÉS ============
+
+def requeue_stuck_media(db: Session, report: dict, *, grace: timedelta = STUCK_GRACE, dry_run: bool = False) -> None:
+    """
+    Remet dans la file les médias restés en "processing" sans job actif, et ceux
+    en "error" qui n'ont jamais eu de job (échecs de l'ancien traitement en tâche de fond),
+    sauf si leur fichier a disparu
+    """
+    active_job = exists().where(MediaJob.media_id == Media.id, MediaJob.status.in_(("pending", "running")))
+    any_job = exists().where(MediaJob.media_id == Media.id)
+    media_ids = db.execute(
+        select(Media.id).where(
+            Media.file_path.isnot(None),
+            Media.file_path != "",
+            Media.created_at < datetime.now() - grace,
+            ~active_job,
+            or_(
+                Media.status == "processing",
+                and_(
+                    Media.status == "error",
+                    ~any_job,
+                    or_(Media.error_message.is_(None), Media.error_message != MISSING_FILE_ERROR)
+                )
+            )
+        )
+    ).scalars().all()
+
+    report["requeued_media"] += len(media_ids)
+    for media_id in media_ids[:REPORT_EXAMPLES]:
+        _example(report, "requeued", str(media_id))
+    if dry_run or not media_ids:
+        return
+    for media_id in media_ids:
+        enqueue_media_job(db, media_id)
+    db.execute(
+        update(Media)
+        .where(Media.id.in_(media_ids))
+        .values(status="processing", error_message=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def run_scrub(
+    db: Session,
+    *,
+    verify_sample: float = 0.0,
+    workers: int = SCRUB_WORKERS,
+    io_rate: Optional[float] = None,
+    temp_dir: str = settings.MEDIA_TEMP_DIR,
+    orphan_grace: timedelta = ORPHAN_GRACE,
+    dry_run: bool = False
+) -> dict:
+    """
+    Réconcilie les tables des médias avec le stockage et retourne le rapport
+    - fichiers orphelins et fichiers temporaires supprimés
+    - médias sans fichier passés en "error"
+    - checksums vérifiés sur verify_sample des fichiers (io_rate: octets lus par seconde au plus)
+    - médias bloqués remis dans la file des workers
+    Avec dry_run, rien n'est modifié: le rapport indique ce qui serait fait
+    """
+    report = new_report()
+    report["dry_run"] = dry_run
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        remove_orphan_files(db, report, grace=orphan_grace, dry_run=dry_run)
+        remove_temp_files(report, temp_dir=temp_dir, grace=orphan_grace, dry_run=dry_run)
+        find_missing_files(db, report, executor, dry_run=dry_run)
+        verify_checksums(db, report, executor, sample=verify_sample, limiter=RateLimiter(io_rate), dry_run=dry_run)
+        requeue_stuck_media(db, report, dry_run=dry_run)
+    report["finished_at"] = datetime.now().isoformat()
+    logger.info(
+        f"Media scrub: {report['scanned_files']} files scanned, {report['orphan_files']} orphans, "
+        f"{report['temp_files']} temp files, {report['missing_files']} missing, "
+        f"{report['corrupted_files']}/{report['verified_files']} corrupted, {report['requeued_media']} requeued"
+    )
+    return report
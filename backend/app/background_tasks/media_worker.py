@@ -0,0 +1,238 @@
+import hashlib
+import logging
+import os
+import random
+import socket
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import sessionLocal
+from app.core.settings import settings
+from app.crud.public.renditions import generate_renditions, is_renderable
+from app.encryption_services import encryption_service
+from app.models.media import Media, MediaJob
+from app.utils.media import detect_mime_type
+
+logger = logging.getLogger(__name__)
+
+# Un job "running" dont le worker ne donne plus de nouvelles est repris après ce délai
+LEASE_TIMEOUT = timedelta(minutes=10)
+RETRY_BASE_DELAY = 5  # secondes, doublé à chaque tentative
+RETRY_MAX_DELAY = 3600
+
+
+# ============ FILE D'ATTENTE ============
+
+def enqueue_media_job(db: Session, media_id: UUID, kind: str = "process") -> MediaJob:
+    """
+    Ajoute un job pour un média, sans commit: il est enregistré avec le média
+    """
+    job = MediaJob(
+        media_id=media_id,
+        kind=kind,
+        status="pending",
+        attempts=0,
+        max_attempts=settings.MEDIA_JOB_MAX_ATTEMPTS,
+        run_after=datetime.now()
+    )
+    db.add(job)
+    return job
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """
+    Attente exponentielle avant la tentative suivante, avec une part d'aléatoire
+    pour que les jobs en échec ne repartent pas tous en même temps
+    """
+    delay = min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim_job(db: Session, worker_id: str) -> Optional[MediaJob]:
+    """
+    Réserve le prochain job à exécuter
+    La réservation est un UPDATE conditionnel: si un autre worker a pris le job
+    entre la lecture et l'écriture, aucune ligne n'est modifiée et on passe au suivant
+    """
+    now = datetime.now()
+    candidates = db.execute(
+        select(MediaJob.id, MediaJob.attempts).where(
+            or_(
+                and_(MediaJob.status == "pending", MediaJob.run_after <= now),
+                and_(MediaJob.status == "running", MediaJob.locked_at < now - LEASE_TIMEOUT)
+            )
+        ).order_by(MediaJob.run_after, MediaJob.id).limit(10)
+    ).all()
+
+    for job_id, attempts in candidates:
+        claimed = db.execute(
+            update(MediaJob)
+            .where(MediaJob.id == job_id, MediaJob.attempts == attempts)
+            .values(
+                status="running",
+                locked_by=worker_id,
+                locked_at=now,
+                attempts=attempts + 1
+            )
+        ).rowcount
+        db.commit()
+        if claimed:
+            return db.get(MediaJob, job_id)
+    return None
+
+
+# ============ TRAITEMENTS ============
+
+def process_media(db: Session, media: Media) -> None:
+    """
+    Vérifie le fichier chiffré (déchiffrement complet, taille et SHA-256)
+    et complète le type MIME d'après son contenu
+    Pour une image, les miniatures sont générées ensuite par un autre job
+    """
+    sha256_hash = hashlib.sha256()
+    file_size = 0
+    head = b""
+    for chunk in encryption_service.decrypt_stream(media.file_path, media.encryption_key_id, media.storage_location):
+        if not head:
+            head = chunk[:16]
+        sha256_hash.update(chunk)
+        file_size += len(chunk)
+
+    if media.checksum and sha256_hash.hexdigest() != media.checksum:
+        raise ValueError("Le checksum du fichier stocké ne correspond pas")
+    if media.file_size is not None and file_size != media.file_size:
+        raise ValueError("La taille du fichier stocké ne correspond pas")
+
+    if not media.mime_type or media.mime_type == "application/octet-stream":
+        media.mime_type = detect_mime_type(head) or media.mime_type
+
+    if is_renderable(media):
+        enqueue_media_job(db, media.id, kind="renditions")
+
+
+JOB_HANDLERS: dict[str, Callable[[Session, Media], None]] = {
+    "process": process_media,
+    "renditions": generate_renditions,
+}
+
+
+def run_job(db: Session, job: MediaJob) -> None:
+    """
+    Exécute un job réservé et enregistre son résultat
+    En cas d'erreur, le job est replanifié avec une attente croissante,
+    puis abandonné après max_attempts tentatives
+    Seul le job "process" change le status du média (un échec de miniature ne rend pas le média inutilisable)
+    """
+    media = db.get(Media, job.media_id)
+    if not media:
+        job.status = "done"
+        db.commit()
+        return
+
+    try:
+        JOB_HANDLERS[job.kind](db, media)
+        job.status = "done"
+        job.last_error = None
+        if job.kind == "process":
+            media.status = "processed"
+            media.error_message = None
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        error = f"{type(e).__name__}: {e}"
+        job.last_error = error
+        if job.kind == "process":
+            media.error_message = error
+        if job.attempts >= job.max_attempts:
+            job.status = "failed"
+            if job.kind == "process":
+                media.status = "error"
+        else:
+            job.status = "pending"
+            job.run_after = datetime.now() + retry_delay(job.attempts)
+        db.commit()
+        logger.warning(f"Job {job.id} ({job.kind}) du média {media.id} en échec: {error}")
+
+
+def run_pending_jobs(db: Session, worker_id: str = "inline", limit: Optional[int] = None) -> int:
+    """
+    Exécute les jobs prêts jusqu'à ce qu'il n'y en ait plus (ou limit jobs)
+    Returns: nombre de jobs exécutés
+    """
+    done = 0
+    while limit is None or done < limit:
+        job = claim_job(db, worker_id)
+        if not job:
+            break
+        run_job(db, job)
+        done += 1
+    return done
+
+
+# ============ WORKERS ============
+
+class MediaWorkerPool:
+    """
+    Threads qui lisent la file des jobs, chacun avec sa propre session
+    wake() réveille les workers sans attendre la prochaine interrogation
+    """
+    def __init__(
+        self,
+        workers: int = settings.MEDIA_WORKERS,
+        poll_interval: float = settings.MEDIA_WORKER_POLL_SECONDS,
+        session_factory: Callable[[], Session] = sessionLocal
+    ):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.session_factory = session_factory
+        self.threads: list[threading.Thread] = []
+        self.stopping = threading.Event()
+        self.wakeup = threading.Event()
+
+    def start(self) -> None:
+        self.stopping.clear()
+        prefix = f"{socket.gethostname()}-{os.getpid()}"
+        for number in range(self.workers):
+            thread = threading.Thread(
+                target=self._run,
+                args=(f"{prefix}-{number}",),
+                name=f"media-worker-{number}",
+                daemon=True
+            )
+            thread.start()
+            self.threads.append(thread)
+        logger.info(f"{self.workers} media workers started")
+
+    def stop(self, timeout: float = 10) -> None:
+        self.stopping.set()
+        self.wakeup.set()
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    def wake(self) -> None:
+        self.wakeup.set()
+
+    def _run(self, worker_id: str) -> None:
+        while not self.stopping.is_set():
+            try:
+                with self.session_factory() as db:
+                    if run_pending_jobs(db, worker_id=worker_id, limit=1):
+                        continue
+            except Exception:
+                # base indisponible par exemple: on réessaie à la prochaine interrogation
+                logger.exception(f"Media worker {worker_id} error")
+            self.wakeup.wait(self.poll_interval)
+            self.wakeup.clear()
+
+
+media_workers = MediaWorkerPool()
+
+
+def wake_media_workers() -> None:
+    media_workers.wake()
@@ -0,0 +1,52 @@
+import logging
+import threading
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from app.core.config import sessionLocal
+from app.core.settings import settings
+from app.crud.tokens import purge_expired_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class TokenPurger:
+    """
+    Thread qui supprime les refresh tokens expirés toutes les interval secondes
+    Plusieurs processus de l'API peuvent le lancer: la purge ne supprime que des lignes expirées
+    """
+    def __init__(
+        self,
+        interval: float = settings.TOKEN_PURGE_INTERVAL_SECONDS,
+        session_factory: Callable[[], Session] = sessionLocal
+    ):
+        self.interval = interval
+        self.session_factory = session_factory
+        self.thread: threading.Thread | None = None
+        self.stopping = threading.Event()
+
+    def start(self) -> None:
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self._run, name="token-purge", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 10) -> None:
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+
+    def _run(self) -> None:
+        while not self.stopping.wait(self.interval):
+            try:
+                with self.session_factory() as db:
+                    purged = purge_expired_tokens(db=db)
+                if purged:
+                    logger.info(f"{purged} expired refresh tokens purged")
+            except Exception:
+                # base indisponible par exemple: on réessaie au prochain passage
+                logger.exception("Token purge error")
+
+
+token_purger = TokenPurger()
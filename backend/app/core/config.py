@@ -1,10 +1,119 @@
-from sqlalchemy import create_engine
+import threading
+import time
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
 
 from app.core.settings import settings
 
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+class PoolMetrics:
+    """
+    Compteurs d'un pool de connexions, lus par /internal/db-pool
+    wait: temps pour obtenir une connexion (attente d'une connexion libre, ouverture, pre-ping)
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_checkout(self, wait: float) -> None:
+        with self.lock:
+            self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+    def increment(self, counter: str) -> None:
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool qui mesure le temps pour obtenir chaque connexion"""
+    metrics: PoolMetrics
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.increment("timeouts")
+            raise
+        self.metrics.record_checkout(time.perf_counter() - start)
+        return connection
+
+    def recreate(self) -> "MeteredQueuePool":
+        # engine.dispose() recrée le pool: les compteurs continuent
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def create_db_engine(url: str | None = None, **options) -> Engine:
+    """
+    Le moteur SQLAlchemy de l'application, un seul par processus (engine ci-dessous)
+    Le pool est réglé par les settings DB_POOL_* (options pour les remplacer): pre-ping et recycle
+    évitent qu'une connexion fermée par MySQL (wait_timeout) fasse échouer la première requête
+    après une période calme
+    """
+    url = make_url(url or str(settings.SQLALCHEMY_DATABASE_URI))
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # base en mémoire: une seule connexion possible, pas de pool à régler
+        return create_engine(url, **options)
+
+    pool_options = {
+        "poolclass": MeteredQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if url.get_backend_name() == "mysql":
+        pool_options["connect_args"] = {"connect_timeout": settings.DB_CONNECT_TIMEOUT}
+    pool_options.update(options)
+
+    engine = create_engine(url, **pool_options)
+    metrics = PoolMetrics()
+    engine.pool.metrics = metrics
+    event.listen(engine, "connect", lambda *args: metrics.increment("connects"))
+    event.listen(engine, "invalidate", lambda *args: metrics.increment("invalidations"))
+    return engine
+
+
+def pool_status(engine: Engine) -> dict:
+    """État du pool et compteurs depuis le démarrage"""
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+        )
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        with metrics.lock:
+            status.update(
+                checkouts=metrics.checkouts,
+                connects=metrics.connects,
+                invalidations=metrics.invalidations,
+                timeouts=metrics.timeouts,
+                wait_ms_avg=metrics.wait_total / metrics.checkouts * 1000 if metrics.checkouts else 0.0,
+                wait_ms_max=metrics.wait_max * 1000,
+            )
+    return status
+
+
+engine = create_db_engine()
 
 sessionLocal = sessionmaker(
     autocommit=False, 
@@ -12,4 +121,4 @@ sessionLocal = sessionmaker(
     bind=engine
 )
 
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
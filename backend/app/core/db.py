@@ -2,14 +2,13 @@ from app.core.settings import settings
 
 from sqlalchemy import select
 from sqlalchemy.orm import Session
-from sqlalchemy.engine import create_engine
+
+from app.core.config import engine  # même moteur (et même pool) que l'API
 
 from app.models.users import User
 from app.schemas.users import UserCreate
 from app.crud import users
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
-
 def init_db(db: Session) -> None:
     user = db.execute(
         select(User).where(User.username==settings.FIRST_SUPERUSER)
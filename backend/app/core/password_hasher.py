@@ -0,0 +1,84 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional, TypeVar
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class HashingBusy(Exception):
+    """Tous les processus de hachage sont occupés et la file d'attente est pleine"""
+    pass
+
+
+class PasswordHasher:
+    """
+    Processus dédiés au hachage des mots de passe (argon2/bcrypt, des dizaines de ms de CPU chacun)
+    Les threads des routes attendent le résultat sans calculer: un afflux de connexions
+    n'occupe pas tout le pool de threads de l'API
+    Au plus workers + max_pending hachages sont acceptés en même temps, au-delà HashingBusy
+    est levée tout de suite (réponse 503) au lieu de laisser les requêtes s'accumuler
+    Avec workers=0, le hachage est fait dans le thread appelant
+    """
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None):
+        # lus à la première utilisation: les tests et les scripts peuvent changer les settings avant
+        self.workers = workers
+        self.max_pending = max_pending
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.slots: Optional[threading.BoundedSemaphore] = None
+        self.lock = threading.Lock()
+
+    def _pool(self) -> tuple[ProcessPoolExecutor, threading.BoundedSemaphore]:
+        with self.lock:
+            if self.executor is None:
+                workers = self.workers if self.workers is not None else settings.PASSWORD_HASH_WORKERS
+                max_pending = self.max_pending if self.max_pending is not None else settings.PASSWORD_HASH_MAX_PENDING
+                # spawn: l'API a déjà des threads et des connexions ouvertes, un fork les copierait
+                self.executor = ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+                )
+                self.slots = threading.BoundedSemaphore(workers + max_pending)
+            return self.executor, self.slots
+
+    def run(self, function: Callable[..., T], *args) -> T:
+        """
+        Exécute function(*args) dans un processus du pool et attend son résultat
+        function doit être importable par son nom (fonction de module)
+        """
+        workers = self.workers if self.workers is not None else settings.PASSWORD_HASH_WORKERS
+        if workers <= 0:
+            return function(*args)
+
+        executor, slots = self._pool()
+        if not slots.acquire(blocking=False):
+            raise HashingBusy("Trop de demandes de connexion, réessayez dans quelques secondes")
+        try:
+            future = executor.submit(function, *args)
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            # un processus a été tué (mémoire...): le pool sera recréé à la prochaine demande
+            logger.exception("Password hashing pool broken")
+            with self.lock:
+                if self.executor is executor:
+                    self.executor = None
+            raise
+
+    def shutdown(self) -> None:
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
+
+
+password_hasher = PasswordHasher()
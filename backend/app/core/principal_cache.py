@@ -0,0 +1,143 @@
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+
+from app.core.settings import settings
+from app.models.users import User, UserRole
+
+
+# get_current_user garde pour chaque sujet du token (username) les colonnes de l'utilisateur
+# pendant PRINCIPAL_CACHE_TTL_SECONDS: les requêtes suivantes n'ont pas à relire la table users.
+# hashed_password n'est pas gardé, il est relu seulement quand une route y accède.
+# Le cache en mémoire n'est invalidé que dans le processus qui modifie l'utilisateur,
+# les autres le voient au plus tard après le TTL. Avec PRINCIPAL_CACHE_URL (redis://...)
+# le cache est partagé et l'invalidation vaut pour tous les processus
+
+PRINCIPAL_FIELDS = ("id", "username", "full_name", "is_active", "is_superuser", "role", "student_id", "teacher_id")
+UUID_FIELDS = ("id", "student_id", "teacher_id")
+
+
+def snapshot_user(user: User) -> dict:
+    """Colonnes de l'utilisateur gardées dans le cache, en JSON"""
+    snapshot = {field: getattr(user, field) for field in PRINCIPAL_FIELDS}
+    for field in UUID_FIELDS:
+        if snapshot[field] is not None:
+            snapshot[field] = str(snapshot[field])
+    if snapshot["role"] is not None:
+        snapshot["role"] = snapshot["role"].value
+    return snapshot
+
+
+def attach_user(db: Session, snapshot: dict) -> User:
+    """
+    L'utilisateur du cache attaché à la session, sans requête: les routes peuvent le modifier
+    et le supprimer comme s'il avait été lu. Les colonnes absentes du cache sont lues à la demande
+    """
+    data = dict(snapshot)
+    for field in UUID_FIELDS:
+        if data[field] is not None:
+            data[field] = uuid.UUID(data[field])
+    if data["role"] is not None:
+        data["role"] = UserRole(data["role"])
+
+    # déjà dans la session (lu ou modifié par la requête): cette version est plus récente
+    existing = db.identity_map.get(identity_key(User, data["id"]))
+    if existing is not None:
+        return existing
+    user = User(**data)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+class MemoryPrincipalCache:
+    def __init__(self, ttl: float = settings.PRINCIPAL_CACHE_TTL_SECONDS, max_entries: int = settings.PRINCIPAL_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, subject: str) -> Optional[dict]:
+        with self.lock:
+            entry = self.entries.get(subject)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self.entries[subject]
+                return None
+            return entry[1]
+
+    def set(self, subject: str, snapshot: dict) -> None:
+        if self.ttl <= 0:
+            return
+        with self.lock:
+            self.entries[subject] = (time.monotonic() + self.ttl, snapshot)
+            self.entries.move_to_end(subject)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, *subjects: Optional[str]) -> None:
+        with self.lock:
+            for subject in subjects:
+                self.entries.pop(subject, None)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+
+class RedisPrincipalCache:
+    """
+    Cache partagé entre les processus, redis est importé à la création
+    Une erreur de redis ne bloque pas l'authentification: l'utilisateur est relu en base
+    """
+    prefix = "principal:"
+
+    def __init__(self, url: str, ttl: float = settings.PRINCIPAL_CACHE_TTL_SECONDS):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("PRINCIPAL_CACHE_URL nécessite le paquet redis") from e
+        self.client = redis.Redis.from_url(url)
+        self.errors = (redis.RedisError,)
+        self.ttl = ttl
+
+    def get(self, subject: str) -> Optional[dict]:
+        try:
+            value = self.client.get(self.prefix + subject)
+        except self.errors:
+            return None
+        return json.loads(value) if value else None
+
+    def set(self, subject: str, snapshot: dict) -> None:
+        if self.ttl <= 0:
+            return
+        try:
+            self.client.set(self.prefix + subject, json.dumps(snapshot), px=int(self.ttl * 1000))
+        except self.errors:
+            pass
+
+    def invalidate(self, *subjects: Optional[str]) -> None:
+        keys = [self.prefix + subject for subject in subjects if subject]
+        if keys:
+            # une invalidation perdue laisserait un utilisateur modifié en cache: l'erreur remonte
+            self.client.delete(*keys)
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(f"{self.prefix}*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+def create_principal_cache():
+    if settings.PRINCIPAL_CACHE_URL:
+        return RedisPrincipalCache(settings.PRINCIPAL_CACHE_URL)
+    return MemoryPrincipalCache()
+
+
+principal_cache = create_principal_cache()
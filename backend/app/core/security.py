@@ -1,12 +1,20 @@
 from datetime import datetime, timezone, timedelta
 from typing import Any
 
+import bcrypt
 import jwt
 from passlib.context import CryptContext
 
 from app.core.settings import settings
+from app.core.password_hasher import password_hasher
 
-pwd_context = CryptContext(schemes=["argon2", "bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__rounds=settings.PASSWORD_ARGON2_TIME_COST,
+    argon2__memory_cost=settings.PASSWORD_ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.PASSWORD_ARGON2_PARALLELISM,
+)
 
 ALGORITHM = "HS256"
 
@@ -22,8 +30,55 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+def _check_bcrypt(plain_password: str, hashed_password: str) -> bool:
+    # passlib 1.7.4 ne sait plus charger bcrypt >= 4.1 (son test d'un ancien bug échoue
+    # sur les mots de passe de plus de 72 octets): les anciens hachages bcrypt sont vérifiés
+    # directement, avec la même troncature à 72 octets
+    return bcrypt.checkpw(plain_password.encode()[:72], hashed_password.encode())
+
+# exécutées dans les processus de password_hasher
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    if pwd_context.identify(hashed_password) == "bcrypt":
+        return _check_bcrypt(plain_password, hashed_password)
     return pwd_context.verify(plain_password, hashed_password)
 
-def get_password_hash(password: str) -> str:
+def _verify_and_update(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    if pwd_context.identify(hashed_password) == "bcrypt":
+        if not _check_bcrypt(plain_password, hashed_password):
+            return False, None
+        return True, pwd_context.hash(plain_password)
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+def _hash(password: str) -> str:
     return pwd_context.hash(password)
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Lève HashingBusy si trop de hachages sont déjà en cours"""
+    return password_hasher.run(_verify, plain_password, hashed_password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """
+    Vérifie le mot de passe et, s'il est bon mais que son hachage n'est plus celui de pwd_context
+    (bcrypt, coût argon2 différent des settings), retourne aussi le nouveau hachage à enregistrer
+    Returns: (mot de passe correct, nouveau hachage ou None)
+    """
+    return password_hasher.run(_verify_and_update, plain_password, hashed_password)
+
+def describe_hash(hashed_password: str) -> tuple[str, str]:
+    """
+    Schéma et paramètres de coût d'un hachage, sans le sel ni le hachage lui-même
+    ex: ("argon2id", "m=65536,t=3,p=4"), ("bcrypt", "cost=12")
+    """
+    scheme = pwd_context.identify(hashed_password)
+    if scheme == "argon2":
+        parts = hashed_password.split("$")
+        # $argon2id$v=19$m=65536,t=3,p=4$sel$hachage
+        return parts[1], parts[3] if len(parts) > 3 else ""
+    if scheme == "bcrypt":
+        parts = hashed_password.split("$")
+        return "bcrypt", f"cost={parts[2]}" if len(parts) > 2 else ""
+    return scheme or "inconnu", ""
+
+def get_password_hash(password: str) -> str:
+    """Lève HashingBusy si trop de hachages sont déjà en cours"""
+    return password_hasher.run(_hash, password)
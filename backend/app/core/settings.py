@@ -1,6 +1,6 @@
 import secrets
 
-from typing import Annotated, Any, List
+from typing import Annotated, Any, List, Optional
 
 from functools import lru_cache
 
@@ -57,10 +57,56 @@ class Settings(BaseSettings):
             port=self.MYSQL_PORT,
             path=self.MYSQL_DB
         )
+    # Pool de connexions (un seul moteur par processus, app/core/config.py): recycle sous le
+    # wait_timeout de MySQL, pre-ping pour écarter les connexions fermées par le serveur
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_CONNECT_TIMEOUT: int = 10
     FIRST_SUPERUSER: str = ""
     FIRST_SUPERUSER_PASSWORD: str = ""
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Sessions: durée d'un refresh token, purge des tokens expirés par l'API (0 pour la faire à part)
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    TOKEN_PURGE_INTERVAL_SECONDS: float = 3600
+    # Utilisateur authentifié gardé en cache par sujet du token (0 pour désactiver),
+    # en mémoire ou partagé entre les processus avec PRINCIPAL_CACHE_URL (ex: redis://redis:6379/0)
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    PRINCIPAL_CACHE_URL: Optional[str] = None
+    # Hachage des mots de passe dans des processus dédiés (0: dans le thread de la requête),
+    # au-delà de WORKERS + MAX_PENDING hachages en cours les connexions reçoivent une 503
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 16
+    # Coût argon2 des nouveaux hachages (time_cost, mémoire en KiB, threads)
+    PASSWORD_ARGON2_TIME_COST: int = 3
+    PASSWORD_ARGON2_MEMORY_COST: int = 65536
+    PASSWORD_ARGON2_PARALLELISM: int = 4
     USERNAME_TEST_USER: str = ""
     MEDIA_UPLOAD_DIRE: str = ""
+    # Clé d'encryption des nouveaux fichiers, lue dans {MEDIA_KEYS_DIR}/encryption_{id}.key
+    MEDIA_ENCRYPTION_KEY_ID: str = "default_key_v2"
+    MEDIA_KEYS_DIR: str = "."
+    # Stockage des fichiers chiffrés: "local", "sharded" (dossiers par hash) ou "s3"
+    MEDIA_STORAGE_BACKEND: str = "local"
+    MEDIA_STORAGE_PATH: str = "backend/app/encrypted_files"
+    S3_BUCKET: str = ""
+    S3_PREFIX: str = ""
+    S3_ENDPOINT_URL: Optional[str] = None  # ex: http://minio:9000
+    S3_REGION: Optional[str] = None
+    S3_ACCESS_KEY_ID: Optional[str] = None
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+    # Workers de traitement des médias lancés avec l'API (0 pour les lancer à part)
+    MEDIA_WORKERS: int = 2
+    MEDIA_WORKER_POLL_SECONDS: float = 5.0
+    MEDIA_JOB_MAX_ATTEMPTS: int = 5
+    # Ancien dossier des fichiers temporaires d'upload, nettoyé par le scrubber
+    MEDIA_TEMP_DIR: str = "/tmp/uploads"
+    # Miniatures des photos: tailles générées à l'upload (et seules acceptées), format, taille max du cache
+    MEDIA_RENDITION_SIZES: list[int] = [64, 256]
+    MEDIA_RENDITION_FORMAT: str = "webp"
+    MEDIA_RENDITION_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
 
 settings = Settings()
\ No newline at end of file
@@ -1,5 +1,5 @@
 from uuid import UUID
-from sqlalchemy import select, func
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.schemas.university import (
@@ -9,15 +9,21 @@ from app.schemas.university import (
     CourseUpdate
 )
 from app.models.university import Course
-
-
-def read_courses(*, db: Session, skip: int, limit: int) -> CoursesResponse | None :
-    count_statement = select(func.count()).select_from(Course)
-    count = db.execute(count_statement).scalar()
-
-    statement = select(Course).offset(skip).limit(limit)
-    data = db.execute(statement).scalars().all()
-    return {"data": data, "count": count}
+from app.utils.pagination import CountMode, paginate
+
+
+def read_courses(
+    *,
+    db: Session,
+    skip: int,
+    limit: int,
+    cursor: str | None = None,
+    count_mode: CountMode = CountMode.EXACT
+) -> CoursesResponse | None :
+    return paginate(
+        db, select(Course), order_by=(Course.id,),
+        skip=skip, limit=limit, cursor=cursor, count_mode=count_mode
+    )
 
 def create_course(*, db: Session, data: CourseCreate) -> CourseResponse | None:
     validate_data = data.model_dump()
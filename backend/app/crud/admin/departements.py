@@ -1,5 +1,5 @@
 from uuid import UUID
-from sqlalchemy import select, func
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.schemas.university import (
@@ -8,16 +8,22 @@ from app.schemas.university import (
     DepartmentUpdate,
 )
 from app.models.university import Department
-
-
-
-def read_departement(*, db: Session, skip: int, limit: int) -> dict | None:
-    count_statement = select(func.count()).select_from(Department)
-    count = db.execute(count_statement).scalar()
-    
-    statement = select(Department).offset(skip).limit(limit)
-    data = db.execute(statement).scalars().all()
-    return {"data": data, "count": count}
+from app.utils.pagination import CountMode, paginate
+
+
+
+def read_departement(
+    *,
+    db: Session,
+    skip: int,
+    limit: int,
+    cursor: str | None = None,
+    count_mode: CountMode = CountMode.EXACT
+) -> dict | None:
+    return paginate(
+        db, select(Department), order_by=(Department.id,),
+        skip=skip, limit=limit, cursor=cursor, count_mode=count_mode
+    )
 
 def create_departement(*, db: Session, departement_data: DepartmentCreate) -> DepartmentResponse | None:
     validated_data = departement_data.model_dump()
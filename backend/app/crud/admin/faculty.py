@@ -1,8 +1,9 @@
 from uuid import UUID
-from sqlalchemy import select, func
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.models.university import Faculty
+from app.utils.pagination import CountMode, paginate
 from app.schemas.university import (
     FacultyBase,
     FacultyCreate,
@@ -12,13 +13,19 @@ from app.schemas.university import (
 )
 
 
-def read_faculties(*, db: Session, skip: int, limit: int) -> FacultiesResponse | None:
-    count_statement = select(func.count()).select_from(Faculty)
-    count = db.execute(count_statement).scalar()
-
-    statement = select(Faculty).offset(skip).limit(limit)
-    data = db.execute(statement).scalars().all()
-    return FacultiesResponse.model_validate({"data": data, "count": count})
+def read_faculties(
+    *,
+    db: Session,
+    skip: int,
+    limit: int,
+    cursor: str | None = None,
+    count_mode: CountMode = CountMode.EXACT
+) -> FacultiesResponse | None:
+    page = paginate(
+        db, select(Faculty), order_by=(Faculty.id,),
+        skip=skip, limit=limit, cursor=cursor, count_mode=count_mode
+    )
+    return FacultiesResponse.model_validate(page)
 
 def create_faculty(*, db: Session, faculty_data: FacultyCreate) -> FacultyResponse | None:
     validated_data = faculty_data.model_dump()
@@ -1,8 +1,9 @@
 from uuid import UUID
-from sqlalchemy import select, func
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.models.university import Program
+from app.utils.pagination import CountMode, paginate
 from app.schemas.university import (
     ProgramCreate,
     ProgramResponse,
@@ -10,13 +11,18 @@ from app.schemas.university import (
 )
 
 
-def read_programs(*, db: Session, skip: int, limit: int) -> dict | None:
-    count_statement = select(func.count()).select_from(Program)
-    count = db.execute(count_statement).scalar()
-    
-    statement = select(Program).offset(skip).limit(limit)
-    data = db.execute(statement).scalars().all()
-    return {"data": data, "count": count}
+def read_programs(
+    *,
+    db: Session,
+    skip: int,
+    limit: int,
+    cursor: str | None = None,
+    count_mode: CountMode = CountMode.EXACT
+) -> dict | None:
+    return paginate(
+        db, select(Program), order_by=(Program.id,),
+        skip=skip, limit=limit, cursor=cursor, count_mode=count_mode
+    )
 
 def create_program(*, db: Session, data: ProgramCreate) -> ProgramResponse:
     validate_data = data.model_dump()
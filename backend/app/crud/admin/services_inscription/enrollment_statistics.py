@@ -0,0 +1,141 @@
+# app/crud/admin/services_inscription/enrollment_statistics.py
+from collections import defaultdict
+from typing import Optional
+
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.enrollments import Enrollment, EnrollmentStatistic
+
+
+# ============ MAINTENANCE INCRÉMENTALE ============
+
+def new_statistics_deltas() -> defaultdict:
+    """
+    Variations des compteurs: {(annee, niveau, id_departement, statut): [nombre, admis]}
+    """
+    return defaultdict(lambda: [0, 0])
+
+
+def add_enrollment_delta(
+    deltas: defaultdict,
+    *,
+    annee_academique: str,
+    niveau: str,
+    id_departement: int,
+    statut: Optional[str],
+    est_admis: Optional[bool],
+    nombre: int = 1
+) -> None:
+    """
+    Ajoute (nombre > 0) ou retire (nombre < 0) des inscriptions d'un groupe
+    """
+    counters = deltas[(annee_academique, niveau, id_departement, statut or "en_cours")]
+    counters[0] += nombre
+    if est_admis:
+        counters[1] += nombre
+
+
+def add_enrollment_transition(
+    deltas: defaultdict,
+    enrollment: Enrollment,
+    ancien_statut: Optional[str],
+    ancien_est_admis: Optional[bool]
+) -> None:
+    """
+    Déplace une inscription de son ancien groupe vers son groupe actuel
+    """
+    key = dict(
+        annee_academique=enrollment.annee_academique,
+        niveau=enrollment.niveau,
+        id_departement=enrollment.id_departement
+    )
+    add_enrollment_delta(deltas, **key, statut=ancien_statut, est_admis=ancien_est_admis, nombre=-1)
+    add_enrollment_delta(deltas, **key, statut=enrollment.statut, est_admis=enrollment.est_admis)
+
+
+def apply_statistics_deltas(db: Session, deltas: dict) -> None:
+    """
+    Applique les variations en un seul upsert multi-lignes
+    Ne fait pas de commit, les compteurs sont écrits dans la transaction en cours
+    """
+    rows = [
+        {
+            "annee_academique": annee_academique,
+            "niveau": niveau,
+            "id_departement": id_departement,
+            "statut": statut,
+            "nombre": nombre,
+            "admis": admis
+        }
+        for (annee_academique, niveau, id_departement, statut), (nombre, admis) in deltas.items()
+        if nombre or admis
+    ]
+    if not rows:
+        return
+
+    table = EnrollmentStatistic.__table__
+    if db.get_bind().dialect.name == "mysql":
+        statement = mysql.insert(table).values(rows)
+        statement = statement.on_duplicate_key_update(
+            nombre=table.c.nombre + statement.inserted.nombre,
+            admis=table.c.admis + statement.inserted.admis
+        )
+    else:
+        statement = sqlite.insert(table).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=["annee_academique", "niveau", "id_departement", "statut"],
+            set_={
+                "nombre": table.c.nombre + statement.excluded.nombre,
+                "admis": table.c.admis + statement.excluded.admis
+            }
+        )
+    db.execute(statement)
+
+
+# ============ RECALCUL COMPLET ============
+
+def rebuild_enrollment_statistics(db: Session) -> int:
+    """
+    Recalcule tous les compteurs à partir de la table des inscriptions
+    Returns: nombre de groupes
+    """
+    db.execute(delete(EnrollmentStatistic))
+    db.execute(
+        insert(EnrollmentStatistic).from_select(
+            ["annee_academique", "niveau", "id_departement", "statut", "nombre", "admis"],
+            select(
+                Enrollment.annee_academique,
+                Enrollment.niveau,
+                Enrollment.id_departement,
+                func.coalesce(Enrollment.statut, "en_cours"),
+                func.count(Enrollment.id),
+                func.sum(case((Enrollment.est_admis == True, 1), else_=0))
+            ).group_by(
+                Enrollment.annee_academique,
+                Enrollment.niveau,
+                Enrollment.id_departement,
+                func.coalesce(Enrollment.statut, "en_cours")
+            )
+        )
+    )
+    db.commit()
+    return db.execute(select(func.count()).select_from(EnrollmentStatistic)).scalar()
+
+
+# ============ LECTURE ============
+
+def statistics_counters() -> tuple:
+    """
+    Compteurs calculés sur les groupes pré-agrégés
+    """
+    nombre = EnrollmentStatistic.nombre
+    statut = EnrollmentStatistic.statut
+    return (
+        func.sum(nombre).label('total'),
+        func.sum(case((statut == "en_cours", nombre), else_=0)).label('en_cours'),
+        func.sum(case((statut == "validée", nombre), else_=0)).label('valides'),
+        func.sum(case((statut == "échouée", nombre), else_=0)).label('echoues'),
+        func.sum(EnrollmentStatistic.admis).label('admis')
+    )
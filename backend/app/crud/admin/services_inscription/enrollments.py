@@ -1,14 +1,27 @@
 # app/crud/admin/services_inscription/enrollments.py
-from typing import Optional, List
+from typing import Iterable, Optional, List, Tuple
 from uuid import UUID
 from datetime import datetime
 
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from sqlalchemy import case, exists, func, insert, literal, select, update
+from sqlalchemy.orm import Session, aliased
+from pydantic import TypeAdapter, ValidationError
 
 from app.models.students import Student, StudentStatus
-from app.models.enrollments import Enrollment
+from app.models.enrollments import Enrollment, EnrollmentStatistic
 from app.models.student_history import StudentHistory
+from app.schemas.enrollments import EnrollmentResult
+from app.crud.admin.services_inscription.enrollment_statistics import (
+    new_statistics_deltas,
+    add_enrollment_delta,
+    add_enrollment_transition,
+    apply_statistics_deltas,
+    statistics_counters
+)
+
+
+# Taille des chunks pour les insertions multi-lignes
+BULK_CHUNK_SIZE = 1000
 
 
 # ============ INSCRIPTION NOUVELLE ANNÉE ============
@@ -35,6 +48,18 @@ def create_enrollment(
         statut="en_cours"
     )
     db.add(new_enrollment)
+    
+    deltas = new_statistics_deltas()
+    add_enrollment_delta(
+        deltas,
+        annee_academique=annee_academique,
+        niveau=niveau,
+        id_departement=id_departement,
+        statut="en_cours",
+        est_admis=None
+    )
+    apply_statistics_deltas(db, deltas)
+    
     db.commit()
     db.refresh(new_enrollment)
     return new_enrollment
@@ -94,16 +119,119 @@ def close_enrollment(
     if not enrollment:
         return None
     
+    ancien_statut, ancien_est_admis = enrollment.statut, enrollment.est_admis
     enrollment.statut = "validée" if est_admis else "échouée"
     enrollment.est_admis = est_admis
     enrollment.moyenne_annuelle = moyenne_annuelle
     enrollment.credits_obtenus = credits_obtenus
     
+    deltas = new_statistics_deltas()
+    add_enrollment_transition(deltas, enrollment, ancien_statut, ancien_est_admis)
+    apply_statistics_deltas(db, deltas)
+    
     db.commit()
     db.refresh(enrollment)
     return enrollment
 
 
+def parse_enrollment_results(rows: Iterable[Tuple[int, dict]]) -> Tuple[List[Tuple[int, EnrollmentResult]], List[dict]]:
+    """
+    Valide les lignes d'un fichier de résultats (numéro de ligne, ligne)
+    Returns: (résultats valides pour close_enrollments_in_bulk, erreurs ligne par ligne)
+    Une ligne invalide garde son enrollment_id dans l'erreur quand celui-ci est valide
+    """
+    results = []
+    erreurs = []
+    for ligne, row in rows:
+        try:
+            results.append((ligne, EnrollmentResult.model_validate(row)))
+        except ValidationError as e:
+            try:
+                enrollment_id = TypeAdapter(int).validate_python(row.get("enrollment_id"))
+            except ValidationError:
+                enrollment_id = None
+            erreurs.append({
+                "ligne": ligne,
+                "enrollment_id": enrollment_id,
+                "erreur": "; ".join(
+                    f"{'.'.join(str(l) for l in error['loc'])}: {error['msg']}" for error in e.errors()
+                )
+            })
+    return results, erreurs
+
+
+def close_enrollments_in_bulk(
+    db: Session,
+    results: List[Tuple[int, EnrollmentResult]]
+) -> dict:
+    """
+    Clôture plusieurs inscriptions en une seule transaction (saisie des résultats d'une promotion)
+    Les inscriptions sont chargées en une requête, validées en mémoire puis mises à jour
+    par un UPDATE groupé. Les lignes invalides sont ignorées et reportées
+    
+    results: liste de (numéro de ligne, résultat)
+    Returns: {"nombre_clotures": ..., "erreurs": [...]}
+    """
+    ids = {result.enrollment_id for _, result in results}
+    existing = {
+        row.id: row
+        for row in db.execute(
+            select(
+                Enrollment.id,
+                Enrollment.statut,
+                Enrollment.est_admis,
+                Enrollment.annee_academique,
+                Enrollment.niveau,
+                Enrollment.id_departement
+            ).where(Enrollment.id.in_(ids))
+        ).all()
+    } if ids else {}
+    
+    erreurs = []
+    rows = []
+    seen = set()
+    deltas = new_statistics_deltas()
+    for ligne, result in results:
+        enrollment = existing.get(result.enrollment_id)
+        erreur = None
+        if enrollment is None:
+            erreur = "Inscription non trouvée"
+        elif result.enrollment_id in seen:
+            erreur = "Inscription présente plusieurs fois"
+        elif enrollment.statut != "en_cours":
+            erreur = f"Cette inscription est déjà clôturée (statut: {enrollment.statut})"
+        
+        if erreur:
+            erreurs.append({"ligne": ligne, "enrollment_id": result.enrollment_id, "erreur": erreur})
+            continue
+        
+        seen.add(result.enrollment_id)
+        statut = "validée" if result.est_admis else "échouée"
+        rows.append({
+            "id": result.enrollment_id,
+            "statut": statut,
+            "est_admis": result.est_admis,
+            "moyenne_annuelle": result.moyenne_annuelle,
+            "credits_obtenus": result.credits_obtenus
+        })
+        
+        groupe = dict(
+            annee_academique=enrollment.annee_academique,
+            niveau=enrollment.niveau,
+            id_departement=enrollment.id_departement
+        )
+        add_enrollment_delta(deltas, **groupe, statut=enrollment.statut, est_admis=enrollment.est_admis, nombre=-1)
+        add_enrollment_delta(deltas, **groupe, statut=statut, est_admis=result.est_admis)
+    
+    if rows:
+        # UPDATE groupé par clé primaire
+        db.execute(update(Enrollment), rows)
+        apply_statistics_deltas(db, deltas)
+    db.commit()
+    
+    return {"nombre_clotures": len(rows), "erreurs": erreurs}
+
+
 # ============ DIPLÔMER UN ÉTUDIANT ============
 
 def get_last_enrollment(db: Session, student_id: UUID) -> Optional[Enrollment]:
@@ -123,6 +251,8 @@ def mark_student_as_graduated(
 ) -> Student:
     """
     Marque un étudiant comme diplômé (ancien)
+    Valide la dernière inscription et crée une seule entrée d'historique,
+    le tout dans une seule transaction
     """
     student = db.get(Student, student_id)
     if not student:
@@ -132,8 +262,13 @@ def mark_student_as_graduated(
     last_enrollment = get_last_enrollment(db, student_id)
     
     if last_enrollment:
+        ancien_statut, ancien_est_admis = last_enrollment.statut, last_enrollment.est_admis
         last_enrollment.statut = "validée"
         last_enrollment.est_admis = True
+        
+        deltas = new_statistics_deltas()
+        add_enrollment_transition(deltas, last_enrollment, ancien_statut, ancien_est_admis)
+        apply_statistics_deltas(db, deltas)
     
     # Marquer comme ancien
     student.statut = StudentStatus.ANCIEN
@@ -154,16 +289,133 @@ def mark_student_as_graduated(
             id_departement=last_enrollment.id_departement,
             id_parcours=last_enrollment.id_parcours,
             est_diplome=True,
-            motif_fin=f"Diplômé - {type_diplome}" + (f" - Mention {mention}" if mention else ""),
-            notes=f"Type de diplôme: {type_diplome}, Mention: {mention or 'N/A'}"
+            motif_fin=_graduation_reason(type_diplome, mention),
+            notes=_graduation_notes(type_diplome, mention)
         )
         db.add(history)
     
     db.commit()
-    db.refresh(student)
     return student
 
 
+def graduate_cohort(
+    db: Session,
+    annee_academique: str,
+    niveau: str,
+    id_parcours: int,
+    type_diplome: str,
+    mention: Optional[str] = None,
+    admis_only: bool = True
+) -> int:
+    """
+    Diplôme en masse les étudiants actifs d'une promotion (année + niveau + parcours)
+    Chaque étape est une seule requête ensembliste, le tout dans une seule transaction:
+    historique (INSERT ... SELECT), inscriptions puis étudiants (UPDATE)
+    Returns: nombre d'étudiants diplômés
+    """
+    conditions = [
+        Enrollment.annee_academique == annee_academique,
+        Enrollment.niveau == niveau,
+        Enrollment.id_parcours == id_parcours,
+        Enrollment.student_id.in_(
+            select(Student.id).where(Student.statut == StudentStatus.ACTIF)
+        )
+    ]
+    if admis_only:
+        conditions.append(Enrollment.est_admis == True)
+    
+    # Compteurs de statistiques: toutes les inscriptions passent en "validée" et admises
+    deltas = new_statistics_deltas()
+    groupes = db.execute(
+        select(
+            Enrollment.id_departement,
+            Enrollment.statut,
+            Enrollment.est_admis,
+            func.count()
+        ).where(*conditions).group_by(
+            Enrollment.id_departement,
+            Enrollment.statut,
+            Enrollment.est_admis
+        )
+    ).all()
+    diplomes = 0
+    for id_departement, statut, est_admis, nombre in groupes:
+        groupe = dict(annee_academique=annee_academique, niveau=niveau, id_departement=id_departement)
+        add_enrollment_delta(deltas, **groupe, statut=statut, est_admis=est_admis, nombre=-nombre)
+        add_enrollment_delta(deltas, **groupe, statut="validée", est_admis=True, nombre=nombre)
+        diplomes += nombre
+    
+    if not diplomes:
+        return 0
+    
+    db.execute(
+        insert(StudentHistory).from_select(
+            [
+                "student_id",
+                "annee_academique",
+                "date_debut",
+                "date_fin",
+                "statut",
+                "niveau",
+                "id_departement",
+                "id_parcours",
+                "est_diplome",
+                "motif_fin",
+                "notes"
+            ],
+            select(
+                Enrollment.student_id,
+                Enrollment.annee_academique,
+                Enrollment.date_inscription,
+                func.current_date(),
+                literal("diplômé"),
+                Enrollment.niveau,
+                Enrollment.id_departement,
+                Enrollment.id_parcours,
+                literal(True),
+                literal(_graduation_reason(type_diplome, mention)),
+                literal(_graduation_notes(type_diplome, mention))
+            ).where(*conditions)
+        )
+    )
+    
+    # Les étudiants sont mis à jour en dernier: les conditions portent sur leur statut actif
+    db.execute(
+        update(Enrollment).where(*conditions).values(statut="validée", est_admis=True),
+        execution_options={"synchronize_session": False}
+    )
+    db.execute(
+        update(Student).where(Student.id.in_(
+            select(Enrollment.student_id).where(
+                Enrollment.annee_academique == annee_academique,
+                Enrollment.niveau == niveau,
+                Enrollment.id_parcours == id_parcours,
+                Enrollment.statut == "validée",
+                Enrollment.est_admis == True
+            )
+        ), Student.statut == StudentStatus.ACTIF).values(
+            statut=StudentStatus.ANCIEN,
+            est_ancien=True,
+            annee_sortie=datetime.now().year,
+            motif_sortie="diplômé",
+            dernier_niveau=niveau
+        ),
+        execution_options={"synchronize_session": False}
+    )
+    apply_statistics_deltas(db, deltas)
+    db.commit()
+    
+    return diplomes
+
+
+def _graduation_reason(type_diplome: str, mention: Optional[str]) -> str:
+    return f"Diplômé - {type_diplome}" + (f" - Mention {mention}" if mention else "")
+
+
+def _graduation_notes(type_diplome: str, mention: Optional[str]) -> str:
+    return f"Type de diplôme: {type_diplome}, Mention: {mention or 'N/A'}"
+
+
 # ============ LISTER LES INSCRIPTIONS ============
 
 def get_student_enrollments(db: Session, student_id: UUID) -> List[Enrollment]:
@@ -199,36 +451,148 @@ def get_enrollments_by_year_and_level(
 
 def create_bulk_enrollments(
     db: Session,
-    enrollments_data: List[dict]
-) -> int:
+    enrollments_data: List[dict],
+    chunk_size: int = BULK_CHUNK_SIZE
+) -> dict:
     """
     Crée plusieurs inscriptions en masse
-    Returns: nombre d'inscriptions créées
-    """
-    count = 0
-    for data in enrollments_data:
-        # Vérifier que l'étudiant n'est pas déjà inscrit
-        existing = get_enrollment_by_student_and_year(
-            db,
-            data['student_id'],
-            data['annee_academique']
-        )
+    Les doublons (étudiant déjà inscrit pour l'année) sont vérifiés par chunk
+    avec une seule requête IN, puis insérés par INSERT multi-lignes
+    Returns: {"created": ..., "skipped": ...}
+    """
+    created = 0
+    skipped = 0
+    
+    for start in range(0, len(enrollments_data), chunk_size):
+        chunk = enrollments_data[start:start + chunk_size]
+        
+        # Inscriptions déjà existantes pour les étudiants du chunk
+        existing = set(db.execute(
+            select(Enrollment.student_id, Enrollment.annee_academique).where(
+                Enrollment.student_id.in_({data['student_id'] for data in chunk}),
+                Enrollment.annee_academique.in_({data['annee_academique'] for data in chunk})
+            )
+        ).all())
         
-        if not existing:
-            new_enrollment = Enrollment(
-                student_id=data['student_id'],
+        rows = []
+        deltas = new_statistics_deltas()
+        for data in chunk:
+            key = (data['student_id'], data['annee_academique'])
+            if key in existing:
+                skipped += 1
+                continue
+            existing.add(key)  # doublons à l'intérieur du même envoi
+            rows.append({
+                "student_id": data['student_id'],
+                "annee_academique": data['annee_academique'],
+                "niveau": data['niveau'],
+                "id_departement": data['id_departement'],
+                "id_parcours": data['id_parcours'],
+            })
+            add_enrollment_delta(
+                deltas,
                 annee_academique=data['annee_academique'],
                 niveau=data['niveau'],
                 id_departement=data['id_departement'],
-                id_parcours=data['id_parcours'],
-                date_inscription=func.current_date(),
-                statut="en_cours"
+                statut="en_cours",
+                est_admis=None
+            )
+        
+        if rows:
+            db.execute(
+                insert(Enrollment).values(
+                    date_inscription=func.current_date(),
+                    statut="en_cours"
+                ),
+                rows
             )
-            db.add(new_enrollment)
-            count += 1
+            apply_statistics_deltas(db, deltas)
+            created += len(rows)
     
     db.commit()
-    return count
+    return {"created": created, "skipped": skipped}
+
+
+def promote_enrollments(
+    db: Session,
+    annee_academique: str,
+    niveau_source: str,
+    niveau_destination: str,
+    admis_only: bool = True
+) -> dict:
+    """
+    Inscrit en une seule requête INSERT ... SELECT les étudiants d'un niveau
+    de l'année précédente dans le niveau supérieur
+    Les étudiants déjà inscrits pour la nouvelle année sont ignorés (anti-jointure)
+    Returns: {"created": ..., "skipped": ...}
+    """
+    annee_precedente = calculate_previous_academic_year(annee_academique)
+    
+    conditions = [
+        Enrollment.annee_academique == annee_precedente,
+        Enrollment.niveau == niveau_source
+    ]
+    if admis_only:
+        conditions.append(Enrollment.est_admis == True)
+    
+    deja_inscrit = aliased(Enrollment)
+    non_inscrit = ~exists().where(
+        deja_inscrit.student_id == Enrollment.student_id,
+        deja_inscrit.annee_academique == annee_academique
+    )
+    
+    # Candidats et nouvelles inscriptions par département, pour les compteurs de statistiques
+    par_departement = db.execute(
+        select(
+            Enrollment.id_departement,
+            func.count(),
+            func.sum(case((non_inscrit, 1), else_=0))
+        ).where(*conditions).group_by(Enrollment.id_departement)
+    ).all()
+    
+    candidats = 0
+    deltas = new_statistics_deltas()
+    for id_departement, total, nouveaux in par_departement:
+        candidats += total
+        add_enrollment_delta(
+            deltas,
+            annee_academique=annee_academique,
+            niveau=niveau_destination,
+            id_departement=id_departement,
+            statut="en_cours",
+            est_admis=None,
+            nombre=int(nouveaux or 0)
+        )
+    
+    source = select(
+        Enrollment.student_id,
+        literal(annee_academique),
+        literal(niveau_destination),
+        Enrollment.id_departement,
+        Enrollment.id_parcours,
+        func.current_date(),
+        literal("en_cours")
+    ).where(*conditions, non_inscrit)
+    
+    result = db.execute(
+        insert(Enrollment).from_select(
+            [
+                "student_id",
+                "annee_academique",
+                "niveau",
+                "id_departement",
+                "id_parcours",
+                "date_inscription",
+                "statut"
+            ],
+            source
+        )
+    )
+    apply_statistics_deltas(db, deltas)
+    db.commit()
+    
+    created = result.rowcount
+    return {"created": created, "skipped": candidats - created}
 
 
 def calculate_previous_academic_year(annee_academique: str) -> str:
@@ -242,63 +606,78 @@ def calculate_previous_academic_year(annee_academique: str) -> str:
 
 # ============ STATISTIQUES ============
 
-def get_enrollment_statistics(db: Session, annee_academique: str) -> dict:
-    """
-    Récupère les statistiques pour une année académique
-    """
-    total = db.query(Enrollment).filter(
-        Enrollment.annee_academique == annee_academique
-    ).count()
-    
-    en_cours = db.query(Enrollment).filter(
-        Enrollment.annee_academique == annee_academique,
-        Enrollment.statut == "en_cours"
-    ).count()
-    
-    valides = db.query(Enrollment).filter(
-        Enrollment.annee_academique == annee_academique,
-        Enrollment.statut == "validée"
-    ).count()
-    
-    echoues = db.query(Enrollment).filter(
-        Enrollment.annee_academique == annee_academique,
-        Enrollment.statut == "échouée"
-    ).count()
-    
-    admis = db.query(Enrollment).filter(
-        Enrollment.annee_academique == annee_academique,
-        Enrollment.est_admis == True
-    ).count()
-    
+def _format_statistics(total, en_cours, valides, echoues, admis) -> dict:
+    # SUM retourne NULL quand aucune ligne ne correspond (et un DECIMAL sous MySQL)
+    total = int(total or 0)
+    admis = int(admis or 0)
     return {
         "total": total,
-        "en_cours": en_cours,
-        "valides": valides,
-        "echoues": echoues,
+        "en_cours": int(en_cours or 0),
+        "valides": int(valides or 0),
+        "echoues": int(echoues or 0),
         "admis": admis,
         "taux_reussite": round((admis / total * 100) if total > 0 else 0, 2)
     }
 
 
+def get_enrollment_statistics(db: Session, annee_academique: str) -> dict:
+    """
+    Récupère les statistiques pour une année académique
+    Lues depuis les compteurs pré-agrégés
+    """
+    row = db.execute(
+        select(*statistics_counters()).where(
+            EnrollmentStatistic.annee_academique == annee_academique
+        )
+    ).one()
+    
+    return _format_statistics(*row)
+
+
 def get_enrollment_by_level(db: Session, annee_academique: str) -> dict:
     """
     Statistiques par niveau pour une année académique
     """
-    from sqlalchemy import func as sql_func
-    
     results = db.query(
-        Enrollment.niveau,
-        sql_func.count(Enrollment.id).label('total'),
-        sql_func.sum(sql_func.case((Enrollment.est_admis == True, 1), else_=0)).label('admis')
+        EnrollmentStatistic.niveau,
+        func.sum(EnrollmentStatistic.nombre).label('total'),
+        func.sum(EnrollmentStatistic.admis).label('admis')
     ).filter(
-        Enrollment.annee_academique == annee_academique
-    ).group_by(Enrollment.niveau).all()
+        EnrollmentStatistic.annee_academique == annee_academique
+    ).group_by(EnrollmentStatistic.niveau).all()
     
     return {
         niveau: {
-            "total": total,
-            "admis": admis or 0,
-            "taux_reussite": round((admis / total * 100) if total > 0 and admis else 0, 2)
+            "total": int(total or 0),
+            "admis": int(admis or 0),
+            "taux_reussite": round((admis / total * 100) if total and admis else 0, 2)
         }
         for niveau, total, admis in results
-    }
\ No newline at end of file
+    }
+
+
+def get_enrollment_overview(db: Session, annee_academique: Optional[str] = None) -> dict:
+    """
+    Statistiques par année et par niveau en une seule requête
+    Les totaux de l'année sont la somme des lignes par niveau
+    Sans année, retourne toutes les années académiques
+    """
+    statement = select(
+        EnrollmentStatistic.annee_academique,
+        EnrollmentStatistic.niveau,
+        *statistics_counters()
+    ).group_by(EnrollmentStatistic.annee_academique, EnrollmentStatistic.niveau)
+    
+    if annee_academique:
+        statement = statement.where(EnrollmentStatistic.annee_academique == annee_academique)
+    
+    overview = {}
+    for annee, niveau, *counters in db.execute(statement).all():
+        year = overview.setdefault(annee, {"totaux": [0, 0, 0, 0, 0], "par_niveau": {}})
+        year["totaux"] = [a + (b or 0) for a, b in zip(year["totaux"], counters)]
+        year["par_niveau"][niveau] = _format_statistics(*counters)
+    
+    for year in overview.values():
+        year["totaux"] = _format_statistics(*year["totaux"])
+    
+    return overview
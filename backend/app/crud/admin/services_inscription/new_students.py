@@ -1,32 +1,102 @@
 import uuid
 from datetime import datetime
-from typing import Any
+from typing import Any, Callable, Iterable, Iterator, Optional
 from uuid import UUID
-from sqlalchemy import func, select
-from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from sqlalchemy import exists, func, insert, select
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, load_only, raiseload
 
 from fastapi import Body
 
-from app.models.students import Student, StudentStatus
-from app.schemas.students import StudentResponse, StudentsResponse, StudentCreate, StudentUpdate
+from app.models.enrollments import Enrollment
+from app.models.students import Student, StudentStatus, nouveau_numero_etudiant
+from app.schemas.students import StudentResponse, StudentsResponse, StudentCreate, StudentUpdate, StudentListItem
+from app.utils.pagination import CountMode, paginate
 
 
-def students_list(*, db: Session, skip:int, limit: int) -> StudentsResponse | Any:
-    count_statement = select(func.count()).select_from(Student)
-    count = db.execute(count_statement).scalar()
+def select_students_for_list():
+    """
+    Requête des listes d'étudiants: seulement les colonnes de StudentListItem,
+    et aucune relation chargée (raiseload interdit le chargement paresseux)
+    """
+    return select(Student).options(
+        load_only(*[getattr(Student, name) for name in StudentListItem.model_fields]),
+        raiseload("*")
+    )
 
-    statement = select(Student).offset(skip).limit(limit)
-    students = db.execute(statement).scalars().all()
-    return StudentsResponse.model_validate({"data": students, "count": count})
+def students_list(
+    *,
+    db: Session,
+    skip:int,
+    limit: int,
+    cursor: str | None = None,
+    count_mode: CountMode = CountMode.EXACT
+) -> StudentsResponse | Any:
+    page = paginate(
+        db, select_students_for_list(), order_by=(Student.id,),
+        skip=skip, limit=limit, cursor=cursor, count_mode=count_mode
+    )
+    return StudentsResponse.model_validate(page)
 
-def get_pending_students(*, db: Session, skip: int = 0, limit: int) -> StudentsResponse | Any:
-    count_statement = select(func.count()).select_from(Student).filter(Student.status == StudentStatus.EN_ATTENTE)
-    count = db.execute(count_statement).scalar()
+# Colonnes exportées: toute la table etudiants
+EXPORT_COLUMNS = [column.key for column in Student.__table__.columns]
+EXPORT_CHUNK_SIZE = 1000
+
+
+def export_students(
+    *,
+    db: Session,
+    statut: Optional[StudentStatus] = None,
+    id_departement: Optional[int] = None,
+    id_parcours: Optional[int] = None,
+    annee_academique: Optional[str] = None,
+    chunk_size: int = EXPORT_CHUNK_SIZE
+) -> Iterator[Row]:
+    """
+    Parcourt les étudiants filtrés avec un curseur côté serveur (yield_per)
+    Seules chunk_size lignes sont en mémoire à la fois, quel que soit le nombre d'étudiants
+    """
+    statement = select(*[Student.__table__.c[column] for column in EXPORT_COLUMNS])
     
-    statement = select(Student).where(Student.statut == StudentStatus.EN_ATTENTE).offset(skip).limit(limit)
-    students = db.execute(statement).scalars().all()
+    if statut:
+        statement = statement.where(Student.statut == statut)
+    if id_departement:
+        statement = statement.where(Student.id_departement == id_departement)
+    if id_parcours:
+        statement = statement.where(Student.id_parcours == id_parcours)
+    if annee_academique:
+        statement = statement.where(
+            exists().where(
+                Enrollment.student_id == Student.id,
+                Enrollment.annee_academique == annee_academique
+            )
+        )
     
-    return StudentsResponse.model_validate({"data": students, "count": count})
+    result = db.execute(
+        statement.order_by(Student.id),
+        execution_options={"yield_per": chunk_size}
+    )
+    try:
+        yield from result
+    finally:
+        result.close()
+
+def get_pending_students(
+    *,
+    db: Session,
+    skip: int = 0,
+    limit: int,
+    cursor: str | None = None,
+    count_mode: CountMode = CountMode.EXACT
+) -> StudentsResponse | Any:
+    statement = select_students_for_list().where(Student.statut == StudentStatus.EN_ATTENTE)
+    page = paginate(
+        db, statement, order_by=(Student.id,),
+        skip=skip, limit=limit, cursor=cursor, count_mode=count_mode
+    )
+    return StudentsResponse.model_validate(page)
 
 def valider_student(*, db: Session, student_id: UUID) -> StudentsResponse | Any:
     student = db.get(Student, student_id)
@@ -57,6 +127,155 @@ def enroll_student(*, db: Session, data: StudentCreate) -> StudentResponse | Any
     db.refresh(student)
     return StudentResponse.model_validate(student)   
         
+# ============ IMPORT EN MASSE ============
+
+IMPORT_CHUNK_SIZE = 1000
+
+# Colonnes NOT NULL que StudentCreate laisse optionnelles: vérifiées avant l'insertion
+# pour qu'une ligne incomplète n'annule pas tout son lot
+IMPORT_REQUIRED_COLUMNS = [
+    name for name, field in StudentCreate.model_fields.items()
+    if not field.is_required()
+    and name in Student.__table__.c
+    and not Student.__table__.c[name].nullable
+]
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(l) for l in e['loc'])}: {e['msg']}" for e in error.errors()
+    )
+
+
+def _unused_student_ids(db: Session, count: int, used: set) -> list[str]:
+    """
+    Génère count numéros étudiants distincts, absents de la base et de l'import en cours
+    Une seule requête IN par tour, les collisions sont régénérées
+    """
+    ids = []
+    while len(ids) < count:
+        candidates = set()
+        while len(candidates) < count - len(ids):
+            candidate = nouveau_numero_etudiant()
+            if candidate not in used:
+                candidates.add(candidate)
+        taken = set(db.execute(
+            select(Student.id_etudiant).where(Student.id_etudiant.in_(candidates))
+        ).scalars())
+        fresh = candidates - taken
+        used.update(candidates)
+        ids.extend(fresh)
+    return ids
+
+
+def _import_chunk(db: Session, chunk: list, seen_emails: set, used_ids: set, erreurs: list) -> int:
+    """
+    Valide, dédoublonne et insère un lot de lignes en une transaction
+    Returns: nombre d'étudiants insérés
+    """
+    valid = []
+    for ligne, row in chunk:
+        try:
+            data = StudentCreate.model_validate(row)
+        except ValidationError as e:
+            erreurs.append({"ligne": ligne, "email": row.get("email"), "erreur": _validation_message(e)})
+            continue
+        missing = [name for name in IMPORT_REQUIRED_COLUMNS if getattr(data, name) is None]
+        if missing:
+            erreurs.append({
+                "ligne": ligne,
+                "email": data.email,
+                "erreur": f"Champs obligatoires manquants: {', '.join(missing)}"
+            })
+            continue
+        email = data.email.lower()
+        if email in seen_emails:
+            erreurs.append({"ligne": ligne, "email": data.email, "erreur": "Email en double dans le fichier"})
+            continue
+        seen_emails.add(email)
+        valid.append((ligne, data))
+    
+    if not valid:
+        return 0
+    
+    # une seule requête pour l'unicité des emails du lot
+    existing = {
+        email.lower() for email in db.execute(
+            select(Student.email).where(Student.email.in_([data.email for _, data in valid]))
+        ).scalars()
+    }
+    rows = []
+    for ligne, data in valid:
+        if data.email.lower() in existing:
+            erreurs.append({"ligne": ligne, "email": data.email, "erreur": "Il y a déjà un étudiant avec le même email"})
+            continue
+        rows.append(data.model_dump())
+    
+    if not rows:
+        return 0
+    
+    # numéros générés ici: l'insertion en masse ne passe pas par before_insert
+    for row, id_etudiant in zip(rows, _unused_student_ids(db, len(rows), used_ids)):
+        row["id"] = uuid.uuid4()
+        row["id_etudiant"] = id_etudiant
+    
+    try:
+        db.execute(
+            insert(Student).values(
+                statut=StudentStatus.VALIDE,
+                date_inscription=func.current_date(),
+                date_validation=func.now()
+            ),
+            rows
+        )
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        erreurs.extend(
+            {"ligne": ligne, "email": data.email, "erreur": f"Lot rejeté par la base: {e.orig}"}
+            for ligne, data in valid
+            if data.email.lower() not in existing
+        )
+        return 0
+    return len(rows)
+
+
+def import_students(
+    *,
+    db: Session,
+    rows: Iterable[tuple[int, dict]],
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    on_progress: Optional[Callable[[dict], None]] = None
+) -> dict:
+    """
+    Importe en masse des étudiants à partir de lignes (numéro de ligne, valeurs)
+    Les lignes sont traitées par lots: validation StudentCreate, une requête IN
+    pour les emails déjà utilisés, puis un INSERT multi-lignes et un commit par lot
+    
+    Returns: {"nombre_lignes", "nombre_importes", "erreurs"}
+    """
+    report = {"nombre_lignes": 0, "nombre_importes": 0, "erreurs": []}
+    seen_emails = set()
+    used_ids = set()
+    
+    chunk = []
+    for ligne, row in rows:
+        chunk.append((ligne, row))
+        if len(chunk) >= chunk_size:
+            report["nombre_lignes"] += len(chunk)
+            report["nombre_importes"] += _import_chunk(db, chunk, seen_emails, used_ids, report["erreurs"])
+            chunk = []
+            if on_progress:
+                on_progress(report)
+    if chunk:
+        report["nombre_lignes"] += len(chunk)
+        report["nombre_importes"] += _import_chunk(db, chunk, seen_emails, used_ids, report["erreurs"])
+        if on_progress:
+            on_progress(report)
+    
+    report["erreurs"].sort(key=lambda erreur: erreur["ligne"])
+    return report
+
 def delete_student(*, db: Session, id: UUID) -> bool:
     student = db.query(Student).filter(Student.id == id).first()
     if student:
@@ -1,18 +1,25 @@
 from uuid import UUID
-from sqlalchemy import select, func
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
 
 
 from app.models.teachers import Teacher
 from app.schemas.teacher import TeachersResponse, TeacherResponse, TeacherCreate, TeacherUpdate
+from app.utils.pagination import CountMode, paginate
 
-def teachers_list(*, db: Session, skip: int, limit: int) -> TeachersResponse | None:
-    count_statement = select(func.count()).select_from(Teacher)
-    count = db.execute(count_statement).scalar()
-    
-    statement = select(Teacher).offset(skip).limit(limit)
-    data = db.execute(statement).scalars().all()
-    return {"data": data, "count": count}
+def teachers_list(
+    *,
+    db: Session,
+    skip: int,
+    limit: int,
+    cursor: str | None = None,
+    count_mode: CountMode = CountMode.EXACT
+) -> TeachersResponse | None:
+    return paginate(
+        # TeacherResponse expose les médias: chargés en une requête pour toute la page
+        db, select(Teacher).options(selectinload(Teacher.medias)), order_by=(Teacher.id,),
+        skip=skip, limit=limit, cursor=cursor, count_mode=count_mode
+    )
 
 def create_teacher(db: Session, data: TeacherCreate)-> TeacherResponse | None:
     validate_data = data.model_dump()
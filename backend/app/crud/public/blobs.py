@@ -0,0 +1,74 @@
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.media import Media, MediaBlob
+
+
+def reference_blob(
+    *,
+    db: Session,
+    checksum: str,
+    file_path: str,
+    file_size: int,
+    encryption_key_id: str | None,
+    storage_location: str = "local"
+) -> MediaBlob:
+    """
+    Ajoute une référence au fichier de ce contenu, sans commit (enregistrée avec le média)
+    Si le contenu est déjà stocké, le fichier existant est retourné et celui qui vient
+    d'être écrit (file_path) peut être supprimé par l'appelant
+    """
+    while True:
+        # l'incrément est fait par la base: deux uploads simultanés ne perdent pas de référence
+        referenced = db.execute(
+            update(MediaBlob)
+            .where(MediaBlob.checksum == checksum, MediaBlob.ref_count > 0)
+            .values(ref_count=MediaBlob.ref_count + 1)
+        ).rowcount
+        if referenced:
+            return db.get(MediaBlob, checksum, populate_existing=True)
+
+        blob = MediaBlob(
+            checksum=checksum,
+            file_path=file_path,
+            file_size=file_size,
+            encryption_key_id=encryption_key_id,
+            storage_location=storage_location,
+            ref_count=1
+        )
+        try:
+            with db.begin_nested():
+                # une ligne à 0 référence attend la suppression de son fichier: on la remplace
+                db.execute(delete(MediaBlob).where(MediaBlob.checksum == checksum, MediaBlob.ref_count <= 0))
+                db.add(blob)
+            return blob
+        except IntegrityError:
+            # le même contenu vient d'être enregistré par un autre upload: on le référence
+            continue
+
+
+def release_blob(*, db: Session, media: Media) -> tuple[str, str | None] | None:
+    """
+    Retire la référence d'un média à son fichier, sans commit
+    Retourne (chemin, storage_location) du fichier à supprimer après le commit, s'il n'est
+    plus utilisé: dernier média du blob, ou ancien média qui avait son propre fichier
+    """
+    if not media.file_path:
+        return None
+
+    blob = db.execute(
+        select(MediaBlob).where(MediaBlob.checksum == media.checksum, MediaBlob.file_path == media.file_path)
+    ).scalar_one_or_none() if media.checksum else None
+    if blob is None:
+        return media.file_path, media.storage_location
+
+    db.execute(
+        update(MediaBlob)
+        .where(MediaBlob.checksum == blob.checksum)
+        .values(ref_count=MediaBlob.ref_count - 1)
+    )
+    removed = db.execute(
+        delete(MediaBlob).where(MediaBlob.checksum == blob.checksum, MediaBlob.ref_count <= 0)
+    ).rowcount
+    return (blob.file_path, blob.storage_location) if removed else None
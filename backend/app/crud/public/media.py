@@ -1,13 +1,22 @@
+import uuid
 from uuid import UUID
 from fastapi import BackgroundTasks, File, UploadFile
-from sqlalchemy import func, select
+from sqlalchemy import and_, or_, select
 from sqlalchemy.orm import Session
 
-from app.models.media import Media
+from app.models.media import Media, MediaRendition
 from app.models.students import Student
 from app.schemas.media import MediaCreate, MediaResponse
-from app.background_tasks.media import encrypt_and_store
-from app.utils.media import save_temp_file
+from app.utils.media import store_encrypted_upload
+from app.background_tasks.media_worker import enqueue_media_job, wake_media_workers
+from app.crud.public.blobs import reference_blob, release_blob
+from app.encryption_services import encryption_service
+
+
+def remove_files(files: list[tuple[str, str | None]]) -> None:
+    """Supprime des fichiers (chemin, storage_location), ceux déjà absents sont ignorés"""
+    for file_path, storage_location in files:
+        encryption_service.delete_file(file_path, storage_location)
 
 def add_media(
     *,
@@ -16,11 +25,16 @@ def add_media(
     file: UploadFile = File(...),
     student_id: UUID = None,
     teacher_id: UUID = None,
-    background_tasks: BackgroundTasks,
+    background_tasks: BackgroundTasks | None = None,
     is_principal: bool = False
 ) -> Media | None:
     """
-    Ajoute un nouveau média avec traitement en arrière-plan
+    Ajoute un nouveau média
+    Le fichier est haché, mesuré et chiffré en un seul passage vers le stockage final,
+    puis le média est enregistré avec son job de traitement (status "processing")
+    Si le même contenu (checksum) est déjà stocké, le média référence ce fichier
+    et la copie qui vient d'être écrite est supprimée
+    Les workers de media_worker.py font la suite, réveillés après l'envoi de la réponse
     """
     
     if student_id and teacher_id:
@@ -28,57 +42,118 @@ def add_media(
     elif not (student_id or teacher_id):
         return None
     
-    print(file)
+    media_id = uuid.uuid4()
+    stored = store_encrypted_upload(file=file.file, media_id=media_id, file_type=file_type)
+    blob = reference_blob(
+        db=db,
+        checksum=stored["checksum"],
+        file_path=stored["file_path"],
+        file_size=stored["file_size"],
+        encryption_key_id=stored["encryption_key_id"],
+        storage_location=stored["storage_location"]
+    )
     
-    temp_media_data = MediaCreate(
-        file_path="",  # Sera mis à jour par la background task
+    media_data = MediaCreate(
+        file_path=blob.file_path,
         file_type=file_type,
-        mime_type = None, # juste pour que les test de crud marchent
+        mime_type=file.content_type,
         status="processing",
         student_id=student_id,
         teacher_id=teacher_id,
-        is_principal=is_principal,
-        file_size=0,  # Sera calculé
-        storage_location="local"
+        is_principal=is_principal
     )
-    
-    temp_path, media = save_temp_file(
-        db=db, 
-        temp_file=temp_media_data, 
-        file=file,
-        file_type=file_type
+    media = Media(
+        id=media_id,
+        **media_data.model_dump(),
+        file_size=blob.file_size,
+        checksum=blob.checksum,
+        encryption_key_id=blob.encryption_key_id,
+        storage_location=blob.storage_location
     )
+    db.add(media)
+    enqueue_media_job(db, media_id)
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        remove_files([(stored["file_path"], stored["storage_location"])])
+        raise
+    if (blob.file_path, blob.storage_location) != (stored["file_path"], stored["storage_location"]):
+        remove_files([(stored["file_path"], stored["storage_location"])])
     
-    encrypt_and_store(db=db, media_id=media.id, temp_path=temp_path, file_type=file_type) # parceque bg_tasks ne marche que dans les routes
-    
-    media = db.execute(select(Media).where(Media.id==media.id)).scalar_one_or_none()
-    return media if media else None
+    if background_tasks is not None:
+        background_tasks.add_task(wake_media_workers)
+    return media
+
+def owner_filter(*, student_id: UUID = None, teacher_id: UUID = None):
+    """
+    Condition sur le propriétaire: seule la colonne demandée est comparée,
+    l'autre doit être vide (IS NULL, jamais "= NULL")
+    """
+    if student_id:
+        return and_(Media.student_id == student_id, Media.teacher_id.is_(None))
+    return and_(Media.teacher_id == teacher_id, Media.student_id.is_(None))
 
 def read_media(*, db: Session, student_id: UUID = None, teacher_id: UUID = None) -> dict | None:
     if student_id and teacher_id:
         return None
     
     elif student_id or teacher_id:
-        count_stm = select(func.count()).select_from(Media).where(
-            Media.student_id==student_id, 
-            Media.teacher_id==teacher_id
-        )
-        count = db.execute(count_stm).scalar()
-        medias = db.query(Media).filter(
-            Media.student_id==student_id,
-            Media.teacher_id==teacher_id
-        ).all()
-        return {"data": medias, "count": count}
+        # une seule requête: le nombre est celui des lignes lues
+        medias = db.execute(
+            select(Media).where(owner_filter(student_id=student_id, teacher_id=teacher_id))
+        ).scalars().all()
+        return {"data": medias, "count": len(medias)}
     return None
 
+def read_media_by_owners(
+    *,
+    db: Session,
+    student_ids: list[UUID] | None = None,
+    teacher_ids: list[UUID] | None = None,
+    principal_only: bool = False
+) -> dict[str, dict[UUID, list[Media]]]:
+    """
+    Médias de plusieurs étudiants et enseignants en une seule requête, regroupés par propriétaire
+    Chaque id demandé a sa liste, vide s'il n'a aucun média
+    Avec principal_only, seules les photos principales sont lues
+    (index ix_media_student_principal et ix_media_teacher_principal)
+    Returns: {"students": {student_id: [médias]}, "teachers": {teacher_id: [médias]}}
+    """
+    student_ids = list(dict.fromkeys(student_ids or []))
+    teacher_ids = list(dict.fromkeys(teacher_ids or []))
+    result = {
+        "students": {student_id: [] for student_id in student_ids},
+        "teachers": {teacher_id: [] for teacher_id in teacher_ids},
+    }
+    conditions = []
+    if student_ids:
+        conditions.append(Media.student_id.in_(student_ids))
+    if teacher_ids:
+        conditions.append(Media.teacher_id.in_(teacher_ids))
+    if not conditions:
+        return result
+    
+    statement = select(Media).where(or_(*conditions))
+    if principal_only:
+        # "= true" et non "IS TRUE", que MySQL ne sait pas chercher dans l'index
+        statement = statement.where(Media.is_principal == True)
+    statement = statement.order_by(Media.created_at)
+    
+    for media in db.execute(statement).scalars():
+        if media.student_id in result["students"]:
+            result["students"][media.student_id].append(media)
+        elif media.teacher_id in result["teachers"]:
+            result["teachers"][media.teacher_id].append(media)
+    return result
+
 def update_principal_photo(*, db: Session,background_tasks: BackgroundTasks, student_id: UUID = None, teacher_id: UUID = None, new_file: UploadFile = None) -> Media | None:
     if student_id and teacher_id:
         return None
     elif student_id or teacher_id:
         old_principal_medias = db.query(Media).filter(
-            Media.student_id==student_id,
-            Media.teacher_id==teacher_id,
-            Media.is_principal==True
+            owner_filter(student_id=student_id, teacher_id=teacher_id),
+            Media.is_principal == True
         ).all()
         for media in old_principal_medias:
             media.is_principal = False
@@ -92,32 +167,44 @@ def update_principal_photo(*, db: Session,background_tasks: BackgroundTasks, stu
             return media
         return None
 
-def delete_media(*, db: Session, file_path: str, student_id: UUID = None, teacher_id: UUID = None) -> bool | None:
+def delete_media(*, db: Session, media_id: UUID, student_id: UUID = None, teacher_id: UUID = None) -> bool | None:
+    """
+    Supprime un média de son propriétaire, par son id: avec la déduplication, plusieurs médias
+    (ex: la même photo envoyée deux fois) partagent le même file_path
+    """
     if student_id and teacher_id:
         return None
     elif student_id or teacher_id:
-        media = db.query(Media).where(
-            Media.student_id==student_id,
-             Media.teacher_id==teacher_id,
-             Media.file_path==file_path
-        ).first()
+        media = get_media(db=db, media_id=media_id, student_id=student_id, teacher_id=teacher_id)
         if media:
+            unused_files = db.execute(
+                select(MediaRendition.file_path, MediaRendition.storage_location)
+                .where(MediaRendition.media_id == media.id)
+            ).tuples().all()
+            db.query(MediaRendition).filter(MediaRendition.media_id == media.id).delete(synchronize_session=False)
+            blob_file = release_blob(db=db, media=media)
+            if blob_file:
+                unused_files.append(blob_file)
             db.delete(media)
             db.commit()
+            # après le commit: au pire un fichier orphelin, jamais un média sans fichier
+            remove_files(unused_files)
             return True
         return None
     return None
 
-def get_media(*, db: Session, file_path: str, student_id: UUID =None, teacher_id: UUID = None) -> Media | None:
+def get_media(*, db: Session, media_id: UUID, student_id: UUID =None, teacher_id: UUID = None) -> Media | None:
     if student_id and teacher_id:
         return None
     elif student_id or teacher_id:
         media = db.query(Media).where(
-            Media.student_id==student_id,
-            Media.teacher_id==teacher_id,
-            Media.file_path==file_path
+            owner_filter(student_id=student_id, teacher_id=teacher_id),
+            Media.id==media_id
         ).first()
         if media:
             return media
         return None
     return None
+
+def get_media_by_id(*, db: Session, media_id: UUID) -> Media | None:
+    return db.get(Media, media_id)
@@ -0,0 +1,140 @@
+import logging
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.settings import settings
+from app.encryption_services import encryption_service
+from app.models.media import Media, MediaRendition
+from app.utils.renditions import RenditionUnavailable, render_image
+
+logger = logging.getLogger(__name__)
+
+# last_used_at n'est mis à jour qu'une fois par intervalle, pas à chaque affichage
+TOUCH_INTERVAL = timedelta(hours=1)
+# l'éviction descend sous cette part de la limite pour ne pas se relancer à chaque ajout
+EVICTION_TARGET = 0.9
+
+
+def is_renderable(media: Media) -> bool:
+    return bool(media.file_path) and (media.mime_type or "").startswith("image/")
+
+
+def get_rendition(*, db: Session, media_id: UUID, size: int, rendition_format: str) -> MediaRendition | None:
+    rendition = db.execute(
+        select(MediaRendition).where(
+            MediaRendition.media_id == media_id,
+            MediaRendition.size == size,
+            MediaRendition.format == rendition_format
+        )
+    ).scalar_one_or_none()
+    if rendition and (rendition.last_used_at is None or rendition.last_used_at < datetime.now() - TOUCH_INTERVAL):
+        rendition.last_used_at = datetime.now()
+        db.commit()
+    return rendition
+
+
+def create_rendition(*, db: Session, media: Media, size: int, rendition_format: str) -> MediaRendition:
+    """
+    Génère une miniature à partir de l'original déchiffré et l'enregistre chiffrée,
+    dans le même classement que les originaux (renditions/AAAA/MM/)
+    Si une autre requête ou un worker l'a créée entre-temps, c'est celle-ci qui est retournée
+    """
+    data = render_image(
+        encryption_service.decrypt_file(media.file_path, media.encryption_key_id, media.storage_location),
+        size,
+        rendition_format
+    )
+    file_path = encryption_service.create_storage_path(f"{media.id}-{size}.{rendition_format}", "renditions")
+    storage_location = encryption_service.get_storage_location()
+    with encryption_service.storage.open_write(file_path) as rendition_file:
+        encryptor = encryption_service.encryptor(rendition_file)
+        encryptor.write(data)
+        encryptor.close()
+
+    rendition = MediaRendition(
+        media_id=media.id,
+        size=size,
+        format=rendition_format,
+        file_path=file_path,
+        file_size=len(data),
+        encryption_key_id=encryption_service.get_key_id(),
+        storage_location=storage_location
+    )
+    db.add(rendition)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        existing = get_rendition(db=db, media_id=media.id, size=size, rendition_format=rendition_format)
+        if existing and existing.file_path != file_path:
+            encryption_service.delete_file(file_path, storage_location)
+        if existing:
+            return existing
+        raise
+
+    evict_renditions(db=db)
+    return rendition
+
+
+def get_or_create_rendition(*, db: Session, media: Media, size: int, rendition_format: str) -> MediaRendition:
+    return get_rendition(
+        db=db, media_id=media.id, size=size, rendition_format=rendition_format
+    ) or create_rendition(db=db, media=media, size=size, rendition_format=rendition_format)
+
+
+def generate_renditions(db: Session, media: Media) -> None:
+    """
+    Traitement des workers: génère les miniatures par défaut d'une photo
+    Sans Pillow ou pour un fichier illisible, il n'y a simplement pas de miniature
+    """
+    if not is_renderable(media):
+        return
+    for size in settings.MEDIA_RENDITION_SIZES:
+        try:
+            get_or_create_rendition(db=db, media=media, size=size, rendition_format=settings.MEDIA_RENDITION_FORMAT)
+        except RenditionUnavailable as e:
+            logger.info(f"Pas de miniature pour le média {media.id}: {e}")
+            return
+
+
+def evict_renditions(*, db: Session, max_bytes: int | None = None) -> int:
+    """
+    Supprime les miniatures les moins utilisées tant que le cache dépasse max_bytes
+    Elles seront régénérées à la demande
+    Returns: nombre de miniatures supprimées
+    """
+    max_bytes = settings.MEDIA_RENDITION_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    total = db.execute(select(func.coalesce(func.sum(MediaRendition.file_size), 0))).scalar()
+    if total <= max_bytes:
+        return 0
+
+    target = max_bytes * EVICTION_TARGET
+    evicted = []
+    candidates = db.execute(
+        select(MediaRendition.id, MediaRendition.file_path, MediaRendition.storage_location, MediaRendition.file_size)
+        .order_by(MediaRendition.last_used_at, MediaRendition.id)
+        .execution_options(yield_per=500)
+    )
+    for rendition_id, file_path, storage_location, file_size in candidates:
+        if total <= target:
+            break
+        evicted.append((rendition_id, file_path, storage_location))
+        total -= file_size
+    candidates.close()
+
+    ids = [rendition_id for rendition_id, _, _ in evicted]
+    for start in range(0, len(ids), 500):
+        db.query(MediaRendition).filter(
+            MediaRendition.id.in_(ids[start:start + 500])
+        ).delete(synchronize_session=False)
+    db.commit()
+
+    # les fichiers sont supprimés après le commit: au pire un fichier orphelin, jamais une ligne sans fichier
+    for _, file_path, storage_location in evicted:
+        encryption_service.delete_file(file_path, storage_location)
+    logger.info(f"{len(evicted)} miniatures supprimées du cache")
+    return len(evicted)
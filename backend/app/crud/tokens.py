@@ -0,0 +1,110 @@
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from app.core.settings import settings
+from app.models.token import Token
+from app.models.users import User
+
+PURGE_BATCH_SIZE = 1000
+
+
+def hash_token(refresh_token: str) -> str:
+    # le token est aléatoire (256 bits): un SHA-256 suffit, pas besoin d'un hachage lent
+    return hashlib.sha256(refresh_token.encode()).hexdigest()
+
+
+def create_refresh_token(*, db: Session, user_id: UUID) -> str:
+    """
+    Ouvre une session: enregistre le hachage d'un nouveau refresh token
+    Returns: le token, à donner au client (il n'est pas gardé en base)
+    """
+    refresh_token = secrets.token_urlsafe(32)
+    db.add(Token(
+        user_id=user_id,
+        token=hash_token(refresh_token),
+        is_active=True,
+        expires_at=datetime.now() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    ))
+    db.commit()
+    return refresh_token
+
+
+def rotate_refresh_token(*, db: Session, refresh_token: str) -> tuple[User, str] | None:
+    """
+    Échange un refresh token valide contre un nouveau, pour le même utilisateur
+    Un token déjà utilisé ou révoqué qui revient a sans doute été volé:
+    toutes les sessions de l'utilisateur sont alors fermées
+    Returns: (utilisateur, nouveau refresh token), ou None si le token n'est pas valable
+    """
+    token = db.execute(
+        select(Token).where(Token.token == hash_token(refresh_token))
+    ).scalar_one_or_none()
+    if token is None or token.expires_at < datetime.now():
+        return None
+    if not token.is_active:
+        revoke_user_tokens(db=db, user_id=token.user_id)
+        return None
+
+    # UPDATE conditionnel: deux requêtes avec le même token, une seule obtient une nouvelle session
+    used = db.execute(
+        update(Token)
+        .where(Token.id == token.id, Token.is_active == True)
+        .values(is_active=False)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    if not used:
+        return None
+
+    user = db.get(User, token.user_id)
+    if user is None or not user.is_active:
+        return None
+    return user, create_refresh_token(db=db, user_id=user.id)
+
+
+def revoke_refresh_token(*, db: Session, refresh_token: str) -> bool:
+    """Ferme une session (déconnexion)"""
+    revoked = db.execute(
+        update(Token)
+        .where(Token.token == hash_token(refresh_token), Token.is_active == True)
+        .values(is_active=False)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return bool(revoked)
+
+
+def revoke_user_tokens(*, db: Session, user_id: UUID) -> int:
+    """Ferme toutes les sessions d'un utilisateur (changement de mot de passe, token volé)"""
+    revoked = db.execute(
+        update(Token)
+        .where(Token.user_id == user_id, Token.is_active == True)
+        .values(is_active=False)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return revoked
+
+
+def purge_expired_tokens(*, db: Session, batch_size: int = PURGE_BATCH_SIZE) -> int:
+    """
+    Supprime les tokens expirés, par lots pour ne pas verrouiller la table longtemps
+    Les tokens révoqués sont gardés jusqu'à leur expiration: ils servent à détecter une réutilisation
+    Returns: nombre de tokens supprimés
+    """
+    purged = 0
+    while True:
+        ids = db.execute(
+            select(Token.id).where(Token.expires_at < datetime.now()).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return purged
+        purged += db.execute(
+            delete(Token).where(Token.id.in_(ids)).execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
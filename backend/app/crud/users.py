@@ -1,11 +1,12 @@
 
 from uuid import UUID
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import select, update
 
 from app.models.users import User
 from app.schemas.users import UserUpdate, UserCreate, UserPublic, UserPublic
-from app.core.security import verify_password, get_password_hash
+from app.core.security import describe_hash, get_password_hash, pwd_context, verify_and_update_password
+from app.core.principal_cache import principal_cache
 
 
 def create_user(*, db: Session, user_data: UserCreate) -> UserPublic:
@@ -28,10 +29,12 @@ def create_user(*, db: Session, user_data: UserCreate) -> UserPublic:
 
 def update_user(*, db: Session, id: UUID, data: UserUpdate) -> UserPublic | None:
     user = db.query(User).filter(User.id==id).first()
+    old_username = user.username
     update_data = data.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(user, key, value)
     db.commit()
+    principal_cache.invalidate(old_username, user.username)
     db.refresh(user)
     return UserPublic.model_validate(user)
 
@@ -43,9 +46,45 @@ def get_user_by_username(*, db: Session, username: str) -> UserPublic | None:
     return UserPublic.model_validate(user)
 
 def authenticate_user(*, db: Session, username: str, password: str) -> UserPublic | None:
+    """
+    Si le hachage du mot de passe est ancien (bcrypt, coût argon2 différent des settings),
+    il est remplacé par un hachage avec les paramètres actuels: aucun utilisateur n'a à
+    changer son mot de passe quand le coût est ajusté
+    """
     db_user = db.query(User).filter(User.username==username).first()
     if not db_user:
         return None
-    if not verify_password(password, hashed_password=db_user.hashed_password):
+    old_hash = db_user.hashed_password
+    valid, new_hash = verify_and_update_password(password, old_hash)
+    if not valid:
         return None
-    return UserPublic.model_validate(db_user)
\ No newline at end of file
+    if new_hash:
+        # seulement si le mot de passe n'a pas été changé entre-temps
+        db.execute(
+            update(User)
+            .where(User.id == db_user.id, User.hashed_password == old_hash)
+            .values(hashed_password=new_hash)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+    return UserPublic.model_validate(db_user)
+
+def password_hash_report(*, db: Session) -> list[dict]:
+    """
+    Nombre d'utilisateurs par schéma et paramètres de hachage, et s'ils seront
+    re-hachés à leur prochaine connexion (paramètres différents de pwd_context)
+    """
+    groups = {}
+    hashes = db.execute(select(User.hashed_password).execution_options(yield_per=1000)).scalars()
+    for hashed_password in hashes:
+        key = describe_hash(hashed_password)
+        if key not in groups:
+            groups[key] = {
+                "scheme": key[0],
+                "params": key[1],
+                "users": 0,
+                # un hachage inconnu ne peut pas être vérifié, donc pas remplacé non plus
+                "needs_update": key[0] != "inconnu" and pwd_context.needs_update(hashed_password),
+            }
+        groups[key]["users"] += 1
+    return sorted(groups.values(), key=lambda group: -group["users"])
\ No newline at end of file
@@ -1,92 +1,375 @@
+import base64
+import glob
 import os
 import shutil
-from datetime import datetime
+import struct
+import tempfile
+import threading
 from cryptography.fernet import Fernet
-from typing import Optional
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from typing import BinaryIO, Iterator, Optional
 
-class FileEncryptionService:
-    def __init__(self, base_storage_path: str = "backend/app/encrypted_files"):
-        self.base_storage_path = base_storage_path
-        self.encryption_key_id = "default_key_v1"  # Version de la clé
-        self.encryption_key = self._get_encryption_key()
-        self.fernet = Fernet(self.encryption_key)
-    
-    def _get_encryption_key(self) -> bytes:
-        # Récupère ou génère la clé d'encryption
-        key_file = f"encryption_{self.encryption_key_id}.key"
-        if os.path.exists(key_file):
-            with open(key_file, 'rb') as f:
-                return f.read()
-        else:
-            key = Fernet.generate_key()
-            with open(key_file, 'wb') as f:
-                f.write(key)
+from app.core.settings import settings
+from app.storage import LocalStorage, StorageBackend, get_storage
+
+
+# Ancien format: un jeton Fernet pour tout le fichier (lu entièrement en mémoire)
+FERNET_KEY_IDS = {"default_key_v1"}
+
+# Format actuel: AES-256-GCM par segments
+#   en-tête: MAGIC | version (1 octet) | taille des segments (4 octets) | sel (32 octets)
+#   puis chaque segment chiffré: taille des segments (le dernier peut être plus court) + tag de 16 octets
+# Chaque fichier est chiffré avec sa propre sous-clé, dérivée (HKDF-SHA256) de la clé du trousseau
+# et du sel aléatoire de l'en-tête: les nonces d'un fichier ne peuvent pas croiser ceux d'un autre.
+# Le nonce d'un segment est numéro du segment (4 octets) | dernier segment (1 octet), précédés
+# de 7 octets à zéro, ce qui empêche de réordonner, dupliquer ou tronquer les segments
+MAGIC = b"UGCM"
+FORMAT_VERSION = 2
+SEGMENT_SIZE = 64 * 1024
+TAG_SIZE = 16
+SALT_SIZE = 32
+NONCE_PREFIX_SIZE = 7
+HEADER = struct.Struct(">4sBI32s")
+HKDF_INFO = b"media-segments-v2"
+
+
+class DecryptionError(Exception):
+    pass
+
+
+def _segment_nonce(prefix: bytes, index: int, last: bool) -> bytes:
+    return prefix + struct.pack(">IB", index, 1 if last else 0)
+
+
+def derive_file_key(key: bytes, salt: bytes) -> bytes:
+    """Sous-clé AES-256 d'un fichier, dérivée de la clé du trousseau et du sel de son en-tête"""
+    return HKDF(algorithm=hashes.SHA256(), length=32, salt=salt, info=HKDF_INFO).derive(key)
+
+
+class StreamEncryptor:
+    """
+    Chiffre un flux au fil de l'eau: write() peut être appelé avec des morceaux
+    de n'importe quelle taille, seul un segment est gardé en mémoire
+    """
+    def __init__(self, key: bytes, destination: BinaryIO, segment_size: int = SEGMENT_SIZE):
+        salt = os.urandom(SALT_SIZE)
+        self.aesgcm = AESGCM(derive_file_key(key, salt))
+        self.destination = destination
+        self.segment_size = segment_size
+        self.nonce_prefix = bytes(NONCE_PREFIX_SIZE)
+        self.header = HEADER.pack(MAGIC, FORMAT_VERSION, segment_size, salt)
+        self.buffer = bytearray()
+        self.index = 0
+        self.closed = False
+        destination.write(self.header)
+
+    def _write_segment(self, data: bytes, last: bool) -> None:
+        nonce = _segment_nonce(self.nonce_prefix, self.index, last)
+        self.destination.write(self.aesgcm.encrypt(nonce, data, self.header))
+        self.index += 1
+
+    def write(self, data: bytes) -> None:
+        self.buffer += data
+        # on garde toujours le dernier segment: il ne peut être marqué comme
+        # dernier qu'à la fermeture
+        while len(self.buffer) > self.segment_size:
+            self._write_segment(bytes(self.buffer[:self.segment_size]), last=False)
+            del self.buffer[:self.segment_size]
+
+    def close(self) -> None:
+        if not self.closed:
+            self._write_segment(bytes(self.buffer), last=True)
+            self.buffer.clear()
+            self.closed = True
+
+
+def decrypt_segments(key: bytes, source: BinaryIO, offset: int = 0) -> Iterator[bytes]:
+    """
+    Déchiffre un flux AES-GCM segmenté et retourne les segments en clair un par un
+    Avec offset (source seekable), la lecture commence au segment qui contient cet octet
+    et le premier morceau retourné commence exactement à offset
+    """
+    header = source.read(HEADER.size)
+    if len(header) != HEADER.size:
+        raise DecryptionError("En-tête de fichier chiffré incomplet")
+    magic, version, segment_size, salt = HEADER.unpack(header)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise DecryptionError("Format de fichier chiffré inconnu")
+
+    aesgcm = AESGCM(derive_file_key(key, salt))
+    nonce_prefix = bytes(NONCE_PREFIX_SIZE)
+    block_size = segment_size + TAG_SIZE
+    index, skip = divmod(offset, segment_size)
+    if index:
+        source.seek(HEADER.size + index * block_size)
+    current = source.read(block_size)
+    while True:
+        following = source.read(block_size)
+        last = not following
+        try:
+            plaintext = aesgcm.decrypt(_segment_nonce(nonce_prefix, index, last), current, header)
+        except InvalidTag as e:
+            raise DecryptionError(f"Segment {index} invalide ou fichier tronqué") from e
+        if skip:
+            plaintext = plaintext[skip:]
+            skip = 0
+        yield plaintext
+        if last:
+            return
+        current = following
+        index += 1
+
+
+class KeyRing:
+    """
+    Clés d'encryption par key id, chacune dans {keys_dir}/encryption_{key_id}.key
+    Une clé est lue une seule fois par processus puis gardée en mémoire
+    Une clé absente n'est créée que sur demande explicite (create=True, par la rotation de clé):
+    la lecture et le chiffrement avec un key id inconnu lèvent DecryptionError
+    """
+    def __init__(self, keys_dir: str = settings.MEDIA_KEYS_DIR, current_key_id: str = settings.MEDIA_ENCRYPTION_KEY_ID):
+        self.keys_dir = keys_dir
+        self.current_key_id = current_key_id
+        self.keys: dict[str, bytes] = {}
+        self.lock = threading.Lock()
+
+    def key_file(self, key_id: str) -> str:
+        return os.path.join(self.keys_dir, f"encryption_{key_id}.key")
+
+    def key_ids(self) -> list[str]:
+        """Key ids disponibles dans keys_dir"""
+        prefix, suffix = "encryption_", ".key"
+        return sorted(
+            os.path.basename(path)[len(prefix):-len(suffix)]
+            for path in glob.glob(os.path.join(self.keys_dir, f"{prefix}*{suffix}"))
+        )
+
+    def get(self, key_id: Optional[str] = None, create: bool = False) -> bytes:
+        key_id = key_id or self.current_key_id
+        key = self.keys.get(key_id)
+        if key is not None:
             return key
-    
+        with self.lock:
+            if key_id in self.keys:
+                return self.keys[key_id]
+            key_file = self.key_file(key_id)
+            if os.path.exists(key_file):
+                key = self._read(key_file)
+            elif create:
+                key = self._create(key_file)
+            else:
+                raise DecryptionError(f"Clé d'encryption introuvable: {key_id}")
+            self.keys[key_id] = key
+            return key
+
+    @staticmethod
+    def _read(key_file: str) -> bytes:
+        with open(key_file, 'rb') as f:
+            return f.read().strip()
+
+    def _create(self, key_file: str) -> bytes:
+        """
+        Crée le fichier de clé de façon atomique, y compris entre processus: la clé est écrite
+        dans un fichier temporaire puis liée au nom final (os.link échoue si le fichier existe).
+        Si un autre processus l'a créé entre-temps, c'est sa clé qui est lue et gardée
+        """
+        key = base64.urlsafe_b64encode(os.urandom(32))
+        fd, temp_path = tempfile.mkstemp(dir=self.keys_dir, prefix=".encryption_", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(key)
+                f.flush()
+                os.fsync(f.fileno())
+            try:
+                os.link(temp_path, key_file)
+            except FileExistsError:
+                key = self._read(key_file)
+        finally:
+            os.remove(temp_path)
+        return key
+
+
+class FileEncryptionService:
+    """
+    Chiffre et déchiffre les fichiers en flux à travers un stockage (app/storage.py)
+    Les nouveaux fichiers vont dans self.storage; les lectures utilisent le stockage
+    indiqué par storage_location (celui du média), self.storage par défaut
+    """
+    def __init__(
+        self,
+        base_storage_path: Optional[str] = None,
+        storage: Optional[StorageBackend] = None,
+        key_ring: Optional[KeyRing] = None
+    ):
+        if storage is None:
+            storage = LocalStorage(base_storage_path) if base_storage_path else get_storage()
+        self.storage = storage
+        self.key_ring = key_ring or KeyRing()
+        self.encryption_key_id = self.key_ring.current_key_id  # Version de la clé
+
+    def _get_encryption_key(self, key_id: Optional[str] = None) -> bytes:
+        # Clé Fernet ou clé AES-256 encodée en base64, depuis le trousseau
+        return self.key_ring.get(key_id)
+
+    def _get_aes_key(self, key_id: Optional[str] = None) -> bytes:
+        return base64.urlsafe_b64decode(self._get_encryption_key(key_id))
+
     def get_key_id(self) -> str:
         """Retourne l'ID de la clé d'encryption utilisée"""
         return self.encryption_key_id
-    
+
+    def get_storage_location(self) -> str:
+        """Nom du stockage des nouveaux fichiers, à enregistrer dans storage_location"""
+        return self.storage.name
+
     def create_storage_path(self, media_id: str, file_type: str) -> str:
-        """Crée le chemin de stockage organisé"""
-        date_folder = datetime.now().strftime("%Y/%m")
-        storage_dir = f"{self.base_storage_path}/{file_type}/{date_folder}"
-        
-        # Créer les dossiers s'ils n'existent pas
-        os.makedirs(storage_dir, exist_ok=True)
-        
-        return f"{storage_dir}/{media_id}.enc"
-    
+        """Clé organisée du fichier dans le stockage (les dossiers sont créés à l'écriture)"""
+        return self.storage.build_key(media_id, file_type)
+
+    def storage_for(self, storage_location: Optional[str]) -> StorageBackend:
+        if storage_location is None or storage_location == self.storage.name:
+            return self.storage
+        return get_storage(storage_location)
+
+    def delete_file(self, encrypted_path: str, storage_location: Optional[str] = None) -> None:
+        self.storage_for(storage_location).delete(encrypted_path)
+
+    def encryptor(self, destination: BinaryIO, key_id: Optional[str] = None) -> StreamEncryptor:
+        """Chiffreur en flux vers destination, avec la clé courante ou key_id"""
+        return StreamEncryptor(self._get_aes_key(key_id), destination)
+
     def encrypt_and_move_file(self, temp_path: str, media_id: str, file_type: str) -> str:
         """
         Encrypte un fichier temporaire et le déplace vers le stockage final
-        
+        Le fichier est lu et chiffré par segments, la mémoire utilisée ne dépend pas de sa taille
+
         Les arguments à prendre:
             temp_path: Chemin du fichier temporaire
             media_id: ID du média pour le naming
             file_type: Type de fichier (photo, document, qr_code)
-            
+
         Ce qu'elle retourne:
             str: Chemin du fichier encrypté final
         """
         #  Créer le chemin de destination
         encrypted_path = self.create_storage_path(media_id, file_type)
-        
-        # Lire le fichier temporaire
-        with open(temp_path, 'rb') as temp_file:
-            file_data = temp_file.read()
-        
-        # Encrypter les données
-        encrypted_data = self.fernet.encrypt(file_data)
-        
-        # Sauvegarder le fichier encrypté
-        with open(encrypted_path, 'wb') as encrypted_file:
-            encrypted_file.write(encrypted_data)
-        
+
+        # Lire, encrypter et sauvegarder le fichier segment par segment
+        with open(temp_path, 'rb') as temp_file, self.storage.open_write(encrypted_path) as encrypted_file:
+            encryptor = self.encryptor(encrypted_file)
+            for chunk in iter(lambda: temp_file.read(SEGMENT_SIZE), b""):
+                encryptor.write(chunk)
+            encryptor.close()
+
         # Supprimer le fichier temporaire
         os.remove(temp_path)
-        
+
         return encrypted_path
-    
-    def decrypt_file(self, encrypted_path: str) -> bytes:
+
+    def decrypt_stream(
+        self,
+        encrypted_path: str,
+        key_id: Optional[str] = None,
+        storage_location: Optional[str] = None
+    ) -> Iterator[bytes]:
+        """
+        Décrypte un fichier et retourne les données par morceaux
+        Les anciens fichiers Fernet (selon encryption_key_id) sont décryptés d'un coup
+        Sans encryption_key_id, le format est reconnu à l'en-tête du fichier
+        """
+        storage = self.storage_for(storage_location)
+        if key_id is None:
+            with storage.open_read(encrypted_path) as encrypted_file:
+                is_segmented = encrypted_file.read(len(MAGIC)) == MAGIC
+            key_id = self.encryption_key_id if is_segmented else next(iter(FERNET_KEY_IDS))
+
+        if key_id in FERNET_KEY_IDS:
+            with storage.open_read(encrypted_path) as encrypted_file:
+                data = Fernet(self._get_encryption_key(key_id)).decrypt(encrypted_file.read())
+            for start in range(0, len(data), SEGMENT_SIZE):
+                yield data[start:start + SEGMENT_SIZE]
+            return
+
+        with storage.open_read(encrypted_path) as encrypted_file:
+            yield from decrypt_segments(self._get_aes_key(key_id), encrypted_file)
+
+    def decrypt_range(
+        self,
+        encrypted_path: str,
+        start: int,
+        end: int,
+        key_id: Optional[str] = None,
+        storage_location: Optional[str] = None
+    ) -> Iterator[bytes]:
+        """
+        Décrypte les octets start à end (inclus) sans déchiffrer le reste du fichier:
+        seuls les segments qui contiennent la plage sont lus
+        """
+        remaining = end - start + 1
+        if key_id is None or key_id not in FERNET_KEY_IDS:
+            chunks = self._decrypt_segmented_from(encrypted_path, start, key_id, storage_location)
+        else:
+            chunks = self._skip(self.decrypt_stream(encrypted_path, key_id, storage_location), start)
+        for chunk in chunks:
+            if remaining <= 0:
+                break
+            chunk = chunk[:remaining]
+            remaining -= len(chunk)
+            yield chunk
+
+    def _decrypt_segmented_from(
+        self,
+        encrypted_path: str,
+        offset: int,
+        key_id: Optional[str],
+        storage_location: Optional[str]
+    ) -> Iterator[bytes]:
+        with self.storage_for(storage_location).open_read(encrypted_path) as encrypted_file:
+            if key_id is None and encrypted_file.read(len(MAGIC)) != MAGIC:
+                # ancien fichier sans key id: Fernet
+                yield from self._skip(self.decrypt_stream(encrypted_path, None, storage_location), offset)
+                return
+            encrypted_file.seek(0)
+            yield from decrypt_segments(self._get_aes_key(key_id), encrypted_file, offset)
+
+    @staticmethod
+    def _skip(chunks: Iterator[bytes], offset: int) -> Iterator[bytes]:
+        for chunk in chunks:
+            if offset >= len(chunk):
+                offset -= len(chunk)
+                continue
+            yield chunk[offset:]
+            offset = 0
+
+    def decrypt_file(
+        self,
+        encrypted_path: str,
+        key_id: Optional[str] = None,
+        storage_location: Optional[str] = None
+    ) -> bytes:
         """Décrypte un fichier et retourne les données"""
-        with open(encrypted_path, 'rb') as encrypted_file:
-            encrypted_data = encrypted_file.read()
-        
-        return self.fernet.decrypt(encrypted_data)
-    
+        return b"".join(self.decrypt_stream(encrypted_path, key_id, storage_location))
+
     # cette fonction n'est pas encore utilisée
-    def decrypt_file_to_temp(self, encrypted_path: str, temp_name: str) -> str:
+    def decrypt_file_to_temp(
+        self,
+        encrypted_path: str,
+        temp_name: str,
+        key_id: Optional[str] = None,
+        storage_location: Optional[str] = None
+    ) -> str:
         """Décrypte un fichier vers un fichier temporaire"""
-        decrypted_data = self.decrypt_file(encrypted_path)
-        
-        temp_dir = "/tmp"  
+        temp_dir = "/tmp"
         temp_path = f"{temp_dir}/{temp_name}"
-        
+
         with open(temp_path, 'wb') as temp_file:
-            temp_file.write(decrypted_data)
-        
+            for chunk in self.decrypt_stream(encrypted_path, key_id, storage_location):
+                temp_file.write(chunk)
+
         return temp_path
-    
-    
-encryption_service = FileEncryptionService()
\ No newline at end of file
+
+
+encryption_service = FileEncryptionService()
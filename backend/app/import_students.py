@@ -0,0 +1,49 @@
+"""
+Fichier d'import en masse des étudiants depuis un fichier CSV ou XLSX
+
+    python -m app.import_students etudiants.xlsx
+    python -m app.import_students etudiants.csv --chunk-size 2000
+"""
+
+import argparse
+import logging
+
+from sqlalchemy.orm import Session
+
+from app.core.db import engine
+from app.crud.admin.services_inscription.new_students import IMPORT_CHUNK_SIZE, import_students
+from app.utils.spreadsheets import read_spreadsheet_rows
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def log_progress(report: dict) -> None:
+    logger.info(
+        f"{report['nombre_lignes']} lignes traitées, "
+        f"{report['nombre_importes']} importées, {len(report['erreurs'])} erreurs"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="fichier .csv ou .xlsx")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    logger.info(f"Importing students from {args.path}")
+    with open(args.path, "rb") as file, Session(engine) as session:
+        report = import_students(
+            db=session,
+            rows=read_spreadsheet_rows(file, args.path),
+            chunk_size=args.chunk_size,
+            on_progress=log_progress
+        )
+    
+    for erreur in report["erreurs"]:
+        logger.warning(f"ligne {erreur['ligne']} ({erreur['email']}): {erreur['erreur']}")
+    logger.info(f"{report['nombre_importes']} students imported, {len(report['erreurs'])} rows rejected")
+
+
+if __name__ == "__main__":
+    main()
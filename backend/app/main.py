@@ -1,11 +1,34 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.core.settings import settings
+from app.core.password_hasher import HashingBusy, password_hasher
 from app.api.main import api_router
+from app.utils.pagination import InvalidCursor
+from app.background_tasks.media_worker import media_workers
+from app.background_tasks.token_purge import token_purger
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # workers de traitement des médias dans le processus de l'API
+    # (MEDIA_WORKERS=0 pour les lancer à part avec python -m app.media_worker)
+    if settings.MEDIA_WORKERS > 0:
+        media_workers.start()
+    if settings.TOKEN_PURGE_INTERVAL_SECONDS > 0:
+        token_purger.start()
+    yield
+    media_workers.stop()
+    token_purger.stop()
+    password_hasher.shutdown()
+
 
 app = FastAPI(
-    title=settings.PROJECT_NAME
+    title=settings.PROJECT_NAME,
+    lifespan=lifespan
 )
 
 if settings.all_cors_origins:
@@ -17,4 +40,12 @@ if settings.all_cors_origins:
         allow_headers=["*"]
     )
 
+@app.exception_handler(InvalidCursor)
+def invalid_cursor_handler(request: Request, exc: InvalidCursor) -> JSONResponse:
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+@app.exception_handler(HashingBusy)
+def hashing_busy_handler(request: Request, exc: HashingBusy) -> JSONResponse:
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
\ No newline at end of file
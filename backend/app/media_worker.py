@@ -0,0 +1,46 @@
+"""
+Fichier de lancement des workers de traitement des médias, à part de l'API
+
+    python -m app.media_worker --workers 4
+    python -m app.media_worker --once
+"""
+
+import argparse
+import logging
+import signal
+import threading
+
+from sqlalchemy.orm import Session
+
+from app.core.db import engine
+from app.core.settings import settings
+from app.background_tasks.media_worker import MediaWorkerPool, run_pending_jobs
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=max(settings.MEDIA_WORKERS, 1))
+    parser.add_argument("--once", action="store_true", help="exécuter les jobs prêts puis s'arrêter")
+    args = parser.parse_args()
+
+    if args.once:
+        with Session(engine) as session:
+            done = run_pending_jobs(session)
+        logger.info(f"{done} media jobs processed")
+        return
+
+    pool = MediaWorkerPool(workers=args.workers, session_factory=lambda: Session(engine))
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    signal.signal(signal.SIGINT, lambda *_: stopped.set())
+    pool.start()
+    stopped.wait()
+    logger.info("Stopping media workers")
+    pool.stop()
+
+
+if __name__ == "__main__":
+    main()
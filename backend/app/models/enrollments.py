@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import UUID, Column, String, Integer, Text, ForeignKey, Float, Boolean, Date
+from sqlalchemy import UUID, Column, String, Integer, Text, ForeignKey, Float, Boolean, Date, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from app.core.config import Base
@@ -12,6 +12,12 @@ class Enrollment(Base):
     Un étudiant peut avoir plusieurs enrollments (un par année)
     """
     __tablename__ = "inscriptions"
+    __table_args__ = (
+        # Une seule inscription par étudiant et par année (vérification des doublons)
+        UniqueConstraint("student_id", "annee_academique", name="uq_inscriptions_student_annee"),
+        # Filtres année/niveau/admis, statut couvert pour les statistiques
+        Index("ix_inscriptions_annee_niveau_admis_statut", "annee_academique", "niveau", "est_admis", "statut"),
+    )
     
     id = Column(Integer, primary_key=True)
     student_id = Column(UUID(as_uuid=True), ForeignKey("etudiants.id"), nullable=False)
@@ -42,4 +48,30 @@ class Enrollment(Base):
     # Relations
     student = relationship("Student", back_populates="enrollments")
     departement = relationship("Department")
-    parcours = relationship("Program")
\ No newline at end of file
+    parcours = relationship("Program")
+
+class EnrollmentStatistic(Base):
+    """
+    Compteurs pré-agrégés des inscriptions par année, niveau, département et statut
+    Maintenus à chaque écriture sur les inscriptions pour que les statistiques
+    ne parcourent pas la table des inscriptions
+    """
+    __tablename__ = "statistiques_inscriptions"
+    __table_args__ = (
+        UniqueConstraint(
+            "annee_academique", "niveau", "id_departement", "statut",
+            name="uq_statistiques_inscriptions_groupe"
+        ),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    
+    # Clé du groupe
+    annee_academique = Column(String(20), nullable=False)
+    niveau = Column(String(50), nullable=False)
+    id_departement = Column(Integer, ForeignKey("departements.id"), nullable=False)
+    statut = Column(String(50), nullable=False)
+    
+    # Compteurs
+    nombre = Column(Integer, nullable=False, default=0)
+    admis = Column(Integer, nullable=False, default=0)
@@ -1,6 +1,6 @@
 from datetime import datetime
 import uuid
-from sqlalchemy import UUID, Column, Integer, String, ForeignKey, Boolean, DateTime, Text
+from sqlalchemy import UUID, Column, Integer, String, ForeignKey, Boolean, DateTime, Text, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.core.config import Base
 from typing import TYPE_CHECKING
@@ -10,6 +10,11 @@ if TYPE_CHECKING:
 
 class Media(Base):
     __tablename__ = "media"
+    __table_args__ = (
+        # Médias d'un propriétaire et recherche de sa photo principale (read_media_by_owners)
+        Index("ix_media_student_principal", "student_id", "is_principal"),
+        Index("ix_media_teacher_principal", "teacher_id", "is_principal"),
+    )
     
     id = Column(UUID(as_uuid=True), default=uuid.uuid4, primary_key=True, index=True)
     file_path = Column(String(255), nullable=True)   # chemin vers le fichier
@@ -18,7 +23,7 @@ class Media(Base):
     is_principal = Column(Boolean, nullable=True, default=False)
     file_size = Column(Integer, nullable=True)
     encryption_key_id = Column(String(50), nullable=True)  
-    checksum = Column(String(50), nullable=True) 
+    checksum = Column(String(64), nullable=True)  # SHA-256 hexadécimal
     storage_location = Column(String(50), nullable=True)
     status = Column(String(50), nullable=True)
     created_at = Column(DateTime, default=datetime.now)
@@ -29,4 +34,92 @@ class Media(Base):
     teacher_id = Column(UUID(as_uuid=True), ForeignKey("teachers.id"), nullable=True)
     
     student = relationship("Student", back_populates="medias")
-    teacher = relationship("Teacher", back_populates="medias")
\ No newline at end of file
+    teacher = relationship("Teacher", back_populates="medias")
+    renditions = relationship("MediaRendition", back_populates="media", passive_deletes=True)
+
+
+class MediaBlob(Base):
+    """
+    Fichier chiffré stocké une seule fois par contenu (SHA-256), partagé par les médias
+    qui ont le même checksum. ref_count est le nombre de médias qui l'utilisent:
+    le fichier n'est supprimé qu'avec le dernier
+    """
+    __tablename__ = "media_blobs"
+    
+    checksum = Column(String(64), primary_key=True)
+    file_path = Column(String(255), nullable=False)
+    file_size = Column(Integer, nullable=False)
+    encryption_key_id = Column(String(50), nullable=True)
+    storage_location = Column(String(50), nullable=True)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.now)
+
+
+class MediaJob(Base):
+    """
+    File d'attente des traitements de médias, lue par les workers (background_tasks/media_worker.py)
+    Un job en échec est replanifié (run_after) jusqu'à max_attempts tentatives
+    """
+    __tablename__ = "media_jobs"
+    __table_args__ = (
+        # Recherche du prochain job à exécuter
+        Index("ix_media_jobs_status_run_after", "status", "run_after"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    media_id = Column(UUID(as_uuid=True), ForeignKey("media.id", ondelete="CASCADE"), nullable=False, index=True)
+    kind = Column(String(50), nullable=False)      # ex: "process"
+    status = Column(String(20), nullable=False, default="pending")  # pending, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_after = Column(DateTime, nullable=False, default=datetime.now)
+    locked_by = Column(String(100), nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+class MediaRendition(Base):
+    """
+    Version réduite d'une image (miniature), chiffrée comme l'original
+    Le cache est limité en taille: les versions les moins utilisées (last_used_at) sont supprimées
+    """
+    __tablename__ = "media_renditions"
+    __table_args__ = (
+        UniqueConstraint("media_id", "size", "format", name="uq_media_renditions_media_size_format"),
+        # Éviction des versions les moins utilisées
+        Index("ix_media_renditions_last_used_at", "last_used_at"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    media_id = Column(UUID(as_uuid=True), ForeignKey("media.id", ondelete="CASCADE"), nullable=False)
+    size = Column(Integer, nullable=False)        # plus grande dimension en pixels
+    format = Column(String(10), nullable=False)   # ex: "webp", "jpeg"
+    file_path = Column(String(255), nullable=False)
+    file_size = Column(Integer, nullable=False)
+    encryption_key_id = Column(String(50), nullable=True)
+    storage_location = Column(String(50), nullable=True)
+    created_at = Column(DateTime, default=datetime.now)
+    last_used_at = Column(DateTime, default=datetime.now)
+    
+    media = relationship("Media", back_populates="renditions")
+
+
+class MediaKeyRotation(Base):
+    """
+    Suivi d'une rotation de clé (background_tasks/key_rotation.py)
+    checkpoint garde, par table, la dernière ligne traitée: une rotation interrompue
+    reprend à cet endroit
+    """
+    __tablename__ = "media_key_rotations"
+    
+    id = Column(Integer, primary_key=True)
+    target_key_id = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False, default="running")  # running, done
+    checkpoint = Column(Text, nullable=True)   # JSON {table: curseur}
+    reencrypted = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    started_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
@@ -86,10 +86,14 @@ class Student(Base):
     medias = relationship("Media", back_populates="student")
     
 
+def nouveau_numero_etudiant() -> str:
+    return f"STD{datetime.now().year}-{uuid.uuid4().hex[:5]}"
+
+
 @event.listens_for(Student, "before_insert")
 def generer_id_etudiant(mapper, connection, target):
     if not target.id_etudiant and target.statut in [StudentStatus.VALIDE, StudentStatus.ACTIF]:
-        target.id_etudiant = f"STD{datetime.now().year}-{uuid.uuid4().hex[:5]}"
+        target.id_etudiant = nouveau_numero_etudiant()
     pass
 
 
@@ -1,18 +1,22 @@
 import uuid
-from sqlalchemy import UUID, Column, Integer, String, ForeignKey, DateTime, Boolean
+from sqlalchemy import UUID, Column, String, ForeignKey, DateTime, Boolean
 from sqlalchemy.orm import relationship
-from sqlalchemy import func
-from datetime import datetime, timedelta
+from datetime import datetime
 from app.core.config import Base
 
 class Token(Base):
+    """
+    Refresh token d'une session (crud/tokens.py)
+    Seul le SHA-256 du token est enregistré: une fuite de la table ne donne accès à aucune session
+    Un token n'est utilisable qu'une fois, chaque rafraîchissement le remplace par un nouveau
+    """
     __tablename__ = "tokens"
 
     id = Column(UUID(as_uuid=True), default=uuid.uuid4, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    token = Column(String(128), nullable=False, unique=True, index=True)
-    is_active = Column(Boolean, default=True)  
-    created_at = Column(DateTime, default=func.now)
-    expires_at = Column(DateTime, default=lambda: func.now() + timedelta(days=7))
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    token = Column(String(128), nullable=False, unique=True, index=True)  # SHA-256 hexadécimal du token
+    is_active = Column(Boolean, nullable=False, default=True)
+    created_at = Column(DateTime, default=datetime.now)
+    expires_at = Column(DateTime, nullable=False, index=True)  # index: purge des tokens expirés
 
     user = relationship("User", back_populates="tokens")
@@ -0,0 +1,60 @@
+"""
+Rapport sur les hachages des mots de passe: nombre d'utilisateurs par schéma
+(argon2id, bcrypt...) et par coût, et ceux qui seront re-hachés à leur prochaine connexion
+
+    python -m app.password_hashes
+    python -m app.password_hashes --measure
+Avec --measure, le temps d'une vérification avec le coût actuel des settings est mesuré
+(PASSWORD_ARGON2_TIME_COST, PASSWORD_ARGON2_MEMORY_COST, PASSWORD_ARGON2_PARALLELISM),
+pour régler le coût d'après le débit de connexions voulu
+"""
+
+import argparse
+import time
+
+from sqlalchemy.orm import Session
+
+from app.core.db import engine
+from app.core.security import _hash, _verify, describe_hash
+from app.core.settings import settings
+from app.crud.users import password_hash_report
+
+MEASURE_REPETITIONS = 5
+
+
+def measure_verify() -> float:
+    """Durée moyenne (s) d'une vérification avec les paramètres actuels"""
+    hashed = _hash("motdepasse")
+    start = time.perf_counter()
+    for _ in range(MEASURE_REPETITIONS):
+        _verify("motdepasse", hashed)
+    return (time.perf_counter() - start) / MEASURE_REPETITIONS
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--measure", action="store_true", help="mesurer le temps d'une vérification avec le coût actuel")
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        report = password_hash_report(db=session)
+
+    print(f"{'schéma':<12}{'paramètres':<24}{'utilisateurs':>14}  re-haché à la connexion")
+    for group in report:
+        print(f"{group['scheme']:<12}{group['params']:<24}{group['users']:>14}  {'oui' if group['needs_update'] else 'non'}")
+    total = sum(group["users"] for group in report)
+    pending = sum(group["users"] for group in report if group["needs_update"])
+    print(f"\n{total} utilisateurs, {pending} seront re-hachés à leur prochaine connexion")
+
+    if args.measure:
+        duration = measure_verify()
+        scheme, params = describe_hash(_hash("motdepasse"))
+        print(
+            f"\nCoût actuel {scheme} {params}: {duration * 1000:.0f} ms par vérification, "
+            f"environ {1 / duration:.1f} connexions/s par processus "
+            f"({settings.PASSWORD_HASH_WORKERS} processus: {settings.PASSWORD_HASH_WORKERS / duration:.1f} connexions/s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
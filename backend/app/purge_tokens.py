@@ -0,0 +1,31 @@
+"""
+Suppression des refresh tokens expirés, pour une tâche planifiée (cron) quand
+l'API ne la fait pas elle-même (TOKEN_PURGE_INTERVAL_SECONDS=0)
+
+    python -m app.purge_tokens
+"""
+
+import argparse
+import logging
+
+from sqlalchemy.orm import Session
+
+from app.core.db import engine
+from app.crud.tokens import PURGE_BATCH_SIZE, purge_expired_tokens
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=PURGE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        purged = purge_expired_tokens(db=session, batch_size=args.batch_size)
+    logger.info(f"{purged} expired refresh tokens purged")
+
+
+if __name__ == "__main__":
+    main()
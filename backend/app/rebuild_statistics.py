@@ -0,0 +1,24 @@
+"""
+Fichier de recalcul complet des compteurs de statistiques des inscriptions
+"""
+
+import logging
+
+from sqlalchemy.orm import Session
+
+from app.core.db import engine
+from app.crud.admin.services_inscription.enrollment_statistics import rebuild_enrollment_statistics
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    logger.info("Rebuilding enrollment statistics")
+    with Session(engine) as session:
+        groupes = rebuild_enrollment_statistics(session)
+    logger.info(f"Enrollment statistics rebuilt ({groupes} groups)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Fichier de lancement de la rotation de clé des médias: réchiffre tous les fichiers
+avec la clé indiquée (MEDIA_ENCRYPTION_KEY_ID par défaut)
+
+    python -m app.rotate_keys --key-id key_2026_10 --workers 8
+Une rotation interrompue reprend là où elle s'était arrêtée en relançant la même commande
+"""
+
+import argparse
+import logging
+
+from sqlalchemy.orm import Session
+
+from app.core.db import engine
+from app.background_tasks.key_rotation import ROTATION_BATCH_SIZE, ROTATION_WORKERS, rotate_keys
+from app.models.media import MediaKeyRotation
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def log_progress(rotation: MediaKeyRotation) -> None:
+    logger.info(f"{rotation.reencrypted} files re-encrypted, {rotation.failed} failed")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--key-id", default=None, help="clé cible (MEDIA_ENCRYPTION_KEY_ID par défaut)")
+    parser.add_argument("--workers", type=int, default=ROTATION_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=ROTATION_BATCH_SIZE)
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        rotation = rotate_keys(
+            session,
+            target_key_id=args.key_id,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            on_progress=log_progress
+        )
+    logger.info(
+        f"Key rotation to {rotation.target_key_id} done: "
+        f"{rotation.reencrypted} files re-encrypted, {rotation.failed} failed"
+    )
+    if rotation.last_error:
+        logger.warning(f"Last error: {rotation.last_error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field, field_validator
+from typing import List, Optional
 
 from uuid import UUID
 
@@ -46,3 +46,49 @@ class EnrollmentUpdate(BaseModel):
 class EnrollmentResponse(EnrollmentBase):
     id: UUID
     
+
+
+
+# Résultats annuels (clôture des inscriptions)
+
+class EnrollmentResult(BaseModel):
+    """
+    Résultat d'un étudiant pour une inscription annuelle
+    """
+    enrollment_id: int
+    est_admis: bool
+    moyenne_annuelle: Optional[float] = Field(
+        default=None,
+        validation_alias=AliasChoices("moyenne_annuelle", "moyenne")
+    )
+    credits_obtenus: int = Field(
+        default=0,
+        validation_alias=AliasChoices("credits_obtenus", "credits")
+    )
+    
+    @field_validator("est_admis", mode="before")
+    @classmethod
+    def parse_oui_non(cls, value):
+        # valeurs des fichiers saisis par les jurys
+        if isinstance(value, str) and value.strip().lower() in ("oui", "non"):
+            return value.strip().lower() == "oui"
+        return value
+    
+    @field_validator("moyenne_annuelle", mode="before")
+    @classmethod
+    def parse_virgule_decimale(cls, value):
+        if isinstance(value, str):
+            return value.replace(",", ".")
+        return value
+
+class EnrollmentResultError(BaseModel):
+    ligne: int
+    enrollment_id: Optional[int] = None
+    erreur: str
+
+class EnrollmentResultsReport(BaseModel):
+    """
+    Rapport de la saisie des résultats en masse
+    """
+    nombre_clotures: int
+    erreurs: List[EnrollmentResultError]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, ConfigDict
-from typing import Optional, List
+from typing import Dict, Optional, List
 
 from uuid import UUID
 
@@ -37,4 +37,12 @@ class MediasResponse(BaseModel):
     data: List[MediaResponse]
     count: int
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+class MediasByOwnerResponse(BaseModel):
+    """
+    Médias regroupés par propriétaire (id de l'étudiant ou de l'enseignant)
+    """
+    students: Dict[UUID, List[MediaResponse]]
+    teachers: Dict[UUID, List[MediaResponse]]
+
+    model_config = ConfigDict(from_attributes=True)
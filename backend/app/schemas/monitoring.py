@@ -0,0 +1,21 @@
+from typing import Optional
+from pydantic import BaseModel
+
+
+class DbPoolStatus(BaseModel):
+    """
+    État du pool de connexions: connexions ouvertes, prêtées, en dépassement,
+    et compteurs depuis le démarrage du processus
+    """
+    pool: str
+    size: Optional[int] = None
+    checked_in: Optional[int] = None
+    checked_out: Optional[int] = None
+    overflow: Optional[int] = None
+    max_overflow: Optional[int] = None
+    checkouts: Optional[int] = None
+    connects: Optional[int] = None
+    invalidations: Optional[int] = None
+    timeouts: Optional[int] = None
+    wait_ms_avg: Optional[float] = None
+    wait_ms_max: Optional[float] = None
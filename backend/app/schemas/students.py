@@ -60,9 +60,29 @@ class StudentCreate(StudentPreInscription):
 class StudentResponse(StudentBase):
     medias: Optional[list] = []
 
+class StudentListItem(BaseModel):
+    """
+    Projection légère pour les listes: seulement les colonnes affichées dans la grille,
+    sans les médias (une requête de plus par étudiant)
+    """
+    id: UUID
+    id_etudiant: Optional[str] = None
+    nom: str
+    prenom: str
+    sexe: Optional[str] = None
+    email: Optional[str] = None
+    telephone: Optional[str] = None
+    statut: Optional[str] = None
+    date_inscription: Optional[date] = None
+    id_departement: Optional[int] = None
+    id_parcours: Optional[int] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
 class StudentsResponse(BaseModel):
-    data: List[StudentResponse]
-    count: int
+    data: List[StudentListItem]
+    count: Optional[int] = None
+    next_cursor: Optional[str] = None
     
     model_config = ConfigDict(from_attributes=True)
 
@@ -91,3 +111,16 @@ class StudentUpdate(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+
+class StudentImportError(BaseModel):
+    ligne: int
+    email: Optional[str] = None
+    erreur: str
+
+class StudentImportReport(BaseModel):
+    """
+    Rapport de l'import en masse des étudiants
+    """
+    nombre_lignes: int
+    nombre_importes: int
+    erreurs: List[StudentImportError]
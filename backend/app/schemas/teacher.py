@@ -38,7 +38,8 @@ class TeacherResponse(TeacherBase):
 
 class TeachersResponse(BaseModel):
     data: list[TeacherResponse]
-    count: int
+    count: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 
@@ -6,6 +6,11 @@ from pydantic import BaseModel, ConfigDict
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    refresh_token: Optional[str] = None
+
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
 
 
 class TokenRead(BaseModel):
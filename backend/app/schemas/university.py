@@ -26,7 +26,8 @@ class FacultyResponse(FacultyBase):
 
 class FacultiesResponse(BaseModel):
     data: List[FacultyResponse] = None
-    count: int
+    count: Optional[int] = None
+    next_cursor: Optional[str] = None
     
     model_config = ConfigDict(from_attributes=True)
 
@@ -55,7 +56,8 @@ class DepartmentResponse(DepartmentBase):
 
 class DepartementsResponse(BaseModel):
     data: List[FacultyResponse] = None
-    count: int
+    count: Optional[int] = None
+    next_cursor: Optional[str] = None
     
     model_config = ConfigDict(from_attributes=True)
 
@@ -91,7 +93,8 @@ class ProgramResponse(ProgramBase):
 
 class ProgramsResponse(BaseModel):
     data: List[ProgramResponse] = None
-    count: int
+    count: Optional[int] = None
+    next_cursor: Optional[str] = None
     
     model_config = ConfigDict(from_attributes=True)
 
@@ -126,6 +129,7 @@ class CourseResponse(CourseBase):
 
 class CoursesResponse(BaseModel):
     data: List[CourseResponse] = None
-    count: int
+    count: Optional[int] = None
+    next_cursor: Optional[str] = None
     
     model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
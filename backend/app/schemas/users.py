@@ -63,7 +63,8 @@ class UsersPublic(BaseModel):
     Schemas publique de la liste de tous les utilisateurs
     """
     data: list[UserPublic]
-    count: int
+    count: Optional[int] = None
+    next_cursor: Optional[str] = None
     
     model_config = ConfigDict(from_attributes=True)
 
@@ -0,0 +1,50 @@
+"""
+Fichier de lancement du scrubber des médias: supprime les fichiers orphelins et les fichiers
+temporaires, repère les médias sans fichier, vérifie les checksums et relance les médias bloqués
+
+    python -m app.scrub_media --dry-run
+    python -m app.scrub_media --verify-sample 0.05 --io-rate 20 --workers 8 --report rapport.json
+"""
+
+import argparse
+import json
+import logging
+
+from sqlalchemy.orm import Session
+
+from app.core.db import engine
+from app.background_tasks.media_scrubber import SCRUB_WORKERS, run_scrub
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--verify-sample", type=float, default=0.0, help="part des fichiers à vérifier, de 0 à 1")
+    parser.add_argument("--io-rate", type=float, default=None, help="lecture maximum en Mo/s pour la vérification")
+    parser.add_argument("--workers", type=int, default=SCRUB_WORKERS)
+    parser.add_argument("--dry-run", action="store_true", help="ne rien modifier, seulement le rapport")
+    parser.add_argument("--report", default=None, help="fichier JSON où écrire le rapport")
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        report = run_scrub(
+            session,
+            verify_sample=args.verify_sample,
+            workers=args.workers,
+            io_rate=args.io_rate * 1024 * 1024 if args.io_rate else None,
+            dry_run=args.dry_run
+        )
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.report:
+        with open(args.report, "w") as f:
+            f.write(output)
+        logger.info(f"Report written to {args.report}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+import hashlib
+import io
+import os
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime
+from typing import BinaryIO, Iterator, NamedTuple, Optional
+
+from app.core.settings import settings
+
+
+# Les fichiers chiffrés sont lus et écrits en flux à travers un stockage:
+#   local   -> {base}/{dossier}/{AAAA/MM}/{nom}.enc (disposition historique)
+#   sharded -> {base}/{dossier}/{ab}/{cd}/{nom}.enc, ab/cd tirés du hash du nom,
+#              pour ne pas avoir des dossiers de centaines de milliers de fichiers
+#   s3      -> objet {prefix}{dossier}/{AAAA/MM}/{nom}.enc dans un bucket compatible S3
+# Media.storage_location garde le nom du stockage, Media.file_path la clé dans ce stockage
+
+
+class StorageError(Exception):
+    pass
+
+
+class StoredFile(NamedTuple):
+    key: str
+    size: int
+    modified: float  # timestamp
+
+
+class StorageBackend(ABC):
+    name: str
+
+    @abstractmethod
+    def build_key(self, name: str, folder: str) -> str:
+        """Clé d'un nouveau fichier nom dans dossier"""
+
+    @abstractmethod
+    def open_write(self, key: str):
+        """
+        Context manager qui retourne un fichier en écriture
+        Le fichier n'est visible qu'à la sortie sans erreur, sinon rien n'est laissé dans le stockage
+        """
+
+    @abstractmethod
+    def open_read(self, key: str) -> BinaryIO:
+        """Fichier en lecture, seekable (pour les plages de déchiffrement)"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Supprime le fichier, sans erreur s'il n'existe plus"""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """Le fichier est-il dans le stockage"""
+
+    @abstractmethod
+    def iter_files(self, prefix: str = "") -> Iterator[StoredFile]:
+        """Tous les fichiers du stockage (dont les écritures en cours .part), en flux"""
+
+    def iter_keys(self, prefix: str = "") -> Iterator[str]:
+        """Toutes les clés du stockage (qui commencent par prefix)"""
+        for stored_file in self.iter_files(prefix):
+            if not stored_file.key.endswith(".part"):
+                yield stored_file.key
+
+
+class LocalStorage(StorageBackend):
+    name = "local"
+
+    def __init__(self, base_path: str = settings.MEDIA_STORAGE_PATH):
+        self.base_path = base_path
+        self.root = f"file:{os.path.abspath(base_path)}"  # deux stockages de même root partagent les fichiers
+
+    def build_key(self, name: str, folder: str) -> str:
+        date_folder = datetime.now().strftime("%Y/%m")
+        return f"{self.base_path}/{folder}/{date_folder}/{name}.enc"
+
+    @contextmanager
+    def open_write(self, key: str):
+        os.makedirs(os.path.dirname(key), exist_ok=True)
+        partial_path = f"{key}.part"
+        try:
+            with open(partial_path, "wb") as file:
+                yield file
+            os.replace(partial_path, key)
+        except BaseException:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+
+    def open_read(self, key: str) -> BinaryIO:
+        return open(key, "rb")
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(key)
+        except FileNotFoundError:
+            pass
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(key)
+
+    def iter_files(self, prefix: str = "") -> Iterator[StoredFile]:
+        for directory, _, files in os.walk(self.base_path):
+            for file in files:
+                key = f"{directory}/{file}"
+                if not key.startswith(prefix):
+                    continue
+                try:
+                    stat = os.stat(key)
+                except FileNotFoundError:
+                    continue  # supprimé pendant le parcours
+                yield StoredFile(key, stat.st_size, stat.st_mtime)
+
+
+class ShardedLocalStorage(LocalStorage):
+    name = "sharded"
+
+    def build_key(self, name: str, folder: str) -> str:
+        digest = hashlib.sha256(name.encode()).hexdigest()
+        return f"{self.base_path}/{folder}/{digest[:2]}/{digest[2:4]}/{name}.enc"
+
+
+class S3Writer(io.RawIOBase):
+    """
+    Envoi en multipart: seule une partie (part_size) est gardée en mémoire
+    Un fichier plus petit qu'une partie est envoyé en un seul PUT
+    """
+    def __init__(self, client, bucket: str, key: str, part_size: int):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self.buffer = bytearray()
+        self.upload_id = None
+        self.parts = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.buffer += data
+        while len(self.buffer) >= self.part_size:
+            self._upload_part(bytes(self.buffer[:self.part_size]))
+            del self.buffer[:self.part_size]
+        return len(data)
+
+    def _upload_part(self, data: bytes) -> None:
+        if self.upload_id is None:
+            self.upload_id = self.client.create_multipart_upload(Bucket=self.bucket, Key=self.key)["UploadId"]
+        number = len(self.parts) + 1
+        response = self.client.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id, PartNumber=number, Body=data
+        )
+        self.parts.append({"ETag": response["ETag"], "PartNumber": number})
+
+    def complete(self) -> None:
+        if self.upload_id is None:
+            self.client.put_object(Bucket=self.bucket, Key=self.key, Body=bytes(self.buffer))
+        else:
+            if self.buffer:
+                self._upload_part(bytes(self.buffer))
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+                MultipartUpload={"Parts": self.parts}
+            )
+        self.buffer.clear()
+
+    def abort(self) -> None:
+        if self.upload_id is not None:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+        self.buffer.clear()
+
+
+class S3Reader(io.RawIOBase):
+    """
+    Lecture en flux d'un objet S3
+    Après un seek, la lecture reprend par une requête avec Range à partir de la nouvelle position
+    """
+    def __init__(self, client, bucket: str, key: str):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.position = 0
+        self.body = None
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.client.head_object(Bucket=self.bucket, Key=self.key)["ContentLength"]
+        if offset != self.position:
+            self._close_body()
+            self.position = offset
+        return self.position
+
+    def readinto(self, buffer) -> int:
+        if self.body is None:
+            try:
+                self.body = self.client.get_object(
+                    Bucket=self.bucket, Key=self.key, Range=f"bytes={self.position}-"
+                )["Body"]
+            except self.client.exceptions.ClientError as e:
+                if e.response.get("Error", {}).get("Code") == "InvalidRange":
+                    return 0  # position à la fin de l'objet
+                raise
+        data = self.body.read(len(buffer))
+        buffer[:len(data)] = data
+        self.position += len(data)
+        return len(data)
+
+    def _close_body(self) -> None:
+        if self.body is not None:
+            self.body.close()
+            self.body = None
+
+    def close(self) -> None:
+        self._close_body()
+        super().close()
+
+
+class S3Storage(StorageBackend):
+    """
+    Stockage compatible S3 (AWS, MinIO...), boto3 est importé à la première utilisation
+    """
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: str = settings.S3_BUCKET,
+        prefix: str = settings.S3_PREFIX,
+        endpoint_url: Optional[str] = settings.S3_ENDPOINT_URL,
+        region_name: Optional[str] = settings.S3_REGION,
+        access_key_id: Optional[str] = settings.S3_ACCESS_KEY_ID,
+        secret_access_key: Optional[str] = settings.S3_SECRET_ACCESS_KEY,
+        part_size: int = 8 * 1024 * 1024,
+        client=None
+    ):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.endpoint_url = endpoint_url
+        self.region_name = region_name
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.part_size = part_size
+        self._client = client
+        self.root = f"s3://{bucket}/{prefix}"
+
+    @property
+    def client(self):
+        if self._client is None:
+            try:
+                import boto3
+            except ImportError as e:
+                raise StorageError("Le stockage S3 nécessite le paquet boto3") from e
+            self._client = boto3.client(
+                "s3",
+                endpoint_url=self.endpoint_url,
+                region_name=self.region_name,
+                aws_access_key_id=self.access_key_id,
+                aws_secret_access_key=self.secret_access_key
+            )
+        return self._client
+
+    def build_key(self, name: str, folder: str) -> str:
+        date_folder = datetime.now().strftime("%Y/%m")
+        return f"{self.prefix}{folder}/{date_folder}/{name}.enc"
+
+    @contextmanager
+    def open_write(self, key: str):
+        writer = S3Writer(self.client, self.bucket, key, self.part_size)
+        try:
+            yield writer
+            writer.complete()  # la dernière partie peut échouer aussi, l'envoi est alors annulé
+        except BaseException:
+            writer.abort()
+            raise
+
+    def open_read(self, key: str) -> BinaryIO:
+        return io.BufferedReader(S3Reader(self.client, self.bucket, key), buffer_size=256 * 1024)
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+        except self.client.exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    def iter_files(self, prefix: str = "") -> Iterator[StoredFile]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix or self.prefix):
+            for item in page.get("Contents", []):
+                yield StoredFile(item["Key"], item["Size"], item["LastModified"].timestamp())
+
+
+STORAGE_BACKENDS = {
+    LocalStorage.name: LocalStorage,
+    ShardedLocalStorage.name: ShardedLocalStorage,
+    S3Storage.name: S3Storage,
+}
+
+_storages: dict[str, StorageBackend] = {}
+
+
+def get_storage(location: Optional[str] = None) -> StorageBackend:
+    """
+    Stockage d'après son nom (Media.storage_location), créé une fois par processus
+    Sans nom, le stockage configuré (MEDIA_STORAGE_BACKEND)
+    """
+    location = location or settings.MEDIA_STORAGE_BACKEND
+    if location not in _storages:
+        if location not in STORAGE_BACKENDS:
+            raise StorageError(f"Stockage inconnu: {location}")
+        _storages[location] = STORAGE_BACKENDS[location]()
+    return _storages[location]
@@ -11,11 +11,15 @@ from app.main import app
 from app.models.students import Student
 from app.models.teachers import Teacher
 from app.models.university import Faculty, Program, Course, Department
-from app.models.media import Media
+from app.models.media import Media, MediaBlob, MediaJob, MediaRendition
+from app.models.enrollments import Enrollment, EnrollmentStatistic
+from app.models.student_history import StudentHistory
 from app.models import users
 from app.core.config import Base
 from app.core.settings import settings
+from app.core.principal_cache import principal_cache
 from app.api.deps import get_db
+from app.encryption_services import encryption_service
 from app.initial_data import init_db
 from app.tests.utils.users import authenticate_user_from_username
 from app.tests.utils.utils import get_superuser_token_headers
@@ -32,6 +36,10 @@ engine = create_engine(
 
 TestingSessionLocal = sessionmaker(bind=engine)
 
+# les tests exécutent les jobs des médias eux-mêmes (run_pending_jobs)
+settings.MEDIA_WORKERS = 0
+settings.TOKEN_PURGE_INTERVAL_SECONDS = 0
+
 
 @pytest.fixture(scope="session", autouse=True)
 def setup_database():
@@ -40,6 +48,8 @@ def setup_database():
     Supprime les tables à la fin. 
     """
     Base.metadata.create_all(bind=engine)  
+    # en production la clé courante est créée par python -m app.rotate_keys
+    encryption_service.key_ring.get(create=True)
     with Session(engine) as session:
         init_db(session)  
         session.commit()
@@ -56,15 +66,23 @@ def db():
     try:
         yield session
     finally:
+        session.query(StudentHistory).delete()
+        session.query(Enrollment).delete()
+        session.query(EnrollmentStatistic).delete()
         session.query(Student).delete() 
         session.query(Teacher).delete() 
+        session.query(MediaJob).delete()
+        session.query(MediaRendition).delete()
         session.query(Media).delete()
+        session.query(MediaBlob).delete()
         session.query(Faculty).delete()
         session.query(Program).delete()
         session.query(Course).delete()
         session.query(Department).delete()
         session.commit()
         session.close()
+        # les fixtures suppriment des utilisateurs sans passer par les routes
+        principal_cache.clear()
 
 @pytest.fixture(scope="function")   
 def client(db):
@@ -0,0 +1,181 @@
+from typing import Any
+
+from app.models.enrollments import Enrollment, EnrollmentStatistic
+from app.models.students import Student, StudentStatus
+from app.models.student_history import StudentHistory
+from app.crud.admin.services_inscription import enrollments, enrollment_statistics
+from app.schemas.enrollments import EnrollmentResult
+from app.tests.utils.students import create_random_students
+from app.tests.utils.enrollments import create_enrollment_for_student
+
+
+def test_promote_enrollments(db) -> Any:
+    students = create_random_students(db, count=3)
+    for student in students:
+        create_enrollment_for_student(db, student.id)
+    # déjà inscrit pour la nouvelle année
+    create_enrollment_for_student(db, students[0].id, annee_academique="2024-2025", niveau="L2")
+    
+    result = enrollments.promote_enrollments(db, "2024-2025", "L1", "L2")
+    assert result == {"created": 2, "skipped": 1}
+    assert db.query(Enrollment).filter(Enrollment.annee_academique == "2024-2025").count() == 3
+
+def test_promote_enrollments_admis_seulement(db) -> Any:
+    students = create_random_students(db, count=2)
+    create_enrollment_for_student(db, students[0].id, est_admis=True)
+    create_enrollment_for_student(db, students[1].id, est_admis=False)
+    
+    result = enrollments.promote_enrollments(db, "2024-2025", "L1", "L2", admis_only=True)
+    assert result == {"created": 1, "skipped": 0}
+
+def test_create_bulk_enrollments(db) -> Any:
+    students = create_random_students(db, count=3)
+    create_enrollment_for_student(db, students[0].id, annee_academique="2024-2025", niveau="L2")
+    data = [
+        {
+            "student_id": student.id,
+            "annee_academique": "2024-2025",
+            "niveau": "L2",
+            "id_departement": 1,
+            "id_parcours": 1
+        }
+        for student in students
+    ]
+    
+    result = enrollments.create_bulk_enrollments(db, data, chunk_size=2)
+    assert result == {"created": 2, "skipped": 1}
+
+def test_get_enrollment_statistics(db) -> Any:
+    students = create_random_students(db, count=2)
+    create_enrollment_for_student(db, students[0].id, est_admis=True)
+    create_enrollment_for_student(db, students[1].id, est_admis=False)
+    enrollment_statistics.rebuild_enrollment_statistics(db)
+    
+    stats = enrollments.get_enrollment_statistics(db, "2023-2024")
+    assert stats["total"] == 2
+    assert stats["en_cours"] == 2
+    assert stats["admis"] == 1
+    assert stats["taux_reussite"] == 50.0
+
+def test_get_enrollment_statistics_empty_year(db) -> Any:
+    stats = enrollments.get_enrollment_statistics(db, "1999-2000")
+    assert stats["total"] == 0
+    assert stats["taux_reussite"] == 0
+
+def test_get_enrollment_overview(db) -> Any:
+    students = create_random_students(db, count=3)
+    create_enrollment_for_student(db, students[0].id, niveau="L1")
+    create_enrollment_for_student(db, students[1].id, niveau="L1", est_admis=False)
+    create_enrollment_for_student(db, students[2].id, niveau="L2")
+    enrollment_statistics.rebuild_enrollment_statistics(db)
+    
+    overview = enrollments.get_enrollment_overview(db, "2023-2024")
+    assert overview["2023-2024"]["totaux"]["total"] == 3
+    assert overview["2023-2024"]["totaux"]["admis"] == 2
+    assert overview["2023-2024"]["par_niveau"]["L1"]["total"] == 2
+    assert overview["2023-2024"]["par_niveau"]["L2"]["admis"] == 1
+
+def _statistics_snapshot(db) -> list:
+    return sorted(
+        (s.annee_academique, s.niveau, s.id_departement, s.statut, s.nombre, s.admis)
+        for s in db.query(EnrollmentStatistic).all()
+        if s.nombre or s.admis
+    )
+
+def test_statistics_maintained_incrementally(db) -> Any:
+    students = create_random_students(db, count=3)
+    created = [
+        enrollments.create_enrollment(
+            db=db,
+            student_id=student.id,
+            annee_academique="2023-2024",
+            niveau="L1",
+            id_departement=1,
+            id_parcours=1
+        )
+        for student in students
+    ]
+    enrollments.close_enrollment(db=db, enrollment_id=created[0].id, est_admis=True)
+    enrollments.close_enrollment(db=db, enrollment_id=created[1].id, est_admis=False)
+    enrollments.promote_enrollments(db, "2024-2025", "L1", "L2")
+    
+    incremental = _statistics_snapshot(db)
+    enrollment_statistics.rebuild_enrollment_statistics(db)
+    assert incremental == _statistics_snapshot(db)
+    
+    stats = enrollments.get_enrollment_statistics(db, "2023-2024")
+    assert stats["total"] == 3
+    assert stats["valides"] == 1
+    assert stats["echoues"] == 1
+    assert stats["admis"] == 1
+
+def test_close_enrollments_in_bulk(db) -> Any:
+    students = create_random_students(db, count=3)
+    created = [create_enrollment_for_student(db, student.id, est_admis=None) for student in students]
+    enrollments.close_enrollment(db=db, enrollment_id=created[2].id, est_admis=True)
+    
+    results = [
+        (1, EnrollmentResult(enrollment_id=created[0].id, est_admis=True, moyenne_annuelle=14.5, credits_obtenus=60)),
+        (2, EnrollmentResult(enrollment_id=created[1].id, est_admis=False)),
+        (3, EnrollmentResult(enrollment_id=created[1].id, est_admis=True)),
+        (4, EnrollmentResult(enrollment_id=created[2].id, est_admis=False)),
+        (5, EnrollmentResult(enrollment_id=-1, est_admis=True)),
+    ]
+    report = enrollments.close_enrollments_in_bulk(db, results)
+    
+    assert report["nombre_clotures"] == 2
+    assert [erreur["ligne"] for erreur in report["erreurs"]] == [3, 4, 5]
+    
+    db.expire_all()
+    first = db.get(Enrollment, created[0].id)
+    assert first.statut == "validée"
+    assert first.moyenne_annuelle == 14.5
+    assert db.get(Enrollment, created[1].id).statut == "échouée"
+
+def test_parse_enrollment_results() -> Any:
+    rows = [
+        (2, {"enrollment_id": "7", "est_admis": "oui", "moyenne": "12.5"}),
+        (3, {"enrollment_id": "8", "est_admis": "oui", "credits": "beaucoup"}),
+        (4, {"enrollment_id": "abc", "est_admis": "non"}),
+    ]
+    results, erreurs = enrollments.parse_enrollment_results(rows)
+    
+    assert [(ligne, result.enrollment_id) for ligne, result in results] == [(2, 7)]
+    assert results[0][1].moyenne_annuelle == 12.5
+    # l'id est gardé quand seule une autre colonne est invalide
+    assert [(erreur["ligne"], erreur["enrollment_id"]) for erreur in erreurs] == [(3, 8), (4, None)]
+    assert erreurs[0]["erreur"].startswith("credits")
+
+def _activate(db, students) -> None:
+    for student in students:
+        db.get(Student, student.id).statut = StudentStatus.ACTIF
+    db.commit()
+
+def test_mark_student_as_graduated_single_history(db) -> Any:
+    student = create_random_students(db, count=1)[0]
+    _activate(db, [student])
+    create_enrollment_for_student(db, student.id, niveau="L3")
+    
+    enrollments.mark_student_as_graduated(db, student.id, "Licence", "Bien")
+    
+    history = db.query(StudentHistory).filter(StudentHistory.student_id == student.id).all()
+    assert len(history) == 1
+    assert history[0].est_diplome is True
+    assert db.get(Student, student.id).statut == StudentStatus.ANCIEN
+
+def test_graduate_cohort(db) -> Any:
+    students = create_random_students(db, count=3)
+    _activate(db, students)
+    create_enrollment_for_student(db, students[0].id, niveau="L3")
+    create_enrollment_for_student(db, students[1].id, niveau="L3")
+    create_enrollment_for_student(db, students[2].id, niveau="L3", est_admis=False)
+    
+    diplomes = enrollments.graduate_cohort(db, "2023-2024", "L3", 1, "Licence")
+    assert diplomes == 2
+    
+    db.expire_all()
+    assert db.get(Student, students[0].id).statut == StudentStatus.ANCIEN
+    assert db.get(Student, students[2].id).statut == StudentStatus.ACTIF
+    assert db.query(StudentHistory).filter(
+        StudentHistory.student_id.in_([s.id for s in students])
+    ).count() == 2
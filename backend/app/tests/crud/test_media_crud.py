@@ -1,15 +1,28 @@
 from typing import Any
+import hashlib
+import io
+import os
+import time
 import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from cryptography.fernet import Fernet
 
 from fastapi import BackgroundTasks
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.crud.public.media import add_media, delete_media, get_media, read_media, update_principal_photo
+from app.crud.public.media import add_media, delete_media, get_media, read_media, read_media_by_owners, update_principal_photo
 from app.tests.utils.teachers import create_random_teacher
 from app.tests.utils.students import create_random_student
-from app.models.media import Media
-from app.tests.utils.students import create_random_student
+from app.models.media import Media, MediaBlob, MediaJob, MediaKeyRotation, MediaRendition
+from app.background_tasks.media_worker import run_pending_jobs
+from app.background_tasks.key_rotation import rotate_keys
+from app.background_tasks.media_scrubber import run_scrub
+from app.crud.public.renditions import evict_renditions
+from app.core.settings import settings
+from app.encryption_services import encryption_service
 from app.tests.utils.media import check_read_media, create_fake_media, check_principal_photo, check_add_media
 from app.models.teachers import Teacher
 from app.models.students import Student
@@ -42,6 +55,183 @@ def test_add_media_student(db: Session, bgtasks: BackgroundTasks) -> None:
     
     check_add_media(db=db, entity=student_db, media=media, is_teacher=False)
     
+def test_add_media_single_pass(db: Session, bgtasks: BackgroundTasks) -> None:
+    """
+    Le checksum, la taille et le fichier chiffré sont produits à l'upload
+    """
+    file = create_fake_media()
+    content = file.file.getvalue()
+    student = create_random_student(db)
+    media = add_media(db=db, file_type="document", student_id=student.id, file=file, background_tasks=bgtasks)
+    
+    assert media.status == "processing"
+    # vérification, puis miniatures (image/png)
+    assert run_pending_jobs(db) == 2
+    db.refresh(media)
+    assert media.status == "processed"
+    assert media.mime_type == "image/png"
+    assert media.file_size == len(content)
+    assert media.checksum == hashlib.sha256(content).hexdigest()
+    assert encryption_service.decrypt_file(media.file_path, media.encryption_key_id) == content
+    
+def test_add_media_deduplicated(db: Session, bgtasks: BackgroundTasks) -> None:
+    """
+    Le même contenu envoyé deux fois n'est stocké qu'une fois,
+    le fichier est supprimé avec le dernier média qui l'utilise
+    """
+    student = create_random_student(db)
+    teacher = create_random_teacher(db)
+    media_s = add_media(db=db, file_type="document", student_id=student.id, file=create_fake_media(), background_tasks=bgtasks)
+    media_t = add_media(db=db, file_type="document", teacher_id=teacher.id, file=create_fake_media(), background_tasks=bgtasks)
+
+    assert media_s.file_path == media_t.file_path
+    assert not os.path.exists(encryption_service.create_storage_path(str(media_t.id), "document"))
+    blob = db.get(MediaBlob, media_s.checksum)
+    assert blob.ref_count == 2
+
+    assert delete_media(db=db, media_id=media_s.id, student_id=student.id)
+    db.refresh(blob)
+    assert blob.ref_count == 1
+    assert os.path.exists(media_t.file_path)
+
+    assert delete_media(db=db, media_id=media_t.id, teacher_id=teacher.id)
+    assert db.get(MediaBlob, media_s.checksum) is None
+    assert not os.path.exists(media_t.file_path)
+
+def test_rotate_media_keys(db: Session, bgtasks: BackgroundTasks) -> None:
+    """
+    Tous les fichiers (blob partagé, ancien fichier Fernet) passent sur la nouvelle clé,
+    les anciens fichiers sont supprimés
+    """
+    student = create_random_student(db)
+    shared = [
+        add_media(db=db, file_type="document", student_id=student.id, file=create_fake_media(), background_tasks=bgtasks)
+        for _ in range(2)
+    ]
+    legacy_path = encryption_service.create_storage_path(str(uuid.uuid4()), "document")
+    os.makedirs(os.path.dirname(legacy_path), exist_ok=True)
+    with open(legacy_path, "wb") as f:
+        f.write(Fernet(encryption_service.key_ring.get("default_key_v1", create=True)).encrypt(b"ancien"))
+    legacy = Media(file_path=legacy_path, file_type="document", encryption_key_id="default_key_v1",
+                   storage_location="local", student_id=student.id)
+    db.add(legacy)
+    db.commit()
+    old_paths = {shared[0].file_path, legacy_path}
+
+    rotation = rotate_keys(db, target_key_id="test_rotation_key", workers=2, batch_size=1)
+    assert rotation.status == "done"
+    assert (rotation.reencrypted, rotation.failed) == (2, 0)
+
+    for media in shared + [legacy]:
+        db.refresh(media)
+        assert media.encryption_key_id == "test_rotation_key"
+    assert shared[0].file_path == shared[1].file_path == db.get(MediaBlob, shared[0].checksum).file_path
+    assert encryption_service.decrypt_file(legacy.file_path, legacy.encryption_key_id) == b"ancien"
+    assert encryption_service.decrypt_file(shared[0].file_path, "test_rotation_key") == create_fake_media().file.getvalue()
+    assert not any(os.path.exists(path) for path in old_paths)
+
+    db.query(MediaKeyRotation).delete()
+    db.commit()
+    os.remove(encryption_service.key_ring.key_file("test_rotation_key"))
+
+def test_scrub_media(db: Session, bgtasks: BackgroundTasks, tmp_path) -> None:
+    """
+    Le scrubber supprime les fichiers orphelins anciens, relance les médias bloqués
+    et repère les fichiers corrompus
+    """
+    student = create_random_student(db)
+    media = add_media(db=db, file_type="document", student_id=student.id, file=create_fake_media(), background_tasks=bgtasks)
+    run_pending_jobs(db)
+
+    old = time.time() - 2 * 86400
+    orphan_path = encryption_service.create_storage_path(str(uuid.uuid4()), "document")
+    recent_orphan_path = encryption_service.create_storage_path(str(uuid.uuid4()), "document")
+    temp_path = tmp_path / "upload.tmp"
+    for path in (orphan_path, recent_orphan_path, temp_path):
+        with open(path, "wb") as f:
+            f.write(b"x")
+    os.utime(orphan_path, (old, old))
+    os.utime(temp_path, (old, old))
+    stuck = Media(file_path=media.file_path, file_type="document", status="processing", student_id=student.id,
+                  created_at=datetime.now() - timedelta(days=1))
+    db.add(stuck)
+    db.commit()
+
+    report = run_scrub(db, verify_sample=1.0, workers=2, temp_dir=str(tmp_path))
+    assert not os.path.exists(orphan_path)
+    assert os.path.exists(recent_orphan_path)
+    assert not temp_path.exists()
+    assert os.path.exists(media.file_path)
+    assert report["corrupted_files"] == 0
+    assert report["requeued_media"] == 1
+    assert db.query(MediaJob).filter(MediaJob.media_id == stuck.id, MediaJob.status == "pending").count() == 1
+
+    with open(media.file_path, "r+b") as f:
+        f.seek(-1, 2)
+        f.write(b"\x00")
+    report = run_scrub(db, verify_sample=1.0, workers=2, temp_dir=str(tmp_path))
+    assert report["corrupted_files"] == 1
+    db.refresh(media)
+    assert media.status == "error"
+    os.remove(recent_orphan_path)
+
+def test_media_job_retry_then_error(db: Session, bgtasks: BackgroundTasks) -> None:
+    """
+    Un fichier stocké corrompu: le job est replanifié, puis le média passe en erreur
+    """
+    student = create_random_student(db)
+    media = add_media(db=db, file_type="document", student_id=student.id, file=create_fake_media(), background_tasks=bgtasks)
+    with open(media.file_path, "r+b") as f:
+        f.seek(-1, 2)
+        f.write(b"\x00")
+    
+    assert run_pending_jobs(db) == 1
+    job = db.query(MediaJob).filter(MediaJob.media_id == media.id).one()
+    db.refresh(media)
+    assert job.status == "pending"
+    assert job.run_after > job.updated_at
+    assert media.status == "processing"
+    assert media.error_message
+    # aucun job prêt avant la fin de l'attente
+    assert run_pending_jobs(db) == 0
+    
+    job.attempts = job.max_attempts - 1
+    job.run_after = job.created_at
+    db.commit()
+    assert run_pending_jobs(db) == 1
+    db.refresh(job)
+    db.refresh(media)
+    assert job.status == "failed"
+    assert media.status == "error"
+
+def test_photo_renditions_and_eviction(db: Session, bgtasks: BackgroundTasks) -> None:
+    """
+    Les miniatures d'une photo sont générées par les workers, chiffrées,
+    puis supprimées par l'éviction quand le cache dépasse sa taille
+    """
+    Image = pytest.importorskip("PIL.Image")
+    image = io.BytesIO()
+    Image.new("RGB", (800, 600), "blue").save(image, format="PNG")
+    image.seek(0)
+    file = create_fake_media("photo.png")
+    file.file = image
+    student = create_random_student(db)
+
+    media = add_media(db=db, file_type="photo", student_id=student.id, file=file, background_tasks=bgtasks)
+    run_pending_jobs(db)
+
+    renditions = db.execute(
+        select(MediaRendition).where(MediaRendition.media_id == media.id).order_by(MediaRendition.size)
+    ).scalars().all()
+    assert [r.size for r in renditions] == settings.MEDIA_RENDITION_SIZES
+    thumbnail = Image.open(io.BytesIO(encryption_service.decrypt_file(renditions[-1].file_path)))
+    assert max(thumbnail.size) == settings.MEDIA_RENDITION_SIZES[-1]
+
+    file_paths = [r.file_path for r in renditions]
+    assert evict_renditions(db=db, max_bytes=0) == len(renditions)
+    assert not any(os.path.exists(path) for path in file_paths)
+    assert db.query(MediaRendition).count() == 0
+
 def test_add_media_with_no_teacher_student(db: Session, bgtasks: BackgroundTasks) -> None:
     """Test l'ajout d'un média sans enseignant ni étudiant."""
     file = create_fake_media()
@@ -143,6 +333,35 @@ def test_media_isolation_teacher_student(db: Session, bgtasks: BackgroundTasks)
     assert media_student.id in student_media_ids
     assert media_student.id not in teacher_media_ids
 
+def test_read_media_by_owners(db: Session, bgtasks: BackgroundTasks) -> None:
+    """Test la lecture groupée des médias de plusieurs propriétaires."""
+    students = [create_random_student(db) for _ in range(2)]
+    teacher = create_random_teacher(db)
+    without_media = create_random_student(db)
+    
+    principal = add_media(db=db, file_type="photo", student_id=students[0].id, file=create_fake_media(), background_tasks=bgtasks, is_principal=True)
+    document = add_media(db=db, file_type="document", student_id=students[0].id, file=create_fake_media(), background_tasks=bgtasks)
+    other = add_media(db=db, file_type="photo", student_id=students[1].id, file=create_fake_media(), background_tasks=bgtasks)
+    teacher_media = add_media(db=db, file_type="photo", teacher_id=teacher.id, file=create_fake_media(), background_tasks=bgtasks, is_principal=True)
+    
+    r = read_media_by_owners(
+        db=db,
+        student_ids=[students[0].id, students[1].id, without_media.id],
+        teacher_ids=[teacher.id]
+    )
+    assert {m.id for m in r["students"][students[0].id]} == {principal.id, document.id}
+    assert [m.id for m in r["students"][students[1].id]] == [other.id]
+    assert r["students"][without_media.id] == []
+    assert [m.id for m in r["teachers"][teacher.id]] == [teacher_media.id]
+    
+    # photos principales seulement
+    r = read_media_by_owners(db=db, student_ids=[students[0].id, students[1].id], teacher_ids=[teacher.id], principal_only=True)
+    assert [m.id for m in r["students"][students[0].id]] == [principal.id]
+    assert r["students"][students[1].id] == []
+    assert [m.id for m in r["teachers"][teacher.id]] == [teacher_media.id]
+    
+    assert read_media_by_owners(db=db) == {"students": {}, "teachers": {}}
+
 def test_multiple_file_types(db: Session, bgtasks: BackgroundTasks) -> None:
     """Test l'ajout de différents types de fichiers."""
     teacher = create_random_teacher(db)
@@ -210,8 +429,10 @@ def test_update_princ_photo_student(db: Session, bgtasks: BackgroundTasks) -> An
     # vérifier que l'ancienne photo n'est plus la principale
     assert principal_photo.is_principal is False
     
-    # s'assurer que les deux fichiers ont des chemins différents
-    assert principal_photo.file_path != updated_photo.file_path
+    # même contenu: un nouveau média qui partage le fichier de l'ancien
+    assert principal_photo.id != updated_photo.id
+    assert principal_photo.file_path == updated_photo.file_path
+    assert db.get(MediaBlob, updated_photo.checksum).ref_count == 2
     
     # vérifier que la photo à bien été mise à jour
     query = select(Student).where(Student.id_etudiant==student.id_etudiant)
@@ -234,14 +455,32 @@ def test_update_principal_photo_teacher(db: Session, bgtasks: BackgroundTasks) -
     # vérifier que l'ancienne photo n'est plus la principale
     assert principal_photo.is_principal is False
     
-    # s'assurer que les deux fichiers ont des chemins différents
-    assert principal_photo.file_path != updated_photo.file_path
+    # même contenu: un nouveau média qui partage le fichier de l'ancien
+    assert principal_photo.id != updated_photo.id
+    assert principal_photo.file_path == updated_photo.file_path
+    assert db.get(MediaBlob, updated_photo.checksum).ref_count == 2
     
     # vérifier que la photo à bien été mise à jour
     query = select(Teacher).where(Teacher.id==teacher.id)
     teacher_db = db.execute(query).scalar_one_or_none()
     check_principal_photo(db=db, entity=teacher_db, principal_media=updated_photo, is_teacher=True) 
 
+def test_delete_media_same_file_twice(db: Session, bgtasks: BackgroundTasks) -> Any:
+    """
+    La même photo envoyée deux fois: la suppression par id ne touche que le média demandé
+    """
+    student = create_random_student(db)
+    old_photo = add_media(db=db, student_id=student.id, file=create_fake_media(), file_type="photo", background_tasks=bgtasks)
+    principal = update_principal_photo(db=db, student_id=student.id, new_file=create_fake_media(), background_tasks=bgtasks)
+    assert old_photo.file_path == principal.file_path
+    
+    assert delete_media(db=db, media_id=old_photo.id, student_id=student.id)
+    assert db.get(Media, old_photo.id) is None
+    db.refresh(principal)
+    assert principal.is_principal
+    assert db.get(MediaBlob, principal.checksum).ref_count == 1
+    assert os.path.exists(principal.file_path)
+
 def test_update_principal_photo_no_new_file(db: Session, bgtasks: BackgroundTasks) -> Any:
     teacher = create_random_teacher(db)
     file = create_fake_media("photo1.png")
@@ -263,8 +502,8 @@ def test_delete_media_student(db: Session, bgtasks: BackgroundTasks) -> Any:
     media_teacher = add_media(db=db, file_type="photo", teacher_id=teacher.id, file=file_teacher, background_tasks=bgtasks)
     media_student = add_media(db=db, file_type="photo", student_id=student.id, file=file_student, background_tasks=bgtasks)
 
-    delete_media_t = delete_media(db=db, file_path=media_teacher.file_path, teacher_id=teacher.id)
-    delete_media_s = delete_media(db=db, file_path=media_student.file_path, student_id=student.id)
+    delete_media_t = delete_media(db=db, media_id=media_teacher.id, teacher_id=teacher.id)
+    delete_media_s = delete_media(db=db, media_id=media_student.id, student_id=student.id)
     
     assert delete_media_t
     assert delete_media_s
@@ -281,8 +520,8 @@ def test_delete_media_wrong_file_path(db: Session, bgtasks: BackgroundTasks) ->
     teacher = create_random_teacher(db)
     student = create_random_student(db)
     
-    delete_media_t = delete_media(db=db, file_path="fake/path.photo", teacher_id=teacher.id)
-    delete_media_s = delete_media(db=db, file_path="fake/path.photo", student_id=student.id)
+    delete_media_t = delete_media(db=db, media_id=uuid.uuid4(), teacher_id=teacher.id)
+    delete_media_s = delete_media(db=db, media_id=uuid.uuid4(), student_id=student.id)
     
     assert delete_media_s is None
     assert delete_media_t is None
@@ -299,8 +538,8 @@ def test_get_media(db: Session, bgtasks: BackgroundTasks) -> Any:
     
     print(media_teacher.file_path)
     
-    media_t = get_media(db=db, file_path=media_teacher.file_path, teacher_id=teacher.id)
-    media_s = get_media(db=db, file_path=media_student.file_path, student_id=student.id)
+    media_t = get_media(db=db, media_id=media_teacher.id, teacher_id=teacher.id)
+    media_s = get_media(db=db, media_id=media_student.id, student_id=student.id)
 
     assert media_t
     assert isinstance(media_t, Media)
@@ -311,8 +550,12 @@ def test_get_media_wrong_file_path(db: Session, bgtasks: BackgroundTasks) -> Any
     teacher = create_random_teacher(db)
     student = create_random_student(db)
 
-    media_t = get_media(db=db, file_path="fake/photo.png", teacher_id=teacher.id)
-    media_s = get_media(db=db, file_path="fake/photo.png", student_id=student.id)
+    media_t = get_media(db=db, media_id=uuid.uuid4(), teacher_id=teacher.id)
+    media_s = get_media(db=db, media_id=uuid.uuid4(), student_id=student.id)
+    
+    # un média d'un autre propriétaire n'est pas retourné
+    media = add_media(db=db, file_type="photo", student_id=student.id, file=create_fake_media(), background_tasks=bgtasks)
+    assert get_media(db=db, media_id=media.id, teacher_id=teacher.id) is None
     
     assert media_t is None
     assert media_s is None
@@ -1,4 +1,7 @@
 from typing import Any
+from sqlalchemy import event
+from app.models.media import Media
+from app.models.students import Student, StudentStatus
 from app.schemas.students import StudentCreate, StudentResponse, StudentsResponse
 from app.crud.admin.services_inscription import new_students
 from app.tests.utils.students import (
@@ -6,6 +9,7 @@ from app.tests.utils.students import (
     random_user_data, 
     create_random_students
 )
+from app.tests.utils.utils import random_lower_string, random_email, random_phone
     
 def test_create_student(db) -> Any:
     student = create_random_student(db)
@@ -32,4 +36,73 @@ def test_get_student(db) -> Any:
 def test_list_student(db) -> Any:
     create_random_students(db)
     response = new_students.students_list(db=db, skip=1, limit=100)
-    assert isinstance(response, StudentsResponse)
\ No newline at end of file
+    assert isinstance(response, StudentsResponse)
+def test_list_student_keyset_pagination(db) -> Any:
+    create_random_students(db, count=5)
+    first = new_students.students_list(db=db, skip=0, limit=2)
+    assert first.next_cursor is not None
+    second = new_students.students_list(db=db, skip=0, limit=2, cursor=first.next_cursor)
+    first_ids = {s.id for s in first.data}
+    second_ids = {s.id for s in second.data}
+    assert len(second_ids) == 2
+    assert not first_ids & second_ids
+
+def test_export_students(db) -> Any:
+    students = create_random_students(db)
+    rows = list(new_students.export_students(db=db, statut=StudentStatus.VALIDE, chunk_size=1))
+    exported = {row.id for row in rows}
+    assert {student.id for student in students} <= exported
+    assert all(row.statut == StudentStatus.VALIDE for row in rows)
+
+def test_import_students(db) -> Any:
+    existing = create_random_student(db)
+    row = {
+        "nom": random_lower_string(),
+        "prenom": random_lower_string(),
+        "sexe": "Autre",
+        "date_naissance": "2001-02-03",
+        "lieu_naissance": random_lower_string(),
+        "nationalite": random_lower_string(),
+        "email": random_email(),
+        "telephone": random_phone(),
+        "nom_du_pere": random_lower_string(),
+        "nom_de_la_mere": random_lower_string(),
+        "addresse_du_pere": random_lower_string(),
+        "addresse_de_la_mere": random_lower_string(),
+        "nom_parent_tuteur": random_lower_string(),
+        "telephone_parent_tuteur": random_phone(),
+        "adresse_parent_tuteur": random_lower_string(),
+    }
+    rows = [
+        (2, row),
+        (3, dict(row)),
+        (4, {**row, "email": existing.email}),
+        (5, {**row, "email": random_email(), "sexe": "?"}),
+    ]
+    report = new_students.import_students(db=db, rows=rows, chunk_size=2)
+    assert report["nombre_lignes"] == 4
+    assert report["nombre_importes"] == 1
+    assert [erreur["ligne"] for erreur in report["erreurs"]] == [3, 4, 5]
+    student = db.query(Student).filter(Student.email == row["email"]).first()
+    assert student.id_etudiant.startswith("STD")
+
+def test_list_student_constant_queries(db) -> Any:
+    for student in create_random_students(db, count=4):
+        db.add(Media(student_id=student.id, file_type="photo"))
+    db.commit()
+    db.expire_all()
+
+    statements = []
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(db.get_bind(), "before_cursor_execute", count_statement)
+    try:
+        counts = []
+        for limit in (1, 4):
+            statements.clear()
+            response = new_students.students_list(db=db, skip=0, limit=limit)
+            response.model_dump()
+            counts.append(len(statements))
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", count_statement)
+    assert counts[0] == counts[1] == 2
@@ -0,0 +1,25 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.crud import tokens
+from app.models.token import Token
+from app.tests.utils.users import create_random_user
+
+
+def test_purge_expired_tokens(db: Session):
+    user = create_random_user(db)
+    valid = tokens.create_refresh_token(db=db, user_id=user.id)
+    expired = tokens.create_refresh_token(db=db, user_id=user.id)
+    db.query(Token).filter(Token.token == tokens.hash_token(expired)).update(
+        {Token.expires_at: datetime.now() - timedelta(minutes=1)}
+    )
+    db.commit()
+    
+    assert tokens.purge_expired_tokens(db=db, batch_size=1) >= 1
+    assert db.query(Token).filter(Token.token == tokens.hash_token(expired)).first() is None
+    assert db.query(Token).filter(Token.token == tokens.hash_token(valid)).first() is not None
+    
+    # le token n'est pas gardé en clair
+    assert db.query(Token).filter(Token.token == valid).first() is None
+    assert tokens.rotate_refresh_token(db=db, refresh_token=expired) is None
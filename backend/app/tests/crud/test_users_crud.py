@@ -1,4 +1,6 @@
+import bcrypt
 from fastapi.testclient import TestClient
+from passlib.context import CryptContext
 
 from sqlalchemy.orm import Session
 
@@ -7,6 +9,7 @@ from app.tests.utils.users import create_random_user
 from app.schemas.users import UserCreate, UserUpdate, UserPublic
 from app.crud import users
 from app.models.users import User
+from app.core.security import pwd_context
 
 
 def test_create_user(db: Session):
@@ -54,4 +57,31 @@ def test_not_authenticate_user(db: Session):
     username = random_lower_string()
     password = random_lower_string()
     response = users.authenticate_user(db=db, username=username, password=password)
-    assert response is None
\ No newline at end of file
+    assert response is None
+def test_authenticate_user_rehash(db: Session):
+    """
+    Un ancien hachage (bcrypt, coût argon2 différent) est remplacé à la connexion
+    """
+    legacy_hashes = [
+        bcrypt.hashpw(b"ancienmotdepasse", bcrypt.gensalt(rounds=4)).decode(),
+        CryptContext(schemes=["argon2"], argon2__rounds=1, argon2__memory_cost=8192, argon2__parallelism=1).hash("ancienmotdepasse"),
+    ]
+    for legacy_hash in legacy_hashes:
+        username = random_lower_string()
+        user = User(username=username, hashed_password=legacy_hash, is_active=True, is_superuser=False)
+        db.add(user)
+        db.commit()
+        
+        assert users.authenticate_user(db=db, username=username, password="mauvais") is None
+        db.refresh(user)
+        assert user.hashed_password == legacy_hash
+        
+        assert users.authenticate_user(db=db, username=username, password="ancienmotdepasse")
+        db.refresh(user)
+        assert user.hashed_password != legacy_hash
+        assert not pwd_context.needs_update(user.hashed_password)
+        assert users.authenticate_user(db=db, username=username, password="ancienmotdepasse")
+    
+    report = users.password_hash_report(db=db)
+    assert all(not group["needs_update"] for group in report if group["scheme"] == "argon2id")
+    assert sum(group["users"] for group in report) == db.query(User).count()
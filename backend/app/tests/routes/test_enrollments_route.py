@@ -0,0 +1,273 @@
+from typing import Any
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models.enrollments import Enrollment, EnrollmentStatistic
+from app.models.students import Student, StudentStatus
+from app.models.student_history import StudentHistory
+from app.core.settings import settings
+from app.crud.admin.services_inscription.enrollment_statistics import rebuild_enrollment_statistics
+from app.tests.utils.students import create_random_students
+from app.tests.utils.enrollments import create_enrollment_for_student
+
+
+# -------- CLÔTURE EN MASSE --------
+def test_cloturer_en_masse(client: TestClient, db: Session, superuser_token_headers: dict[str, str]) -> Any:
+    students = create_random_students(db, count=2)
+    created = [create_enrollment_for_student(db, student.id, est_admis=None) for student in students]
+
+    response = client.post(
+        f"{settings.API_V1_STR}/students/enrollments/cloturer",
+        json=[
+            {"enrollment_id": created[0].id, "est_admis": True, "moyenne_annuelle": 13.5, "credits_obtenus": 60},
+            {"enrollment_id": created[1].id, "est_admis": False},
+            {"enrollment_id": created[1].id, "est_admis": True},
+            {"enrollment_id": -1, "est_admis": True},
+        ],
+        headers=superuser_token_headers
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert report["nombre_clotures"] == 2
+    assert [(erreur["ligne"], erreur["enrollment_id"]) for erreur in report["erreurs"]] == [
+        (3, created[1].id), (4, -1)
+    ]
+
+    db.expire_all()
+    assert db.get(Enrollment, created[0].id).statut == "validée"
+    assert db.get(Enrollment, created[0].id).moyenne_annuelle == 13.5
+    assert db.get(Enrollment, created[1].id).statut == "échouée"
+
+def test_cloturer_en_masse_csv(client: TestClient, db: Session, superuser_token_headers: dict[str, str]) -> Any:
+    students = create_random_students(db, count=3)
+    created = [create_enrollment_for_student(db, student.id, est_admis=None) for student in students]
+    content = (
+        "enrollment_id;est_admis;moyenne;credits\n"
+        f"{created[0].id};oui;12,5;60\n"
+        f"{created[1].id};peut-être;10;30\n"
+        f"{created[2].id};non;8;\n"
+        "-1;oui;;\n"
+    )
+
+    response = client.post(
+        f"{settings.API_V1_STR}/students/enrollments/cloturer/csv",
+        files={"file": ("resultats.csv", content.encode("utf-8"), "text/csv")},
+        headers=superuser_token_headers
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert report["nombre_clotures"] == 2
+    # numéros de ligne du fichier (en-tête en ligne 1), validation et clôture mélangées
+    assert [(erreur["ligne"], erreur["enrollment_id"]) for erreur in report["erreurs"]] == [
+        (3, created[1].id), (5, -1)
+    ]
+    assert report["erreurs"][0]["erreur"].startswith("est_admis")
+
+    db.expire_all()
+    first = db.get(Enrollment, created[0].id)
+    assert first.statut == "validée"
+    assert first.moyenne_annuelle == 12.5
+    assert db.get(Enrollment, created[1].id).statut == "en_cours"
+    assert db.get(Enrollment, created[2].id).statut == "échouée"
+
+def test_cloturer_en_masse_sans_auth(client: TestClient) -> Any:
+    response = client.post(f"{settings.API_V1_STR}/students/enrollments/cloturer", json=[])
+    assert response.status_code == 401
+
+# -------- STATISTIQUES --------
+def test_statistiques_inscriptions(client: TestClient, db: Session, superuser_token_headers: dict[str, str]) -> Any:
+    students = create_random_students(db, count=4)
+    create_enrollment_for_student(db, students[0].id, niveau="L1")
+    create_enrollment_for_student(db, students[1].id, niveau="L1", est_admis=False)
+    create_enrollment_for_student(db, students[2].id, niveau="L2")
+    create_enrollment_for_student(db, students[3].id, annee_academique="2024-2025", niveau="L3")
+    rebuild_enrollment_statistics(db)
+
+    response = client.get(
+        f"{settings.API_V1_STR}/students/inscriptions/statistiques",
+        headers=superuser_token_headers
+    )
+    assert response.status_code == 200
+    overview = response.json()
+    assert set(overview) == {"2023-2024", "2024-2025"}
+    assert overview["2023-2024"]["totaux"]["total"] == 3
+    assert overview["2023-2024"]["totaux"]["admis"] == 2
+    assert overview["2023-2024"]["totaux"]["taux_reussite"] == 66.67
+    assert overview["2023-2024"]["par_niveau"]["L1"]["total"] == 2
+    assert overview["2023-2024"]["par_niveau"]["L1"]["admis"] == 1
+    assert overview["2023-2024"]["par_niveau"]["L2"]["total"] == 1
+    assert overview["2024-2025"]["par_niveau"] == {"L3": overview["2024-2025"]["totaux"]}
+
+    response = client.get(
+        f"{settings.API_V1_STR}/students/inscriptions/statistiques",
+        params={"annee_academique": "2024-2025"},
+        headers=superuser_token_headers
+    )
+    assert response.status_code == 200
+    assert list(response.json()) == ["2024-2025"]
+
+# -------- DIPLÔMES --------
+def _activer(db: Session, students) -> None:
+    for student in students:
+        db.get(Student, student.id).statut = StudentStatus.ACTIF
+    db.commit()
+
+def _historique(db: Session, student_id) -> list:
+    return db.query(StudentHistory).filter(StudentHistory.student_id == student_id).all()
+
+def test_diplomer_etudiant(client: TestClient, db: Session, superuser_token_headers: dict[str, str]) -> Any:
+    student = create_random_students(db, count=1)[0]
+    _activer(db, [student])
+    create_enrollment_for_student(db, student.id, niveau="L3")
+
+    response = client.post(
+        f"{settings.API_V1_STR}/students/{student.id}/diplomer",
+        json={"type_diplome": "Licence", "mention": "Bien"},
+        headers=superuser_token_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["student"]["type_diplome"] == "Licence"
+
+    db.expire_all()
+    history = _historique(db, student.id)
+    assert len(history) == 1
+    assert history[0].est_diplome is True
+    assert db.get(Student, student.id).statut == StudentStatus.ANCIEN
+
+    # déjà diplômé: n'est plus actif
+    response = client.post(
+        f"{settings.API_V1_STR}/students/{student.id}/diplomer",
+        json={"type_diplome": "Licence"},
+        headers=superuser_token_headers
+    )
+    assert response.status_code == 400
+    assert len(_historique(db, student.id)) == 1
+
+def test_diplomer_etudiant_non_actif(client: TestClient, db: Session, superuser_token_headers: dict[str, str]) -> Any:
+    student = create_random_students(db, count=1)[0]
+    create_enrollment_for_student(db, student.id, niveau="L3")
+
+    response = client.post(
+        f"{settings.API_V1_STR}/students/{student.id}/diplomer",
+        json={"type_diplome": "Licence"},
+        headers=superuser_token_headers
+    )
+    assert response.status_code == 400
+    assert _historique(db, student.id) == []
+
+def test_diplomer_promotion(client: TestClient, db: Session, superuser_token_headers: dict[str, str]) -> Any:
+    students = create_random_students(db, count=4)
+    _activer(db, students[:3])
+    for student in students[:2]:
+        create_enrollment_for_student(db, student.id, niveau="L3")
+    create_enrollment_for_student(db, students[2].id, niveau="L3", est_admis=False)
+    # pas actif: ignoré
+    create_enrollment_for_student(db, students[3].id, niveau="L3")
+
+    data = {"annee_academique": "2023-2024", "niveau": "L3", "id_parcours": 1, "type_diplome": "Licence"}
+    response = client.post(
+        f"{settings.API_V1_STR}/students/diplomes/promotion",
+        json=data,
+        headers=superuser_token_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["nombre_diplomes"] == 2
+
+    # une deuxième fois: plus aucun étudiant actif à diplômer
+    response = client.post(
+        f"{settings.API_V1_STR}/students/diplomes/promotion",
+        json=data,
+        headers=superuser_token_headers
+    )
+    assert response.json()["nombre_diplomes"] == 0
+
+    db.expire_all()
+    assert [len(_historique(db, student.id)) for student in students] == [1, 1, 0, 0]
+    assert all(history.est_diplome for student in students[:2] for history in _historique(db, student.id))
+    assert [db.get(Student, student.id).statut for student in students[:3]] == [
+        StudentStatus.ANCIEN, StudentStatus.ANCIEN, StudentStatus.ACTIF
+    ]
+
+# -------- RECALCUL DES STATISTIQUES --------
+def test_recalculer_statistiques(client: TestClient, db: Session, superuser_token_headers: dict[str, str]) -> Any:
+    students = create_random_students(db, count=3)
+    create_enrollment_for_student(db, students[0].id, niveau="L1")
+    create_enrollment_for_student(db, students[1].id, niveau="L1", est_admis=False)
+    create_enrollment_for_student(db, students[2].id, niveau="L2")
+    # compteur faux, à remplacer
+    db.add(EnrollmentStatistic(annee_academique="2023-2024", niveau="L1", id_departement=1, statut="en_cours", nombre=40, admis=40))
+    db.commit()
+
+    response = client.post(
+        f"{settings.API_V1_STR}/students/inscriptions/statistiques/recalculer",
+        headers=superuser_token_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["message"] == "Statistiques recalculées (2 groupes)"
+
+    db.expire_all()
+    counters = sorted(
+        (s.niveau, s.statut, s.nombre, s.admis) for s in db.query(EnrollmentStatistic).all()
+    )
+    assert counters == [("L1", "en_cours", 2, 1), ("L2", "en_cours", 1, 1)]
+
+def test_recalculer_statistiques_admin_seulement(client: TestClient, db: Session, normal_user_token_headers: dict[str, str]) -> Any:
+    db.add(EnrollmentStatistic(annee_academique="2023-2024", niveau="L1", id_departement=1, statut="en_cours", nombre=40, admis=40))
+    db.commit()
+    url = f"{settings.API_V1_STR}/students/inscriptions/statistiques/recalculer"
+
+    assert client.post(url).status_code == 401
+    assert client.post(url, headers=normal_user_token_headers).status_code == 403
+    db.expire_all()
+    assert [s.nombre for s in db.query(EnrollmentStatistic).all()] == [40]
+
+# -------- INSCRIPTION MASSIVE --------
+def test_inscription_massive(client: TestClient, db: Session, superuser_token_headers: dict[str, str]) -> Any:
+    students = create_random_students(db, count=4)
+    for student in students[:3]:
+        create_enrollment_for_student(db, student.id)
+    create_enrollment_for_student(db, students[3].id, est_admis=False)
+    # déjà inscrit pour la nouvelle année
+    create_enrollment_for_student(db, students[0].id, annee_academique="2024-2025", niveau="L2")
+
+    data = {"annee_academique": "2024-2025", "niveau_source": "L1", "niveau_destination": "L2"}
+    response = client.post(
+        f"{settings.API_V1_STR}/students/inscriptions-massives",
+        json=data,
+        headers=superuser_token_headers
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["nombre_inscriptions"] == 2
+    assert result["nombre_ignores"] == 1
+
+    # relancée: tous les admis sont déjà inscrits
+    response = client.post(
+        f"{settings.API_V1_STR}/students/inscriptions-massives",
+        json=data,
+        headers=superuser_token_headers
+    )
+    assert response.json()["nombre_inscriptions"] == 0
+    assert response.json()["nombre_ignores"] == 3
+
+    db.expire_all()
+    inscrits = {
+        e.student_id for e in db.query(Enrollment).filter(Enrollment.annee_academique == "2024-2025").all()
+    }
+    assert inscrits == {student.id for student in students[:3]}
+
+def test_cloturer_en_masse_csv_encodage_inconnu(client: TestClient, db: Session, superuser_token_headers: dict[str, str]) -> Any:
+    student = create_random_students(db, count=1)[0]
+    enrollment = create_enrollment_for_student(db, student.id, est_admis=None)
+    # 0x81 n'est ni de l'UTF-8 valide ni un caractère Windows-1252
+    content = f"enrollment_id;est_admis;commentaire\n{enrollment.id};oui;\x81\n".encode("latin-1")
+
+    response = client.post(
+        f"{settings.API_V1_STR}/students/enrollments/cloturer/csv",
+        files={"file": ("resultats.csv", content, "text/csv")},
+        headers=superuser_token_headers
+    )
+    assert response.status_code == 400
+    db.expire_all()
+    assert db.get(Enrollment, enrollment.id).statut == "en_cours"
@@ -0,0 +1,43 @@
+from fastapi.testclient import TestClient
+
+from app.core.settings import settings
+
+
+def login(client: TestClient) -> dict:
+    r = client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": settings.FIRST_SUPERUSER, "password": settings.FIRST_SUPERUSER_PASSWORD}
+    )
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def refresh(client: TestClient, refresh_token: str):
+    return client.post(f"{settings.API_V1_STR}/login/refresh-token", json={"refresh_token": refresh_token})
+
+
+def test_refresh_token_rotation(client: TestClient) -> None:
+    tokens = login(client)
+    assert tokens["refresh_token"]
+    
+    r = refresh(client, tokens["refresh_token"])
+    assert r.status_code == 200, r.text
+    new_tokens = r.json()
+    assert new_tokens["refresh_token"] != tokens["refresh_token"]
+    r = client.get(
+        f"{settings.API_V1_STR}/users/me",
+        headers={"Authorization": f"Bearer {new_tokens['access_token']}"}
+    )
+    assert r.status_code == 200
+    
+    # un token déjà utilisé ferme toutes les sessions de l'utilisateur
+    assert refresh(client, tokens["refresh_token"]).status_code == 401
+    assert refresh(client, new_tokens["refresh_token"]).status_code == 401
+
+
+def test_logout(client: TestClient) -> None:
+    tokens = login(client)
+    r = client.post(f"{settings.API_V1_STR}/logout", json={"refresh_token": tokens["refresh_token"]})
+    assert r.status_code == 200
+    assert refresh(client, tokens["refresh_token"]).status_code == 401
+    assert refresh(client, "token-inconnu").status_code == 401
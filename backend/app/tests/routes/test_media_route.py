@@ -1,3 +1,5 @@
+import uuid
+import hashlib
 from typing import Any
 from sqlalchemy.orm import Session
 from fastapi.testclient import TestClient
@@ -48,17 +50,97 @@ def test_delet_media(db: Session, client: TestClient, superuser_token_headers: d
         files=file_student
     )
     
-    file_path = str(r_student.json()["file_path"])
+    media_id = uuid.UUID(r_student.json()["id"])
     
-    media_db = db.query(Media).where(Media.file_path == file_path).first()
+    media_db = db.query(Media).where(Media.id == media_id).first()
     assert media_db is not None
     
     response =  client.delete(
-        f"{settings.API_V1_STR}/media/delete/?student_id={student.id}&file_path={file_path}",
+        f"{settings.API_V1_STR}/media/{media_id}",
         headers=superuser_token_headers
     )
 
     assert response.status_code == 200
     
-    media_db = db.query(Media).where(Media.file_path == file_path).first()
-    assert media_db is None
\ No newline at end of file
+    db.expire_all()
+    media_db = db.query(Media).where(Media.id == media_id).first()
+    assert media_db is None
+    
+    response =  client.delete(
+        f"{settings.API_V1_STR}/media/{media_id}",
+        headers=superuser_token_headers
+    )
+    assert response.status_code == 404
+
+def test_read_medias_by_owners(db: Session, client: TestClient, superuser_token_headers: dict[str, str]) -> Any:
+    student = create_random_student(db)
+    teacher = create_random_teacher(db)
+    for owner in (f"student_id={student.id}", f"teacher_id={teacher.id}"):
+        r = client.post(
+            f"{settings.API_V1_STR}/media/photo/?{owner}",
+            headers=superuser_token_headers,
+            files=create_fake_media_route("photo.png")
+        )
+        assert r.status_code == 200, r.text
+    
+    r = client.get(
+        f"{settings.API_V1_STR}/media/?student_id={student.id}&teacher_id={teacher.id}",
+        headers=superuser_token_headers
+    )
+    assert r.status_code == 200, r.text
+    data = r.json()
+    assert len(data["students"][str(student.id)]) == 1
+    assert len(data["teachers"][str(teacher.id)]) == 1
+    
+    # aucune photo principale
+    r = client.get(
+        f"{settings.API_V1_STR}/media/?student_id={student.id}&principal_only=true",
+        headers=superuser_token_headers
+    )
+    assert r.json()["students"][str(student.id)] == []
+
+def test_download_media_range_and_etag(db: Session, client: TestClient, superuser_token_headers: dict[str, str]) -> Any:
+    student = create_random_student(db)
+    r = client.post(
+        f"{settings.API_V1_STR}/media/photo/?student_id={student.id}",
+        headers=superuser_token_headers,
+        files=create_fake_media_route("file_student.png")
+    )
+    media = r.json()
+    url = f"{settings.API_V1_STR}/media/{media['id']}"
+    content = b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR"
+
+    r = client.get(url, headers=superuser_token_headers)
+    assert r.status_code == 200
+    assert r.content == content
+    assert r.headers["etag"] == f'"{hashlib.sha256(content).hexdigest()}"'
+
+    r = client.get(url, headers={**superuser_token_headers, "If-None-Match": r.headers["etag"]})
+    assert r.status_code == 304
+
+    r = client.get(url, headers={**superuser_token_headers, "Range": "bytes=2-5"})
+    assert r.status_code == 206
+    assert r.content == content[2:6]
+    assert r.headers["content-range"] == f"bytes 2-5/{len(content)}"
+
+    r = client.get(url, headers={**superuser_token_headers, "Range": "bytes=100-"})
+    assert r.status_code == 416
+
+def test_download_media_content_disposition(db: Session, client: TestClient, superuser_token_headers: dict[str, str]) -> Any:
+    student = create_random_student(db)
+    downloads = {}
+    for filename, content, content_type in [
+        ("photo.png", b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR", "image/png"),
+        ("page.html", b"<script>alert(1)</script>", "text/html"),
+    ]:
+        r = client.post(
+            f"{settings.API_V1_STR}/media/document/?student_id={student.id}",
+            headers=superuser_token_headers,
+            files={"file": (filename, content, content_type)}
+        )
+        downloads[content_type] = client.get(f"{settings.API_V1_STR}/media/{r.json()['id']}", headers=superuser_token_headers)
+
+    assert all(r.headers["x-content-type-options"] == "nosniff" for r in downloads.values())
+    assert downloads["image/png"].headers["content-disposition"] == "inline"
+    # un type déclaré par le client et non affichable n'est jamais rendu par le navigateur
+    assert downloads["text/html"].headers["content-disposition"] == "attachment"
@@ -1,12 +1,18 @@
+import csv
+import io
+import json
+import zipfile
 from typing import Any
 import uuid
+import pytest
 from fastapi import status
 
 from fastapi.testclient import TestClient
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.models.students import Student
+from app.models.students import Student, StudentStatus
+from app.crud.admin.services_inscription.new_students import EXPORT_COLUMNS
 from app.tests.utils.students import ( 
     random_user_data,
     create_random_student, 
@@ -164,4 +170,158 @@ def test_activer_etudiant(client: TestClient, superuser_token_headers: dict[str,
     student = db.execute(student_query).scalar_one()
     assert student
     assert student.statut == "actif"
-    
\ No newline at end of file
+    
+# -------- EXPORT --------
+def test_exporter_etudiants_csv(client: TestClient, db: Session, superuser_token_headers: dict[str, str]):
+    students = [create_random_student(db) for _ in range(3)]
+    response = client.get(
+        f"{settings.API_V1_STR}/students/export",
+        headers=superuser_token_headers
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    assert response.headers["content-disposition"] == 'attachment; filename="etudiants.csv"'
+
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == EXPORT_COLUMNS
+    exported = [dict(zip(rows[0], row)) for row in rows[1:]]
+    assert len(exported) == 3
+    assert {row["email"] for row in exported} == {student.email for student in students}
+    assert {row["id"] for row in exported} == {str(student.id) for student in students}
+
+def test_exporter_etudiants_ndjson(client: TestClient, db: Session, superuser_token_headers: dict[str, str]):
+    student = create_random_student(db)
+    desactive = create_random_student(db)
+    db.get(Student, desactive.id).statut = StudentStatus.DESACTIVE
+    db.commit()
+
+    response = client.get(
+        f"{settings.API_V1_STR}/students/export",
+        params={"format": "ndjson", "statut": StudentStatus.VALIDE.value},
+        headers=superuser_token_headers
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"] == 'attachment; filename="etudiants.ndjson"'
+
+    exported = [json.loads(line) for line in response.text.splitlines()]
+    assert len(exported) == 1
+    assert list(exported[0]) == EXPORT_COLUMNS
+    assert exported[0]["id"] == str(student.id)
+    assert exported[0]["email"] == student.email
+    assert exported[0]["statut"] == StudentStatus.VALIDE.value
+
+# -------- ANCIENS --------
+def _marquer_anciens(db: Session, students, annee_sortie: int = 2023) -> None:
+    for student in students:
+        student_db = db.get(Student, student.id)
+        student_db.est_ancien = True
+        student_db.statut = StudentStatus.ANCIEN
+        student_db.annee_sortie = annee_sortie
+    db.commit()
+
+def test_liste_anciens_pagination_curseur(client: TestClient, db: Session, superuser_token_headers: dict[str, str]):
+    anciens = [create_random_student(db) for _ in range(5)]
+    _marquer_anciens(db, anciens)
+    create_random_student(db)
+
+    ids = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(
+            f"{settings.API_V1_STR}/students/anciens",
+            params=params,
+            headers=superuser_token_headers
+        )
+        assert response.status_code == 200
+        page = response.json()
+        assert page["count"] == 5
+        assert len(page["data"]) <= 2
+        ids += [student["id"] for student in page["data"]]
+        pages += 1
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert pages == 3
+    assert len(ids) == len(set(ids))
+    assert set(ids) == {str(student.id) for student in anciens}
+
+def test_liste_anciens_curseur_invalide(client: TestClient, superuser_token_headers: dict[str, str]):
+    response = client.get(
+        f"{settings.API_V1_STR}/students/anciens",
+        params={"cursor": "pas-un-curseur"},
+        headers=superuser_token_headers
+    )
+    assert response.status_code == 400
+
+# -------- IMPORT --------
+def _ligne_import() -> dict:
+    data = random_user_data().model_dump(mode="json", exclude={"statut"})
+    return {key: value for key, value in data.items() if value is not None}
+
+def test_importer_etudiants_xlsx(client: TestClient, db: Session, superuser_token_headers: dict[str, str]):
+    openpyxl = pytest.importorskip("openpyxl")
+    lignes = [_ligne_import(), _ligne_import()]
+    columns = list(lignes[0])
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(columns)
+    for ligne in lignes:
+        sheet.append([ligne.get(column) for column in columns])
+    content = io.BytesIO()
+    workbook.save(content)
+
+    response = client.post(
+        f"{settings.API_V1_STR}/students/import",
+        files={"file": ("etudiants.xlsx", content.getvalue(), "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")},
+        headers=superuser_token_headers
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert report["nombre_lignes"] == 2
+    assert report["nombre_importes"] == 2
+    assert report["erreurs"] == []
+    emails = {ligne["email"] for ligne in lignes}
+    assert db.query(Student).filter(Student.email.in_(emails)).count() == 2
+
+def test_importer_etudiants_xlsx_corrompu(client: TestClient, superuser_token_headers: dict[str, str]):
+    pytest.importorskip("openpyxl")
+    for content in (b"pas un classeur", _zip_sans_classeur()):
+        response = client.post(
+            f"{settings.API_V1_STR}/students/import",
+            files={"file": ("etudiants.xlsx", content, "application/octet-stream")},
+            headers=superuser_token_headers
+        )
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Fichier XLSX illisible ou corrompu"
+
+def _zip_sans_classeur() -> bytes:
+    content = io.BytesIO()
+    with zipfile.ZipFile(content, "w") as archive:
+        archive.writestr("notes.txt", "rien")
+    return content.getvalue()
+
+def test_importer_etudiants_csv_cp1252(client: TestClient, db: Session, superuser_token_headers: dict[str, str]):
+    """
+    CSV enregistré par Excel en français: point-virgule et Windows-1252
+    """
+    ligne = {**_ligne_import(), "nom": "Hélène", "prenom": "Gaëlle", "lieu_naissance": "Besançon"}
+    content = io.StringIO()
+    writer = csv.DictWriter(content, fieldnames=list(ligne), delimiter=";")
+    writer.writeheader()
+    writer.writerow(ligne)
+
+    response = client.post(
+        f"{settings.API_V1_STR}/students/import",
+        files={"file": ("etudiants.csv", content.getvalue().encode("cp1252"), "text/csv")},
+        headers=superuser_token_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["nombre_importes"] == 1
+    student = db.query(Student).filter(Student.email == ligne["email"]).one()
+    assert (student.nom, student.prenom, student.lieu_naissance) == ("Hélène", "Gaëlle", "Besançon")
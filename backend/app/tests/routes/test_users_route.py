@@ -7,6 +7,8 @@ from app.schemas.users import UserCreate, UserUpdate, UpdatePassword
 from app.tests.utils.users import create_random_user, random_lower_string
 from app.core.settings import settings
 from app.core.security import verify_password
+from app.core.principal_cache import principal_cache
+from app.tests.utils.users import user_authentication_headers
 
 def test_retrieve_users(client, db, superuser_token_headers):
     """
@@ -152,6 +154,33 @@ def test_update_user(client, superuser_token_headers, db):
     assert user_db
     assert user_db.full_name ==  "updated_full_name"
 
+def test_current_user_cache_invalidated_on_update(client, superuser_token_headers, db):
+    username = random_lower_string()
+    password = random_lower_string()
+    user = users.create_user(db=db, user_data=UserCreate(username=username, password=password))
+    headers = user_authentication_headers(client=client, username=username, password=password, db=db)
+    
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 200
+    assert principal_cache.get(username)["id"] == str(user.id)
+    
+    # l'utilisateur du cache sert aussi aux routes qui le modifient
+    r = client.patch(f"{settings.API_V1_STR}/users/me", json={"full_name": "nom en cache"}, headers=headers)
+    assert r.status_code == 200
+    assert principal_cache.get(username) is None
+    
+    client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    r = client.patch(
+        f"{settings.API_V1_STR}/users/{user.id}",
+        json={"is_active": False},
+        headers=superuser_token_headers
+    )
+    assert r.status_code == 200
+    assert principal_cache.get(username) is None
+    
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 400
+
 def test_update_user_not_exists(client, superuser_token_headers):
     data = {
         "full_name": "updated_full_name"
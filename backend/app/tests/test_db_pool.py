@@ -0,0 +1,33 @@
+import pytest
+from sqlalchemy import exc, text
+
+from app.core.config import create_db_engine, pool_status
+
+
+def test_db_pool_metrics(tmp_path):
+    """
+    Les connexions prêtées, le temps pour les obtenir et les attentes trop longues sont comptés
+    """
+    engine = create_db_engine(f"sqlite:///{tmp_path}/pool.db", pool_size=1, max_overflow=0, pool_timeout=0.1)
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        status = pool_status(engine)
+        assert status["checked_out"] == 1
+        assert status["size"] == 1
+        
+        # pool plein: l'attente s'arrête après pool_timeout
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+    
+    status = pool_status(engine)
+    assert status["checked_out"] == 0
+    assert status["checkouts"] == 1
+    assert status["connects"] == 1
+    assert status["timeouts"] == 1
+    assert status["wait_ms_max"] >= status["wait_ms_avg"] > 0
+    
+    # dispose() recrée le pool, les compteurs continuent
+    engine.dispose()
+    with engine.connect():
+        pass
+    assert pool_status(engine)["checkouts"] == 2
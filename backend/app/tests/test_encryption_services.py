@@ -0,0 +1,119 @@
+import io
+import os
+
+import pytest
+from cryptography.fernet import Fernet
+
+from app.encryption_services import (
+    DecryptionError,
+    FileEncryptionService,
+    HEADER,
+    KeyRing,
+    MAGIC,
+    SEGMENT_SIZE,
+    TAG_SIZE,
+    StreamEncryptor,
+    decrypt_segments,
+)
+
+
+def encrypt_bytes(key: bytes, data: bytes, write_size: int = 1000) -> bytes:
+    destination = io.BytesIO()
+    encryptor = StreamEncryptor(key, destination)
+    for start in range(0, len(data), write_size):
+        encryptor.write(data[start:start + write_size])
+    encryptor.close()
+    return destination.getvalue()
+
+
+@pytest.mark.parametrize("size", [0, 1, SEGMENT_SIZE, 3 * SEGMENT_SIZE + 7])
+def test_stream_encryption_roundtrip(size: int):
+    """
+    Le chiffrement par segments redonne les données, y compris aux limites des segments
+    """
+    key = os.urandom(32)
+    data = os.urandom(size)
+    encrypted = encrypt_bytes(key, data)
+    assert b"".join(decrypt_segments(key, io.BytesIO(encrypted))) == data
+
+
+def test_stream_encryption_detects_truncation():
+    """
+    Un fichier tronqué à une limite de segment ou modifié est refusé
+    """
+    key = os.urandom(32)
+    encrypted = encrypt_bytes(key, os.urandom(2 * SEGMENT_SIZE + 10))
+
+    truncated = encrypted[:HEADER.size + 2 * (SEGMENT_SIZE + TAG_SIZE)]
+    with pytest.raises(DecryptionError):
+        b"".join(decrypt_segments(key, io.BytesIO(truncated)))
+
+    tampered = bytearray(encrypted)
+    tampered[-1] ^= 1
+    with pytest.raises(DecryptionError):
+        b"".join(decrypt_segments(key, io.BytesIO(bytes(tampered))))
+
+
+def test_stream_encryption_per_file_key():
+    """
+    Chaque fichier a son sel: deux chiffrements du même contenu avec la même clé
+    n'utilisent pas la même sous-clé
+    """
+    key = os.urandom(32)
+    data = os.urandom(100)
+    first, second = encrypt_bytes(key, data), encrypt_bytes(key, data)
+    assert first[:HEADER.size] != second[:HEADER.size]
+    assert first[HEADER.size:] != second[HEADER.size:]
+
+
+def test_decrypt_segments_unknown_version():
+    """
+    Un en-tête d'une autre version du format est refusé
+    """
+    key = os.urandom(32)
+    encrypted = bytearray(encrypt_bytes(key, os.urandom(100)))
+    encrypted[len(MAGIC)] = 1
+    with pytest.raises(DecryptionError):
+        b"".join(decrypt_segments(key, io.BytesIO(bytes(encrypted))))
+
+
+def test_decrypt_legacy_fernet_file(tmp_path, monkeypatch):
+    """
+    Les anciens fichiers Fernet restent lisibles grâce à leur encryption_key_id
+    """
+    monkeypatch.chdir(tmp_path)
+    service = FileEncryptionService(base_storage_path=str(tmp_path))
+    service.key_ring.get(create=True)
+    legacy_path = tmp_path / "legacy.enc"
+    legacy_path.write_bytes(Fernet(service.key_ring.get("default_key_v1", create=True)).encrypt(b"ancien"))
+
+    temp_path = tmp_path / "nouveau.txt"
+    temp_path.write_bytes(b"nouveau")
+    new_path = service.encrypt_and_move_file(str(temp_path), "media", "document")
+
+    assert service.decrypt_file(str(legacy_path), "default_key_v1") == b"ancien"
+    assert service.decrypt_file(new_path, service.get_key_id()) == b"nouveau"
+    # sans key id, le format est reconnu à l'en-tête
+    assert service.decrypt_file(str(legacy_path)) == b"ancien"
+    assert service.decrypt_file(new_path) == b"nouveau"
+
+
+def test_key_ring_creates_keys_only_on_request(tmp_path):
+    """
+    Un key id inconnu est refusé; une clé créée par un autre trousseau (autre processus)
+    n'est pas écrasée
+    """
+    key_ring = KeyRing(str(tmp_path), "courante")
+    with pytest.raises(DecryptionError):
+        key_ring.get()
+    with pytest.raises(DecryptionError):
+        key_ring.get("inconnue")
+    assert not key_ring.key_ids()
+
+    other = KeyRing(str(tmp_path), "courante")
+    key = other.get(create=True)
+    assert key_ring.get(create=True) == key
+    # fichier créé entre la vérification et la création: la clé existante est gardée
+    assert key_ring._create(key_ring.key_file("courante")) == key
+    assert key_ring.key_ids() == ["courante"]
+    assert len(os.listdir(tmp_path)) == 1
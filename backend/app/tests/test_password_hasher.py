@@ -0,0 +1,42 @@
+import threading
+import time
+
+import pytest
+
+from app.core.password_hasher import HashingBusy, PasswordHasher
+from app.core.security import _hash, _verify
+
+
+def test_password_hasher_process_pool():
+    """
+    Le hachage et la vérification sont faits dans un processus du pool
+    """
+    hasher = PasswordHasher(workers=1, max_pending=0)
+    try:
+        hashed = hasher.run(_hash, "motdepasse")
+        assert hasher.run(_verify, "motdepasse", hashed)
+        assert not hasher.run(_verify, "autre", hashed)
+    finally:
+        hasher.shutdown()
+
+
+def test_password_hasher_rejects_when_full():
+    """
+    Quand le processus et la file sont occupés, une nouvelle demande est refusée tout de suite
+    """
+    hasher = PasswordHasher(workers=1, max_pending=0)
+    busy = threading.Thread(target=hasher.run, args=(time.sleep, 3))
+    busy.start()
+    try:
+        time.sleep(0.5)
+        start = time.monotonic()
+        with pytest.raises(HashingBusy):
+            hasher.run(_hash, "motdepasse")
+        assert time.monotonic() - start < 0.5
+    finally:
+        busy.join()
+        hasher.shutdown()
+
+    # une place s'est libérée
+    hasher = PasswordHasher(workers=0)
+    assert hasher.run(_verify, "motdepasse", _hash("motdepasse"))
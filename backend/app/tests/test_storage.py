@@ -0,0 +1,121 @@
+import os
+
+import pytest
+
+from app.encryption_services import FileEncryptionService
+from app.storage import LocalStorage, S3Storage, ShardedLocalStorage, StorageBackend
+
+
+def encrypt_to(service: FileEncryptionService, data: bytes, name: str) -> str:
+    key = service.create_storage_path(name, "document")
+    with service.storage.open_write(key) as destination:
+        encryptor = service.encryptor(destination)
+        encryptor.write(data)
+        encryptor.close()
+    return key
+
+
+def test_local_storage_no_partial_file(tmp_path):
+    """
+    Un fichier n'apparaît dans le stockage qu'une fois entièrement écrit
+    """
+    storage = LocalStorage(str(tmp_path))
+    key = storage.build_key("media", "document")
+    with pytest.raises(RuntimeError):
+        with storage.open_write(key) as file:
+            file.write(b"debut")
+            raise RuntimeError("upload interrompu")
+
+    assert not storage.exists(key)
+    assert list(storage.iter_keys()) == []
+
+
+def test_storage_backend_must_implement_everything(tmp_path):
+    """
+    Un stockage incomplet est refusé à la création, pas au premier appel manquant
+    """
+    class WriteOnlyStorage(StorageBackend):
+        name = "write-only"
+
+        def build_key(self, name: str, folder: str) -> str:
+            return f"{folder}/{name}.enc"
+
+        def open_write(self, key: str):
+            return open(tmp_path / key, "wb")
+
+    with pytest.raises(TypeError):
+        WriteOnlyStorage()
+
+
+def test_sharded_storage_layout(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    base_path = tmp_path / "files"
+    service = FileEncryptionService(storage=ShardedLocalStorage(str(base_path)))
+    service.key_ring.get(create=True)
+    data = os.urandom(100_000)
+    keys = [encrypt_to(service, data, f"media-{i}") for i in range(20)]
+
+    # deux niveaux de dossiers tirés du hash du nom
+    assert all(len(os.path.relpath(key, base_path / "document").split(os.sep)) == 3 for key in keys)
+    assert len({os.path.dirname(key) for key in keys}) > 1
+    assert sorted(service.storage.iter_keys()) == sorted(keys)
+    assert service.decrypt_file(keys[0], service.get_key_id()) == data
+
+
+def test_s3_storage_stream_and_range(tmp_path, monkeypatch):
+    """
+    Écriture en multipart et lecture par plage sur un S3 simulé (moto)
+    """
+    boto3 = pytest.importorskip("boto3")
+    moto = pytest.importorskip("moto")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket="medias")
+        service = FileEncryptionService(storage=S3Storage(bucket="medias", prefix="univ/", client=client))
+        service.key_ring.get(create=True)
+        data = os.urandom(12 * 1024 * 1024)
+        key = encrypt_to(service, data, "media")
+
+        assert key.startswith("univ/document/")
+        assert service.storage.exists(key)
+        assert service.decrypt_file(key, service.get_key_id()) == data
+        start, end = 9 * 1024 * 1024 + 5, 9 * 1024 * 1024 + 70_000
+        assert b"".join(service.decrypt_range(key, start, end, service.get_key_id())) == data[start:end + 1]
+
+        service.delete_file(key)
+        assert not service.storage.exists(key)
+
+
+class FailingCompleteClient:
+    """Client S3 dont la fin de l'envoi multipart échoue"""
+    def __init__(self):
+        self.aborted = []
+
+    def create_multipart_upload(self, Bucket, Key):
+        return {"UploadId": "upload-1"}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        return {"ETag": f"etag-{PartNumber}"}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        raise ConnectionError("connexion perdue")
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.aborted.append(UploadId)
+
+
+def test_s3_storage_abort_when_complete_fails():
+    """
+    Un envoi multipart qui échoue à la dernière partie est annulé, pas laissé ouvert
+    """
+    client = FailingCompleteClient()
+    storage = S3Storage(bucket="medias", prefix="univ/", part_size=4, client=client)
+    with pytest.raises(ConnectionError):
+        with storage.open_write("univ/document/media.enc") as file:
+            file.write(b"0123456789")
+
+    assert client.aborted == ["upload-1"]
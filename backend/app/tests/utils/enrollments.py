@@ -0,0 +1,32 @@
+from datetime import date
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.models.enrollments import Enrollment
+
+
+def create_enrollment_for_student(
+    db: Session,
+    student_id: UUID,
+    annee_academique: str = "2023-2024",
+    niveau: str = "L1",
+    est_admis: bool | None = True
+) -> Enrollment:
+    """
+    Créer une inscription pour un étudiant
+    """
+    enrollment = Enrollment(
+        student_id=student_id,
+        annee_academique=annee_academique,
+        niveau=niveau,
+        id_departement=1,
+        id_parcours=1,
+        date_inscription=date.today(),
+        statut="en_cours",
+        est_admis=est_admis
+    )
+    db.add(enrollment)
+    db.commit()
+    db.refresh(enrollment)
+    return enrollment
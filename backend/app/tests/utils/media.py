@@ -38,7 +38,7 @@ def check_principal_photo(*,db, entity, principal_media, is_teacher:bool = False
     assert principal_media in entity_db.medias
     
     # Vérifier que le média existe dans la bdd
-    conditions = [Media.file_path == principal_media.file_path]
+    conditions = [Media.id == principal_media.id]
     if is_teacher:
         conditions.append(Media.teacher_id == entity.id)
     else:
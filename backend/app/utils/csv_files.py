@@ -0,0 +1,64 @@
+import codecs
+import csv
+import io
+from typing import BinaryIO, Iterator
+
+
+# UTF-8, sinon Windows-1252 (CSV enregistrés par Excel en français)
+CSV_ENCODINGS = ("utf-8-sig", "cp1252")
+
+
+class InvalidCsvFile(ValueError):
+    pass
+
+
+def detect_encoding(file: BinaryIO, encodings=CSV_ENCODINGS, chunk_size: int = 64 * 1024) -> str:
+    """
+    Premier encodage qui décode tout le fichier, lu par morceaux puis rembobiné
+    Vérifié avant la lecture des lignes: une erreur ne peut pas arriver au milieu d'un import
+    """
+    start = file.tell()
+    try:
+        for encoding in encodings:
+            decoder = codecs.getincrementaldecoder(encoding)()
+            file.seek(start)
+            try:
+                for chunk in iter(lambda: file.read(chunk_size), b""):
+                    decoder.decode(chunk)
+                decoder.decode(b"", final=True)
+            except UnicodeDecodeError:
+                continue
+            return encoding
+    finally:
+        file.seek(start)
+    raise InvalidCsvFile(f"Encodage du fichier CSV non reconnu ({', '.join(encodings)} attendus)")
+
+
+def read_csv_rows(file: BinaryIO) -> Iterator[tuple[int, dict]]:
+    """
+    Lit un fichier CSV en flux et retourne (numéro de ligne, ligne)
+    L'encodage (UTF-8 ou Windows-1252) et le séparateur (virgule ou point-virgule,
+    comme les exports Excel) sont détectés
+    Les cellules vides sont retirées pour que les valeurs par défaut des schémas s'appliquent
+    """
+    text = io.TextIOWrapper(file, encoding=detect_encoding(file), newline="")
+    try:
+        sample = text.read(4096)
+        text.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;")
+        except csv.Error:
+            dialect = csv.excel
+        
+        reader = csv.DictReader(text, dialect=dialect)
+        for row in reader:
+            cleaned = {
+                key.strip(): value.strip()
+                for key, value in row.items()
+                if key and value is not None and value.strip()
+            }
+            if cleaned:
+                yield reader.line_num, cleaned
+    finally:
+        # ne pas fermer le fichier de l'UploadFile avec le wrapper
+        text.detach()
@@ -0,0 +1,92 @@
+import csv
+import enum
+import io
+import json
+import uuid
+from datetime import date, datetime
+from typing import Any, Iterable, Iterator, Sequence
+
+
+# taille approximative des morceaux envoyés au client
+BUFFER_SIZE = 64 * 1024
+
+
+class ExportFormat(str, enum.Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+    ExportFormat.NDJSON: "application/x-ndjson",
+}
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return _json_value(value)
+
+
+def csv_lines(columns: Sequence[str], rows: Iterable[Sequence]) -> Iterator[str]:
+    """
+    Convertit des lignes en CSV, par morceaux d'environ BUFFER_SIZE caractères
+    L'en-tête est envoyé tout de suite, avant la lecture de la première ligne
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+        if buffer.tell() >= BUFFER_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def ndjson_lines(columns: Sequence[str], rows: Iterable[Sequence]) -> Iterator[str]:
+    """
+    Convertit des lignes en NDJSON (un objet JSON par ligne), par morceaux
+    La première ligne est envoyée seule pour que le client reçoive des données tout de suite
+    """
+    chunk = []
+    size = 0
+    first = True
+    for row in rows:
+        line = json.dumps(
+            {column: _json_value(value) for column, value in zip(columns, row)},
+            ensure_ascii=False
+        ) + "\n"
+        chunk.append(line)
+        size += len(line)
+        if first or size >= BUFFER_SIZE:
+            first = False
+            yield "".join(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        yield "".join(chunk)
+
+
+FORMATTERS = {
+    ExportFormat.CSV: csv_lines,
+    ExportFormat.NDJSON: ndjson_lines,
+}
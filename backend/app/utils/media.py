@@ -1,39 +1,107 @@
 import hashlib
-import os,shutil
+import os
+from typing import BinaryIO
 from uuid import UUID
-from fastapi import UploadFile
 from sqlalchemy.orm import Session
 
-from app.encryption_services import encryption_service
+from app.encryption_services import SEGMENT_SIZE, encryption_service
 from app.models.media import Media
-from app.schemas.media import MediaCreate
 
-def save_temp_file(
-    *,
-    db: Session, 
-    temp_file: MediaCreate, 
-    file: UploadFile,
-    file_type: str
-):
+def store_encrypted_upload(*, file: BinaryIO, media_id: UUID, file_type: str) -> dict:
+    """
+    Lit le fichier envoyé une seule fois: le SHA-256, la taille et le chiffrement
+    sont calculés sur les mêmes morceaux, écrits directement dans le stockage final
+    En cas d'erreur, le stockage ne garde pas de fichier partiel
     
-    temp_media = Media(**temp_file.model_dump())
-    db.add(temp_media)
-    db.commit()
-    db.refresh(temp_media)
-    
-    
-    # créer un dossier temporaire pour les fichiers
-    temp_dir = "/tmp/uploads"
-    os.makedirs(temp_dir, exist_ok=True)
-    
-    # chemin de fichier temporaire
-    temp_path = f"{temp_dir}/{temp_media.id}_{file.filename}"
+    Returns: {"file_path", "file_size", "checksum", "encryption_key_id", "storage_location"}
+    """
+    encrypted_path = encryption_service.create_storage_path(str(media_id), file_type)
+    sha256_hash = hashlib.sha256()
+    file_size = 0
+    with encryption_service.storage.open_write(encrypted_path) as encrypted_file:
+        encryptor = encryption_service.encryptor(encrypted_file)
+        for chunk in iter(lambda: file.read(SEGMENT_SIZE), b""):
+            sha256_hash.update(chunk)
+            file_size += len(chunk)
+            encryptor.write(chunk)
+        encryptor.close()
     
-    # copier le fichier en memoire sur le disque
-    with open(temp_path, "wb") as temp_file_handle:
-        shutil.copyfileobj(file.file, temp_file_handle)
+    return {
+        "file_path": encrypted_path,
+        "file_size": file_size,
+        "checksum": sha256_hash.hexdigest(),
+        "encryption_key_id": encryption_service.get_key_id(),
+        "storage_location": encryption_service.get_storage_location()
+    }
+
+# Signatures des formats acceptés, pour les uploads sans Content-Type fiable
+MAGIC_NUMBERS = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"%PDF-", "application/pdf"),
+]
+
+def detect_mime_type(head: bytes) -> str | None:
+    """Type MIME d'après les premiers octets du fichier"""
+    for magic, mime_type in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return mime_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+def parse_range_header(range_header: str | None, file_size: int) -> tuple[int, int] | None:
+    """
+    Plage demandée par l'en-tête Range (bytes=début-fin, bytes=début- ou bytes=-n)
+    Retourne (début, fin inclus), ou None pour envoyer tout le fichier:
+    en-tête absent, d'une autre unité ou avec plusieurs plages (que l'on peut ignorer)
+    """
+    if not range_header:
+        return None
+    unit, _, ranges = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+
+    first, sep, last = ranges.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        start = int(first) if first else None
+        end = int(last) if last else None
+    except ValueError:
+        # syntaxe invalide: l'en-tête est ignoré
+        return None
+
+    if start is None and end is None:
+        return None
+    if start is None:
+        # les n derniers octets
+        if not end or file_size == 0:
+            raise RangeNotSatisfiable(range_header)
+        return max(file_size - end, 0), file_size - 1
+    if end is None:
+        end = file_size - 1
+    if start >= file_size:
+        raise RangeNotSatisfiable(range_header)
+    if start > end:
+        return None
+    return start, min(end, file_size - 1)
 
-    return temp_path, temp_media
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Comparaison faible de If-None-Match avec l'ETag du fichier"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
 
 def calculate_file_checksum(file_path: str) -> str:
     """Calcule le checksum SHA-256 d'un fichier"""
@@ -0,0 +1,129 @@
+import base64
+import enum
+import json
+from datetime import date, datetime
+from typing import Any, Optional, Sequence
+
+from sqlalchemy import Select, func, literal, select, text, tuple_
+from sqlalchemy.orm import Session
+
+
+class CountMode(str, enum.Enum):
+    """
+    Comment calculer le nombre total de lignes d'une liste
+    """
+    EXACT = "exact"          # COUNT(*) sur la requête
+    ESTIMATED = "estimated"  # statistiques de la table quand la base les fournit
+    NONE = "none"            # pas de comptage
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Curseur opaque à partir des valeurs de la clé de tri de la dernière ligne
+    """
+    payload = json.dumps([
+        value.isoformat() if isinstance(value, (date, datetime)) else
+        value if isinstance(value, (int, float, bool)) or value is None else str(value)
+        for value in values
+    ])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> list:
+    """
+    Retrouve les valeurs de la clé de tri, converties dans le type des colonnes
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise InvalidCursor("Curseur invalide")
+        return [_convert(value, column) for value, column in zip(values, columns)]
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Curseur invalide") from e
+
+
+def _convert(value: Any, column) -> Any:
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type in (date, datetime):
+        return python_type.fromisoformat(value)
+    if isinstance(value, python_type):
+        return value
+    return python_type(value)
+
+
+def count_rows(db: Session, statement: Select, count_mode: CountMode) -> Optional[int]:
+    """
+    Nombre total de lignes de la requête selon le mode demandé
+    L'estimation n'est possible que pour une table entière sous MySQL,
+    sinon le comptage exact est utilisé
+    """
+    if count_mode == CountMode.NONE:
+        return None
+
+    if count_mode == CountMode.ESTIMATED and statement.whereclause is None:
+        bind = db.get_bind()
+        tables = statement.get_final_froms()
+        if bind.dialect.name == "mysql" and len(tables) == 1:
+            estimated = db.execute(
+                text(
+                    "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table"
+                ),
+                {"table": tables[0].name}
+            ).scalar()
+            if estimated is not None:
+                return estimated
+
+    return db.execute(
+        select(func.count()).select_from(statement.order_by(None).subquery())
+    ).scalar()
+
+
+def paginate(
+    db: Session,
+    statement: Select,
+    *,
+    order_by: Sequence,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    count_mode: CountMode = CountMode.EXACT
+) -> dict:
+    """
+    Pagine une requête d'entités triée par une clé stable et unique (order_by)
+
+    Avec un curseur, la page commence après la dernière ligne de la page précédente
+    (pagination par clé, le coût ne dépend pas de la profondeur) et skip est ignoré.
+    Sans curseur, OFFSET/LIMIT est utilisé pour rester compatible
+
+    Returns: {"data": ..., "count": ..., "next_cursor": ...}
+    """
+    count = count_rows(db, statement, count_mode)
+
+    page = statement.order_by(*order_by)
+    if cursor:
+        values = decode_cursor(cursor, order_by)
+        if len(order_by) == 1:
+            page = page.where(order_by[0] > values[0])
+        else:
+            page = page.where(tuple_(*order_by) > tuple_(*[
+                literal(value, type_=column.type) for value, column in zip(values, order_by)
+            ]))
+    elif skip:
+        page = page.offset(skip)
+
+    # une ligne de plus pour savoir s'il y a une page suivante
+    rows = db.execute(page.limit(limit + 1)).scalars().all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], column.key) for column in order_by])
+
+    return {"data": rows, "count": count, "next_cursor": next_cursor}
@@ -0,0 +1,43 @@
+import io
+
+
+# format demandé -> (format Pillow, type MIME)
+RENDITION_FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg"),
+    "png": ("PNG", "image/png"),
+}
+
+
+class RenditionUnavailable(ValueError):
+    pass
+
+
+class InvalidImage(RenditionUnavailable):
+    pass
+
+
+def render_image(data: bytes, size: int, rendition_format: str) -> bytes:
+    """
+    Réduit une image pour qu'elle tienne dans un carré de size pixels
+    Les JPEG sont décodés directement à une résolution proche (draft), sans passer
+    par l'image complète
+    """
+    try:
+        from PIL import Image, ImageOps, UnidentifiedImageError
+    except ImportError as e:
+        raise RenditionUnavailable("Les miniatures nécessitent le paquet Pillow") from e
+
+    pil_format, _ = RENDITION_FORMATS[rendition_format]
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.draft("RGB", (size, size))
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((size, size))
+            if pil_format == "JPEG" and image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            output = io.BytesIO()
+            image.save(output, format=pil_format, quality=80)
+    except (UnidentifiedImageError, OSError) as e:
+        raise InvalidImage("Le média n'est pas une image lisible") from e
+    return output.getvalue()
@@ -0,0 +1,72 @@
+import zipfile
+from datetime import date, datetime
+from typing import Any, BinaryIO, Iterator
+
+from app.utils.csv_files import read_csv_rows
+
+
+class UnsupportedSpreadsheet(ValueError):
+    pass
+
+
+def _cell_value(value: Any) -> Any:
+    """
+    Les cellules Excel sont typées: les dates deviennent des datetime
+    et les numéros de téléphone des nombres
+    """
+    if isinstance(value, datetime):
+        return value.date() if value.time() == datetime.min.time() else value
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def read_xlsx_rows(file: BinaryIO) -> Iterator[tuple[int, dict]]:
+    """
+    Lit la première feuille d'un classeur XLSX en flux et retourne (numéro de ligne, ligne)
+    La première ligne contient les noms des colonnes
+    """
+    try:
+        from openpyxl import load_workbook
+        from openpyxl.utils.exceptions import InvalidFileException
+    except ImportError as e:
+        raise UnsupportedSpreadsheet("Le format XLSX nécessite le paquet openpyxl") from e
+
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, InvalidFileException, KeyError) as e:
+        # KeyError: une archive zip sans les parties d'un classeur
+        raise UnsupportedSpreadsheet("Fichier XLSX illisible ou corrompu") from e
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if not header:
+            return
+        columns = [str(column).strip() if column is not None else None for column in header]
+        for line_num, values in enumerate(rows, start=2):
+            cleaned = {}
+            for column, value in zip(columns, values):
+                value = _cell_value(value)
+                # comme pour le CSV, les cellules vides sont retirées
+                if column and value is not None and value != "":
+                    cleaned[column] = value
+            if cleaned:
+                yield line_num, cleaned
+    finally:
+        workbook.close()
+
+
+def read_spreadsheet_rows(file: BinaryIO, filename: str) -> Iterator[tuple[int, dict]]:
+    """
+    Choisit le lecteur selon l'extension du fichier (.csv ou .xlsx)
+    """
+    extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    if extension == "csv":
+        return read_csv_rows(file)
+    if extension == "xlsx":
+        return read_xlsx_rows(file)
+    raise UnsupportedSpreadsheet(f"Format de fichier non supporté: {filename} (csv ou xlsx)")
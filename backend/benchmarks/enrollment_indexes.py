@@ -0,0 +1,193 @@
+"""
+Benchmark des index de la table des inscriptions
+
+Crée une table temporaire avec les mêmes colonnes que `inscriptions`, la remplit
+avec des lignes aléatoires (1M par défaut), puis affiche le plan d'exécution et le
+temps moyen des requêtes critiques avant et après la création des index déclarés
+sur le modèle `Enrollment`.
+
+Depuis le dossier `./backend/`:
+
+    python -m benchmarks.enrollment_indexes
+    python -m benchmarks.enrollment_indexes --url sqlite:///./bench.db --rows 200000
+"""
+import argparse
+import random
+import time
+import uuid
+from datetime import date
+
+from sqlalchemy import (
+    Column, Index, MetaData, Table, UniqueConstraint, case, create_engine, func, insert, select
+)
+
+from app.core.settings import settings
+from app.models.enrollments import Enrollment
+
+
+ANNEES = ["2020-2021", "2021-2022", "2022-2023", "2023-2024"]
+NIVEAUX = ["L1", "L2", "L3", "M1", "M2"]
+STATUTS = ["en_cours", "validée", "échouée", "abandonnée"]
+CHUNK_SIZE = 10_000
+REPETITIONS = 50
+
+
+def build_table(metadata: MetaData) -> Table:
+    """
+    Copie des colonnes de `inscriptions`, sans index ni clés étrangères
+    """
+    columns = [
+        Column(c.name, c.type, primary_key=c.primary_key, nullable=c.nullable)
+        for c in Enrollment.__table__.columns
+    ]
+    return Table("bench_inscriptions", metadata, *columns)
+
+
+def build_indexes(table: Table) -> list[Index]:
+    """
+    Reproduit sur la table de benchmark les index et contraintes uniques du modèle
+    """
+    source = Enrollment.__table__
+    definitions = [(index.name, index.columns, index.unique) for index in source.indexes]
+    definitions += [
+        (constraint.name, constraint.columns, True)
+        for constraint in source.constraints
+        if isinstance(constraint, UniqueConstraint)
+    ]
+    return [
+        Index(f"bench_{name}", *[table.c[column.name] for column in columns], unique=unique)
+        for name, columns, unique in definitions
+    ]
+
+
+def seed(engine, table: Table, rows: int) -> list:
+    """
+    Insère `rows` inscriptions, une par étudiant et par année
+    Retourne quelques student_id pour les requêtes de test
+    """
+    students = [uuid.uuid4() for _ in range(rows // len(ANNEES) + 1)]
+    samples = random.sample(students, k=min(REPETITIONS, len(students)))
+
+    batch = []
+    inserted = 0
+    with engine.begin() as conn:
+        for student_id in students:
+            for annee in ANNEES:
+                if inserted >= rows:
+                    break
+                batch.append({
+                    "student_id": student_id,
+                    "annee_academique": annee,
+                    "niveau": random.choice(NIVEAUX),
+                    "id_departement": random.randint(1, 20),
+                    "id_parcours": random.randint(1, 60),
+                    "date_inscription": date.today(),
+                    "statut": random.choice(STATUTS),
+                    "credits_obtenus": 0,
+                    "est_admis": random.random() < 0.7,
+                })
+                inserted += 1
+                if len(batch) >= CHUNK_SIZE:
+                    conn.execute(insert(table), batch)
+                    batch = []
+        if batch:
+            conn.execute(insert(table), batch)
+    return samples
+
+
+def hot_queries(table: Table, student_id) -> dict:
+    """
+    Requêtes critiques: doublon, filtre année/niveau/admis, statistiques
+    """
+    return {
+        "doublon (student_id, annee)": select(table.c.id).where(
+            table.c.student_id == student_id,
+            table.c.annee_academique == "2023-2024"
+        ),
+        "annee + niveau + admis": select(table.c.student_id).where(
+            table.c.annee_academique == "2022-2023",
+            table.c.niveau == "L2",
+            table.c.est_admis == True
+        ),
+        "statistiques par annee": select(
+            table.c.niveau,
+            func.count(),
+            func.sum(case((table.c.est_admis == True, 1), else_=0)),
+            func.sum(case((table.c.statut == "validée", 1), else_=0))
+        ).where(table.c.annee_academique == "2022-2023").group_by(table.c.niveau),
+    }
+
+
+def explain(conn, statement) -> str:
+    compiled = statement.compile(dialect=conn.dialect)
+    # les paramètres (UUID, booléens) doivent être convertis comme le ferait SQLAlchemy
+    processors = compiled._bind_processors
+    values = {
+        name: processors[name](value) if name in processors else value
+        for name, value in compiled.params.items()
+    }
+    params = tuple(values[name] for name in compiled.positiontup) if compiled.positional else values
+
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    rows = conn.exec_driver_sql(prefix + str(compiled), params).mappings().all()
+    return "\n".join(
+        "    " + ", ".join(f"{key}={value}" for key, value in row.items() if value is not None)
+        for row in rows
+    )
+
+
+def measure(conn, statements: list) -> float:
+    start = time.perf_counter()
+    for statement in statements:
+        conn.execute(statement).all()
+    return (time.perf_counter() - start) / len(statements) * 1000
+
+
+def report(engine, table: Table, samples: list, label: str) -> dict:
+    timings = {}
+    with engine.connect() as conn:
+        for name, statement in hot_queries(table, samples[0]).items():
+            repeated = [hot_queries(table, s)[name] for s in samples]
+            timings[name] = measure(conn, repeated)
+            print(f"[{label}] {name}: {timings[name]:.3f} ms")
+            print(explain(conn, statement))
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=str(settings.SQLALCHEMY_DATABASE_URI))
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--keep", action="store_true", help="ne pas supprimer la table à la fin")
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    metadata = MetaData()
+    table = build_table(metadata)
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+
+    try:
+        start = time.perf_counter()
+        samples = seed(engine, table, args.rows)
+        print(f"{args.rows} lignes insérées en {time.perf_counter() - start:.1f} s\n")
+
+        before = report(engine, table, samples, "sans index")
+
+        start = time.perf_counter()
+        for index in build_indexes(table):
+            index.create(engine)
+        print(f"\nIndex créés en {time.perf_counter() - start:.1f} s\n")
+
+        after = report(engine, table, samples, "avec index")
+
+        print("\nRésumé (ms par requête):")
+        for name in before:
+            print(f"  {name:<30} {before[name]:>10.3f} -> {after[name]:>8.3f}  (x{before[name] / after[name]:.0f})")
+    finally:
+        if not args.keep:
+            metadata.drop_all(engine)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark du hachage des mots de passe pendant un afflux de connexions
+
+Des threads (comme le pool de threads de l'API) vérifient en boucle un mot de passe,
+ce que fait chaque connexion, pendant que d'autres threads simulent des requêtes
+légères. Le benchmark affiche les connexions par seconde, les connexions refusées
+(503), la latence des connexions et celle des requêtes légères, avec le hachage dans
+les threads (inline) puis dans le pool de processus (app/core/password_hasher.py).
+
+Depuis le dossier `./backend/`:
+
+    python -m benchmarks.password_hashing
+    python -m benchmarks.password_hashing --threads 40 --workers 4 --max-pending 16 --duration 10
+"""
+import argparse
+import threading
+import time
+
+from app.core.password_hasher import HashingBusy, PasswordHasher
+from app.core.security import _hash, _verify
+
+
+LIGHT_REQUESTS = 4
+LIGHT_INTERVAL = 0.01  # secondes entre deux requêtes légères d'un même thread
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] * 1000
+
+
+def light_request() -> None:
+    # un peu de CPU Python, comme la sérialisation d'une petite réponse
+    sum(i * i for i in range(2000))
+
+
+def run(hasher: PasswordHasher, hashed: str, threads: int, duration: float) -> dict:
+    stop = threading.Event()
+    lock = threading.Lock()
+    logins, light = [], []
+    rejected = 0
+
+    def login_loop() -> None:
+        nonlocal rejected
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                hasher.run(_verify, "motdepasse", hashed)
+            except HashingBusy:
+                with lock:
+                    rejected += 1
+                # le client réessaie un peu plus tard
+                time.sleep(0.05)
+                continue
+            with lock:
+                logins.append(time.perf_counter() - start)
+
+    def light_loop() -> None:
+        while not stop.is_set():
+            start = time.perf_counter()
+            light_request()
+            with lock:
+                light.append(time.perf_counter() - start)
+            time.sleep(LIGHT_INTERVAL)
+
+    workers = [threading.Thread(target=login_loop) for _ in range(threads)]
+    workers += [threading.Thread(target=light_loop) for _ in range(LIGHT_REQUESTS)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "logins/s": len(logins) / elapsed,
+        "refusées": rejected,
+        "connexion p50 (ms)": percentile(logins, 0.5),
+        "connexion p95 (ms)": percentile(logins, 0.95),
+        "requête légère p50 (ms)": percentile(light, 0.5),
+        "requête légère p95 (ms)": percentile(light, 0.95),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=40, help="threads de connexion (pool de threads de l'API)")
+    parser.add_argument("--workers", type=int, default=4, help="processus de hachage")
+    parser.add_argument("--max-pending", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="secondes par mode")
+    args = parser.parse_args()
+
+    hashed = _hash("motdepasse")
+    print(f"Hachage: {hashed.split('$')[1]} {hashed.split('$')[3] if hashed.startswith('$argon2') else ''}\n")
+
+    results = {}
+    for label, hasher in (
+        ("inline", PasswordHasher(workers=0)),
+        (f"pool ({args.workers} processus)", PasswordHasher(workers=args.workers, max_pending=args.max_pending)),
+    ):
+        # démarrage des processus hors mesure
+        hasher.run(_verify, "motdepasse", hashed)
+        try:
+            results[label] = run(hasher, hashed, args.threads, args.duration)
+        finally:
+            hasher.shutdown()
+
+    names = list(next(iter(results.values())))
+    print(f"{'':<26}" + "".join(f"{label:>24}" for label in results))
+    for name in names:
+        print(f"{name:<26}" + "".join(f"{results[label][name]:>24.1f}" for label in results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Add enrollment indexes
+
+Revision ID: 8b2f4d1c9e7a
+Revises: 4c360ef63692
+Create Date: 2026-10-18 09:12:44.531207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2f4d1c9e7a'
+down_revision: Union[str, Sequence[str], None] = '4c360ef63692'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # La contrainte unique échoue s'il existe déjà des doublons, on préfère un message clair
+    doublons = op.get_bind().execute(sa.text(
+        "SELECT COUNT(*) FROM ("
+        " SELECT student_id, annee_academique FROM inscriptions"
+        " GROUP BY student_id, annee_academique HAVING COUNT(*) > 1"
+        ") AS d"
+    )).scalar()
+    if doublons:
+        raise RuntimeError(
+            f"{doublons} étudiants ont plusieurs inscriptions pour la même année, "
+            "supprimez les doublons avant d'appliquer cette migration"
+        )
+    
+    op.create_unique_constraint(
+        'uq_inscriptions_student_annee',
+        'inscriptions',
+        ['student_id', 'annee_academique']
+    )
+    op.create_index(
+        'ix_inscriptions_annee_niveau_admis_statut',
+        'inscriptions',
+        ['annee_academique', 'niveau', 'est_admis', 'statut'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_inscriptions_annee_niveau_admis_statut', table_name='inscriptions')
+    # MySQL peut utiliser la contrainte unique pour la clé étrangère student_id,
+    # il faut recréer un index simple avant de la supprimer
+    op.create_index('ix_inscriptions_student_id', 'inscriptions', ['student_id'], unique=False)
+    op.drop_constraint('uq_inscriptions_student_annee', 'inscriptions', type_='unique')
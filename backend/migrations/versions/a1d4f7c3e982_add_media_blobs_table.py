@@ -0,0 +1,39 @@
+"""Add media blobs table
+
+Revision ID: a1d4f7c3e982
+Revises: f3b6d0e8c271
+Create Date: 2026-10-18 21:12:44.530116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1d4f7c3e982'
+down_revision: Union[str, Sequence[str], None] = 'f3b6d0e8c271'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Pas de reprise des médias existants: chacun garde son propre fichier
+    # et le supprime avec lui, seuls les nouveaux uploads sont dédupliqués
+    op.create_table('media_blobs',
+    sa.Column('checksum', sa.String(length=64), nullable=False),
+    sa.Column('file_path', sa.String(length=255), nullable=False),
+    sa.Column('file_size', sa.Integer(), nullable=False),
+    sa.Column('encryption_key_id', sa.String(length=50), nullable=True),
+    sa.Column('storage_location', sa.String(length=50), nullable=True),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('checksum')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('media_blobs')
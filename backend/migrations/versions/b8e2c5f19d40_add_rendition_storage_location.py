@@ -0,0 +1,29 @@
+"""Add storage location to media renditions
+
+Revision ID: b8e2c5f19d40
+Revises: a1d4f7c3e982
+Create Date: 2026-10-18 22:04:19.871254
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e2c5f19d40'
+down_revision: Union[str, Sequence[str], None] = 'a1d4f7c3e982'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('media_renditions', sa.Column('storage_location', sa.String(length=50), nullable=True))
+    op.execute("UPDATE media_renditions SET storage_location = 'local'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('media_renditions', 'storage_location')
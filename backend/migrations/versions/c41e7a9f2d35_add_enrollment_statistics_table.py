@@ -0,0 +1,48 @@
+"""Add enrollment statistics table
+
+Revision ID: c41e7a9f2d35
+Revises: 8b2f4d1c9e7a
+Create Date: 2026-10-18 14:03:27.118842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e7a9f2d35'
+down_revision: Union[str, Sequence[str], None] = '8b2f4d1c9e7a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('statistiques_inscriptions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('annee_academique', sa.String(length=20), nullable=False),
+    sa.Column('niveau', sa.String(length=50), nullable=False),
+    sa.Column('id_departement', sa.Integer(), nullable=False),
+    sa.Column('statut', sa.String(length=50), nullable=False),
+    sa.Column('nombre', sa.Integer(), nullable=False),
+    sa.Column('admis', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['id_departement'], ['departements.id']),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('annee_academique', 'niveau', 'id_departement', 'statut', name='uq_statistiques_inscriptions_groupe')
+    )
+    # Initialiser les compteurs à partir des inscriptions existantes
+    op.execute(
+        "INSERT INTO statistiques_inscriptions "
+        "(annee_academique, niveau, id_departement, statut, nombre, admis) "
+        "SELECT annee_academique, niveau, id_departement, COALESCE(statut, 'en_cours'), "
+        "COUNT(id), SUM(CASE WHEN est_admis = 1 THEN 1 ELSE 0 END) "
+        "FROM inscriptions "
+        "GROUP BY annee_academique, niveau, id_departement, COALESCE(statut, 'en_cours')"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('statistiques_inscriptions')
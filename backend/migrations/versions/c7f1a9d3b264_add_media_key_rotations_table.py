@@ -0,0 +1,39 @@
+"""Add media key rotations table
+
+Revision ID: c7f1a9d3b264
+Revises: b8e2c5f19d40
+Create Date: 2026-10-18 22:47:31.602117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7f1a9d3b264'
+down_revision: Union[str, Sequence[str], None] = 'b8e2c5f19d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('media_key_rotations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('target_key_id', sa.String(length=50), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('checkpoint', sa.Text(), nullable=True),
+    sa.Column('reencrypted', sa.Integer(), nullable=False),
+    sa.Column('failed', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('media_key_rotations')
@@ -0,0 +1,41 @@
+"""Widen media checksum column
+
+Revision ID: d5e8a3b71f04
+Revises: c41e7a9f2d35
+Create Date: 2026-10-18 17:21:05.640213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e8a3b71f04'
+down_revision: Union[str, Sequence[str], None] = 'c41e7a9f2d35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # un SHA-256 en hexadécimal fait 64 caractères
+    op.alter_column(
+        'media',
+        'checksum',
+        existing_type=sa.String(length=50),
+        type_=sa.String(length=64),
+        existing_nullable=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column(
+        'media',
+        'checksum',
+        existing_type=sa.String(length=64),
+        type_=sa.String(length=50),
+        existing_nullable=True
+    )
@@ -0,0 +1,34 @@
+"""Add media owner principal indexes
+
+Revision ID: d9a3e6b04f17
+Revises: c7f1a9d3b264
+Create Date: 2026-10-18 23:41:08.215946
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9a3e6b04f17'
+down_revision: Union[str, Sequence[str], None] = 'c7f1a9d3b264'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_media_student_principal', 'media', ['student_id', 'is_principal'], unique=False)
+    op.create_index('ix_media_teacher_principal', 'media', ['teacher_id', 'is_principal'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # MySQL peut utiliser ces index pour les clés étrangères student_id et teacher_id,
+    # il faut recréer des index simples avant de les supprimer
+    op.create_index('ix_media_student_id', 'media', ['student_id'], unique=False)
+    op.create_index('ix_media_teacher_id', 'media', ['teacher_id'], unique=False)
+    op.drop_index('ix_media_teacher_principal', table_name='media')
+    op.drop_index('ix_media_student_principal', table_name='media')
@@ -0,0 +1,42 @@
+"""Make users username unique
+
+Revision ID: e2c8b5a71d36
+Revises: d9a3e6b04f17
+Create Date: 2026-10-19 00:18:52.604371
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2c8b5a71d36'
+down_revision: Union[str, Sequence[str], None] = 'd9a3e6b04f17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # get_current_user retrouve l'utilisateur par le sujet du token (username), qui doit être unique
+    doublons = op.get_bind().execute(sa.text(
+        "SELECT COUNT(*) FROM ("
+        " SELECT username FROM users GROUP BY username HAVING COUNT(*) > 1"
+        ") AS d"
+    )).scalar()
+    if doublons:
+        raise RuntimeError(
+            f"{doublons} noms d'utilisateur sont utilisés par plusieurs comptes, "
+            "renommez les doublons avant d'appliquer cette migration"
+        )
+    
+    op.drop_index(op.f('ix_users_username'), table_name='users')
+    op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_users_username'), table_name='users')
+    op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=False)
@@ -0,0 +1,53 @@
+"""Add media jobs table
+
+Revision ID: e7a4c2d95b13
+Revises: d5e8a3b71f04
+Create Date: 2026-10-18 18:42:51.307716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a4c2d95b13'
+down_revision: Union[str, Sequence[str], None] = 'd5e8a3b71f04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('media_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('media_id', sa.UUID(), nullable=False),
+    sa.Column('kind', sa.String(length=50), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('run_after', sa.DateTime(), nullable=False),
+    sa.Column('locked_by', sa.String(length=100), nullable=True),
+    sa.Column('locked_at', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['media_id'], ['media.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_media_jobs_media_id', 'media_jobs', ['media_id'], unique=False)
+    op.create_index('ix_media_jobs_status_run_after', 'media_jobs', ['status', 'run_after'], unique=False)
+    # Les médias restés en "processing" avec l'ancien traitement sont repris par les workers
+    op.execute(
+        "INSERT INTO media_jobs (media_id, kind, status, attempts, max_attempts, run_after, created_at, updated_at) "
+        "SELECT id, 'process', 'pending', 0, 5, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP "
+        "FROM media WHERE status = 'processing' AND file_path IS NOT NULL AND file_path <> ''"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_media_jobs_status_run_after', table_name='media_jobs')
+    op.drop_index('ix_media_jobs_media_id', table_name='media_jobs')
+    op.drop_table('media_jobs')
@@ -0,0 +1,43 @@
+"""Add media renditions table
+
+Revision ID: f3b6d0e8c271
+Revises: e7a4c2d95b13
+Create Date: 2026-10-18 20:31:07.184392
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b6d0e8c271'
+down_revision: Union[str, Sequence[str], None] = 'e7a4c2d95b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('media_renditions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('media_id', sa.UUID(), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('format', sa.String(length=10), nullable=False),
+    sa.Column('file_path', sa.String(length=255), nullable=False),
+    sa.Column('file_size', sa.Integer(), nullable=False),
+    sa.Column('encryption_key_id', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('last_used_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['media_id'], ['media.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('media_id', 'size', 'format', name='uq_media_renditions_media_size_format')
+    )
+    op.create_index('ix_media_renditions_last_used_at', 'media_renditions', ['last_used_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_media_renditions_last_used_at', table_name='media_renditions')
+    op.drop_table('media_renditions')
@@ -0,0 +1,48 @@
+"""Rebuild tokens table for refresh tokens
+
+Revision ID: f4d7a2c96e58
+Revises: e2c8b5a71d36
+Create Date: 2026-10-19 01:06:37.418290
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4d7a2c96e58'
+down_revision: Union[str, Sequence[str], None] = 'e2c8b5a71d36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # l'ancienne table (user_id entier, users.id est un UUID) n'a jamais été utilisée
+    if sa.inspect(op.get_bind()).has_table('tokens'):
+        op.drop_table('tokens')
+    op.create_table('tokens',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('token', sa.String(length=128), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_tokens_id'), 'tokens', ['id'], unique=False)
+    op.create_index(op.f('ix_tokens_user_id'), 'tokens', ['user_id'], unique=False)
+    op.create_index(op.f('ix_tokens_token'), 'tokens', ['token'], unique=True)
+    op.create_index(op.f('ix_tokens_expires_at'), 'tokens', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_tokens_expires_at'), table_name='tokens')
+    op.drop_index(op.f('ix_tokens_token'), table_name='tokens')
+    op.drop_index(op.f('ix_tokens_user_id'), table_name='tokens')
+    op.drop_index(op.f('ix_tokens_id'), table_name='tokens')
+    op.drop_table('tokens')